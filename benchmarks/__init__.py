@@ -0,0 +1,33 @@
+"""
+Benchmarks
+==========
+
+Timing suite for the Selfish-Altruist model and the vendored mesa core.
+
+The suite times model construction, a single model step, neighbour queries,
+table collection, batch_run throughput and server render/encode over a range
+of grid sizes with fixed seeds. Every run is appended to a local history file
+and compared against a saved baseline; cases that got slower than the baseline
+by more than a threshold are flagged as regressions.
+
+Run it from the repository root:
+
+    python -m benchmarks run --sizes 5,50,200
+    python -m benchmarks run --save-baseline
+    python -m benchmarks history
+    python -m benchmarks imports
+
+The imports command checks that importing mesa and the models stays within a
+time budget, since every batch worker and CLI call pays for it.
+"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_ROOT = os.path.join(REPO_ROOT, "selfish_altruist")
+
+# The model package lives one directory down (selfish_altruist/selfish_altruist)
+# and is normally run from there; make both it and the vendored mesa importable.
+for path in (REPO_ROOT, MODEL_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
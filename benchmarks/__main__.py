@@ -0,0 +1,129 @@
+import sys
+
+import click
+
+from benchmarks import harness
+from benchmarks.cases import DEFAULT_SEED, DEFAULT_SIZES, build_cases
+
+
+def _parse_list(value, cast):
+    return [cast(v) for v in value.split(",") if v.strip()] if value else None
+
+
+@click.group()
+def cli():
+    "Benchmark the Selfish-Altruist model and the mesa core"
+    pass
+
+
+@cli.command()
+@click.option(
+    "--sizes",
+    default=",".join(map(str, DEFAULT_SIZES)),
+    show_default=True,
+    help="Comma separated side lengths of the square grids.",
+)
+@click.option("--only", default="", help="Comma separated case families to run.")
+@click.option("--seed", default=DEFAULT_SEED, show_default=True)
+@click.option(
+    "--processes",
+    default=None,
+    type=int,
+    help="Processes for the parallel batch_run case and threads for the tiled "
+    "lattice step (default: all CPUs).",
+)
+@click.option(
+    "--threshold",
+    default=harness.DEFAULT_THRESHOLD,
+    show_default=True,
+    help="Relative slowdown against the baseline that counts as a regression.",
+)
+@click.option("--label", default="", help="Free text label stored with the run.")
+@click.option(
+    "--save-baseline", is_flag=True, help="Store this run as the new baseline."
+)
+@click.option("--no-history", is_flag=True, help="Do not append to the history.")
+def run(sizes, only, seed, processes, threshold, label, save_baseline, no_history):
+    """Run the benchmark suite and compare against the baseline.
+
+    Exits with status 1 when a case regressed beyond the threshold.
+    """
+    cases = build_cases(
+        _parse_list(sizes, int), seed, processes, _parse_list(only, str)
+    )
+    results = []
+    for case in cases:
+        click.echo(f"{case.case_id} ...", err=True)
+        results.append(harness.time_case(case))
+    click.echo(harness.format_results(results))
+
+    record = harness.make_record(results, label)
+    if not no_history:
+        harness.append_history(record)
+
+    baseline = harness.load_baseline()
+    if save_baseline:
+        path = harness.save_baseline(record)
+        click.echo(f"Baseline saved to {path}")
+    elif baseline is not None:
+        rows = harness.compare(record, baseline, threshold)
+        click.echo()
+        click.echo(f"Compared to baseline of {baseline['timestamp']}:")
+        click.echo(harness.format_comparison(rows))
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+@cli.command()
+@click.option(
+    "--module",
+    "modules",
+    multiple=True,
+    default=harness.IMPORT_MODULES,
+    show_default=True,
+    help="Module to import, can be given several times.",
+)
+@click.option(
+    "--budget",
+    default=harness.IMPORT_BUDGET,
+    show_default=True,
+    help="Median import time in seconds that no module may exceed.",
+)
+@click.option("--repeat", default=5, show_default=True)
+def imports(modules, budget, repeat):
+    """Time a cold import of modules in fresh interpreters.
+
+    Exits with status 1 when a module takes longer than the budget.
+    """
+    results = [harness.time_import(module, repeat) for module in modules]
+    click.echo(harness.format_results(results))
+    over = [r.case_id for r in results if r.median > budget]
+    if over:
+        click.echo(f"Over the import budget of {budget:.3f} s: {', '.join(over)}")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option("--case", "case_id", default="", help="Only show this case id.")
+def history(case_id):
+    """Show the median times of all recorded runs."""
+    for record in harness.load_history():
+        header = f"{record['timestamp']} {record.get('revision') or ''} {record['label']}"
+        click.echo(header.strip())
+        for cid, result in record["results"].items():
+            if not case_id or cid == case_id:
+                click.echo(f"    {cid:<32}{result['median']:>14.6f}")
+
+
+@cli.command()
+def baseline():
+    """Promote the most recent run in the history to baseline."""
+    records = harness.load_history()
+    if not records:
+        raise click.ClickException("No benchmark history recorded yet.")
+    path = harness.save_baseline(records[-1])
+    click.echo(f"Baseline saved to {path}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,241 @@
+"""
+Benchmark cases
+===============
+
+Case definitions for the Selfish-Altruist model and the vendored mesa core.
+
+Every case passes the same seed to the models it builds, so repeated runs
+time identical work.
+"""
+import os
+from typing import List, Sequence
+
+import tornado.escape
+
+import mesa
+from selfish_altruist.lattice import SelfishAltruistLattice
+from selfish_altruist.model import SelfishAltruist
+
+from benchmarks.harness import Case
+
+# 5x5 is the server default, 1000x1000 the largest lattice we care about.
+DEFAULT_SIZES = (5, 50, 200, 1000)
+DEFAULT_SEED = 42
+
+# Parameters of the server sliders, a regime where both strategies survive
+# for a while.
+MODEL_PARAMS = {
+    "altruistic_probability": 0.26,
+    "selfish_probability": 0.26,
+    "cost_of_altruism": 0.13,
+    "benefit_of_altruism": 0.48,
+    "disease": 0.2,
+    "harshness": 0.96,
+}
+
+# batch_run on large lattices measures the model, not the runner, and takes
+# far too long; only time it up to this size.
+BATCH_MAX_SIZE = 100
+BATCH_ITERATIONS = 8
+BATCH_MAX_STEPS = 5
+
+
+def _repeat_for(n_cells: int) -> int:
+    """Fewer repeats for large grids, where a single call already takes long."""
+    if n_cells <= 50 * 50:
+        return 5
+    if n_cells <= 200 * 200:
+        return 3
+    return 1
+
+
+def _make_model(width: int, height: int, seed: int) -> SelfishAltruist:
+    return SelfishAltruist(
+        n_grid_cells_width=width, n_grid_cells_height=height, seed=seed, **MODEL_PARAMS
+    )
+
+
+def construction_case(width, height, seed):
+    def run(_):
+        _make_model(width, height, seed)
+
+    return Case("construct", (width, height), run, None, _repeat_for(width * height))
+
+
+def step_case(width, height, seed):
+    def setup():
+        return _make_model(width, height, seed)
+
+    def run(model):
+        model.step()
+
+    return Case("step", (width, height), run, setup, _repeat_for(width * height))
+
+
+def lattice_step_case(width, height, seed, threads):
+    def setup():
+        return SelfishAltruistLattice(
+            n_grid_cells_width=width,
+            n_grid_cells_height=height,
+            seed=seed,
+            n_threads=threads,
+            **MODEL_PARAMS,
+        )
+
+    def run(model):
+        model.step()
+
+    return Case(
+        f"lattice_step_t{threads}",
+        (width, height),
+        run,
+        setup,
+        _repeat_for(width * height),
+    )
+
+
+def neighbor_case(width, height, seed, warm):
+    """Von Neumann neighbours of every cell, as queried by the model."""
+
+    def setup():
+        model = _make_model(width, height, seed)
+        if warm:
+            _query_all_neighbors(model.grid)
+        return model.grid
+
+    def run(grid):
+        _query_all_neighbors(grid)
+
+    name = "neighbors_warm" if warm else "neighbors_cold"
+    return Case(name, (width, height), run, setup, _repeat_for(width * height))
+
+
+def _query_all_neighbors(grid):
+    for _, x, y in grid.coord_iter():
+        for _ in grid.iter_neighbors((x, y), moore=False, include_center=True, radius=1):
+            pass
+
+
+def table_case(width, height, seed):
+    """One tick worth of Fitness and Lottery rows, plus building the frames."""
+
+    def setup():
+        model = _make_model(width, height, seed)
+        rows = [
+            (agent.pos, agent.name, agent.fitness) for agent in model.schedule.agents
+        ]
+        return model.datacollector, rows
+
+    def run(arg):
+        datacollector, rows = arg
+        for pos, name, fitness in rows:
+            datacollector.add_table_row(
+                "Fitness", {"position": pos, "agent": name, "fitness": fitness}
+            )
+            datacollector.add_table_row(
+                "Lottery",
+                {
+                    "position": pos,
+                    "current agent": name,
+                    "P[selfish]": 0.0,
+                    "P[altruists]": 0.0,
+                    "P[harshness]": 0.0,
+                },
+            )
+        datacollector.get_table_dataframe("Fitness")
+        datacollector.get_table_dataframe("Lottery")
+
+    return Case("tables", (width, height), run, setup, _repeat_for(width * height))
+
+
+def batch_case(width, height, seed, processes):
+    params = dict(
+        MODEL_PARAMS, n_grid_cells_width=width, n_grid_cells_height=height
+    )
+
+    def run(_):
+        mesa.batch_run(
+            SelfishAltruist,
+            parameters=params,
+            iterations=BATCH_ITERATIONS,
+            max_steps=BATCH_MAX_STEPS,
+            number_processes=processes,
+            data_collection_period=-1,
+            display_progress=False,
+            common_random_numbers=True,
+            reuse_models=True,
+        )
+
+    return Case(
+        f"batch_run_p{processes}",
+        (width, height),
+        run,
+        None,
+        repeat=3,
+        units=BATCH_ITERATIONS,
+    )
+
+
+def render_case(width, height, seed):
+    """Render all server elements and JSON-encode the websocket message."""
+    from selfish_altruist import server as server_module
+
+    elements = [
+        server_module.canvas_element,
+        server_module.static_string,
+        server_module.chart_element1,
+        server_module.chart_element,
+    ]
+    params = dict(
+        MODEL_PARAMS, n_grid_cells_width=width, n_grid_cells_height=height, seed=seed
+    )
+
+    def setup():
+        return mesa.visualization.ModularServer(
+            SelfishAltruist, elements, "benchmark", params
+        )
+
+    def run(server):
+        tornado.escape.json_encode(
+            {"type": "viz_state", "data": server.render_model()}
+        )
+
+    return Case("render", (width, height), run, setup, _repeat_for(width * height))
+
+
+def build_cases(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    seed: int = DEFAULT_SEED,
+    processes: int = None,
+    families: Sequence[str] = None,
+) -> List[Case]:
+    """Build the benchmark cases for square grids of the given side lengths.
+
+    Args:
+        sizes: Side lengths of the square grids to benchmark.
+        seed: Seed for the random number generators.
+        processes: Number of processes for the parallel batch_run case, and
+                   of threads for the tiled lattice step; defaults to all
+                   CPUs.
+        families: Prefixes of the case families to include (e.g. ["step",
+                  "batch_run"]); defaults to all of them.
+    """
+    processes = processes or os.cpu_count() or 1
+    cases = []
+    for size in sizes:
+        cases.append(construction_case(size, size, seed))
+        cases.append(step_case(size, size, seed))
+        cases.append(lattice_step_case(size, size, seed, 1))
+        if processes > 1:
+            cases.append(lattice_step_case(size, size, seed, processes))
+        cases.append(neighbor_case(size, size, seed, warm=False))
+        cases.append(neighbor_case(size, size, seed, warm=True))
+        cases.append(table_case(size, size, seed))
+        if size <= BATCH_MAX_SIZE:
+            cases.append(batch_case(size, size, seed, 1))
+            if processes > 1:
+                cases.append(batch_case(size, size, seed, processes))
+        cases.append(render_case(size, size, seed))
+    if families:
+        cases = [case for case in cases if case.name.startswith(tuple(families))]
+    return cases
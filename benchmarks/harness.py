@@ -0,0 +1,241 @@
+"""
+Benchmark harness
+=================
+
+Timing, result history and baseline comparison for the benchmark suite.
+
+A benchmark case is a callable that is timed `repeat` times, each time after
+an untimed `setup` call whose return value is passed to the case. Results are
+stored as plain JSON so that history and baseline files can be diffed and
+inspected by hand:
+
+    history.jsonl: one JSON record per suite run, appended.
+    baseline.json: a single record that later runs are compared against.
+"""
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import MODEL_ROOT, REPO_ROOT
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", ".results")
+HISTORY_FILE = "history.jsonl"
+BASELINE_FILE = "baseline.json"
+
+# A case is flagged when its median time exceeds the baseline median by more
+# than this fraction.
+DEFAULT_THRESHOLD = 0.10
+
+# Modules whose cold import time is checked, and the budget in seconds that
+# each of them must stay below; most of it is numpy.
+IMPORT_MODULES = ("mesa", "selfish_altruist.model", "selfish_altruist.lattice")
+IMPORT_BUDGET = 0.30
+
+
+@dataclass
+class Case:
+    """A single benchmark case.
+
+    Attributes:
+        name: Case family, e.g. "step".
+        size: (width, height) of the grid the case runs on.
+        func: Timed callable; receives the return value of `setup`.
+        setup: Untimed callable run before every repeat, or None.
+        repeat: Number of timed repeats.
+        units: Number of work units per call (e.g. runs in a batch), used to
+               report throughput.
+    """
+
+    name: str
+    size: tuple
+    func: Callable[[Any], Any]
+    setup: Optional[Callable[[], Any]] = None
+    repeat: int = 5
+    units: int = 1
+
+    @property
+    def case_id(self) -> str:
+        return f"{self.name}[{self.size[0]}x{self.size[1]}]"
+
+
+@dataclass
+class Result:
+    case_id: str
+    times: List[float] = field(default_factory=list)
+    units: int = 1
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def best(self) -> float:
+        return min(self.times)
+
+    @property
+    def throughput(self) -> float:
+        return self.units / self.median if self.median > 0 else float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "median": self.median,
+            "min": self.best,
+            "repeat": len(self.times),
+            "units": self.units,
+            "throughput": self.throughput,
+        }
+
+
+def time_case(case: Case, quiet: bool = True) -> Result:
+    """Time a case, discarding anything it prints to stdout when quiet."""
+    result = Result(case.case_id, units=case.units)
+    with open(os.devnull, "w") as devnull:
+        redirect = (
+            contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()
+        )
+        with redirect:
+            for _ in range(case.repeat):
+                arg = case.setup() if case.setup is not None else None
+                start = time.perf_counter()
+                case.func(arg)
+                result.times.append(time.perf_counter() - start)
+    return result
+
+
+def time_import(module: str, repeat: int = 5) -> Result:
+    """Time importing a module in fresh interpreters, as a batch worker or a
+    CLI call does; interpreter startup is not included."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO_ROOT, MODEL_ROOT]))
+    result = Result(f"import[{module}]")
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", code],
+            cwd=REPO_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result.times.append(float(out.stdout.strip().splitlines()[-1]))
+    return result
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def make_record(results: List[Result], label: str = "") -> Dict[str, Any]:
+    """Bundle results with enough context to tell runs apart later."""
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "label": label,
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "results": {r.case_id: r.to_dict() for r in results},
+    }
+
+
+def append_history(record: Dict[str, Any], results_dir: str = RESULTS_DIR) -> str:
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, HISTORY_FILE)
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    return path
+
+
+def load_history(results_dir: str = RESULTS_DIR) -> List[Dict[str, Any]]:
+    path = os.path.join(results_dir, HISTORY_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_baseline(record: Dict[str, Any], results_dir: str = RESULTS_DIR) -> str:
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, BASELINE_FILE)
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+    return path
+
+
+def load_baseline(results_dir: str = RESULTS_DIR) -> Optional[Dict[str, Any]]:
+    path = os.path.join(results_dir, BASELINE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(
+    record: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Compare the medians of a record against a baseline record.
+
+    Returns:
+        One row per case present in both records, with the relative change
+        of the median and whether it counts as a regression.
+    """
+    rows = []
+    for case_id, current in record["results"].items():
+        reference = baseline["results"].get(case_id)
+        if reference is None:
+            continue
+        change = current["median"] / reference["median"] - 1
+        rows.append(
+            {
+                "case": case_id,
+                "baseline": reference["median"],
+                "current": current["median"],
+                "change": change,
+                "regression": change > threshold,
+            }
+        )
+    return rows
+
+
+def format_results(results: List[Result]) -> str:
+    lines = [f"{'case':<32}{'median [s]':>14}{'min [s]':>14}{'units/s':>14}"]
+    for r in results:
+        lines.append(
+            f"{r.case_id:<32}{r.median:>14.6f}{r.best:>14.6f}{r.throughput:>14.2f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'case':<32}{'baseline [s]':>14}{'current [s]':>14}{'change':>10}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['case']:<32}{row['baseline']:>14.6f}{row['current']:>14.6f}"
+            f"{row['change']:>+10.1%}{flag}"
+        )
+    return "\n".join(lines)
@@ -2,17 +2,18 @@
 Mesa Agent-Based Modeling Framework
 
 Core Objects: Model, and Agent.
+
+visualization, DataCollector and batch_run are imported on first access, so
+that runs which do not use them do not pay for pandas, tqdm and tornado.
 """
 import datetime
+import importlib
 
 from mesa.model import Model
 from mesa.agent import Agent
 
 import mesa.time as time
 import mesa.space as space
-import mesa.flat.visualization as visualization
-from mesa.datacollection import DataCollector
-from mesa.batchrunner import batch_run  # noqa
 
 __all__ = [
     "Model",
@@ -24,6 +25,31 @@ __all__ = [
     "batch_run",
 ]
 
+# name: (module, attribute of the module or None for the module itself)
+_LAZY_ATTRIBUTES = {
+    "visualization": ("mesa.flat.visualization", None),
+    "DataCollector": ("mesa.datacollection", "DataCollector"),
+    "batch_run": ("mesa.batchrunner", "batch_run"),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    value = importlib.import_module(module_name)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    # importing mesa.flat.visualization binds the mesa.visualization package
+    # here, the flat namespace replaces it as it did before
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
 __title__ = "mesa"
 __version__ = "1.1.1"
 __license__ = "Apache 2.0"
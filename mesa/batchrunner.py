@@ -4,15 +4,21 @@ Batchrunner
 
 A single class to manage a batch run or parameter sweep of a given model.
 """
+import abc
+import contextlib
 import copy
 import itertools
+import math
 import random
+import statistics
+from collections import OrderedDict
 from functools import partial
 from itertools import count, product
 from multiprocessing import Pool, cpu_count
 from warnings import warn
 from typing import (
     Any,
+    Callable,
     Dict,
     Iterable,
     List,
@@ -23,6 +29,7 @@ from typing import (
     Union,
 )
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
@@ -31,13 +38,19 @@ from mesa.model import Model
 
 def batch_run(
     model_cls: Type[Model],
-    parameters: Mapping[str, Union[Any, Iterable[Any]]],
+    parameters: Union[
+        Mapping[str, Union[Any, Iterable[Any]]], Iterable[Mapping[str, Any]]
+    ],
     # We still retain the Optional[int] because users may set it to None (i.e. use all CPUs)
     number_processes: Optional[int] = 1,
     iterations: int = 1,
     data_collection_period: int = -1,
     max_steps: int = 1000,
     display_progress: bool = True,
+    aggregate: Optional[Mapping[str, Iterable[str]]] = None,
+    group_by: Optional[Iterable[str]] = None,
+    common_random_numbers: bool = False,
+    reuse_models: bool = False,
 ) -> List[Dict[str, Any]]:
     """Batch run a mesa model with a set of parameter values.
 
@@ -47,6 +60,8 @@ def batch_run(
         The model class to batch-run
     parameters : Mapping[str, Union[Any, Iterable[Any]]],
         Dictionary with model parameters over which to run the model. You can either pass single values or iterables.
+        Alternatively an iterable of parameter dictionaries, e.g. a LatinHypercubeSampler or SobolSampler, to run
+        exactly those combinations.
     number_processes : int, optional
         Number of processes used, by default 1. Set this to None if you want to use all CPUs.
     iterations : int, optional
@@ -57,17 +72,45 @@ def batch_run(
         Maximum number of model steps after which the model halts, by default 1000
     display_progress : bool, optional
         Display batch run process, by default True
+    aggregate : Mapping[str, Iterable[str]], optional
+        Statistics to compute per reporter instead of returning the rows of
+        every run, e.g. {"%Altruist": ["mean", "var", "q0.5"]}. Supported are
+        "count", "mean", "var", "std", "min", "max" and quantiles "q<p>"
+        (0 < p < 1). They are updated online as runs finish, so the rows of
+        the individual runs are never stored.
+    group_by : Iterable[str], optional
+        Row columns to aggregate over, by default the names of all parameters.
+        Add "Step" to aggregate per collected step.
+    common_random_numbers : bool, optional
+        Pass seed=<iteration> to the model, by default False. Iteration k then
+        uses the same random numbers at every parameter combination, which
+        makes differences between combinations far less noisy. The model must
+        take a `seed` argument and draw all its random numbers from it.
+    reuse_models : bool, optional
+        Let every process reuse its models for later runs with the same
+        structural parameters, by default False. Only models that set
+        `structural_parameters` and implement `reset` are reused; others
+        are constructed for every run. Only turn it on for models whose
+        `reset` restores every attribute a run can change, or the results
+        differ from those of new models.
 
     Returns
     -------
     List[Dict[str, Any]]
-        [description]
+        The collected rows of every run, or, with `aggregate`, one row per
+        group with the group columns, the number of model runs aggregated
+        ("runs"), whatever the data collection period, and a "<reporter>_<statistic>" column per statistic.
     """
 
     runs_list = []
     run_id = 0
+    all_kwargs = _make_model_kwargs(parameters)
+    if common_random_numbers and any("seed" in kwargs for kwargs in all_kwargs):
+        raise ValueError("common_random_numbers sets the seed, do not pass one.")
     for iteration in range(iterations):
-        for kwargs in _make_model_kwargs(parameters):
+        for kwargs in all_kwargs:
+            if common_random_numbers:
+                kwargs = {**kwargs, "seed": iteration}
             runs_list.append((run_id, iteration, kwargs))
             run_id += 1
 
@@ -76,40 +119,177 @@ def batch_run(
         model_cls,
         max_steps=max_steps,
         data_collection_period=data_collection_period,
+        reuse_models=reuse_models,
+    )
+
+    results: List[Dict[str, Any]] = []
+    aggregator = None
+    if aggregate is not None:
+        if group_by is None:
+            # the parameters; not the seed set by common_random_numbers, the
+            # iterations of a parameter combination belong in one group
+            group_by = list(dict.fromkeys(k for kwargs in all_kwargs for k in kwargs))
+        aggregator = _Aggregator(aggregate, group_by)
+
+    with contextlib.ExitStack() as stack:
+        pbar = stack.enter_context(
+            tqdm(total=len(runs_list), disable=not display_progress)
+        )
+        if number_processes == 1:
+            run_map = map
+            stack.callback(_model_pool.clear)
+        else:
+            run_map = stack.enter_context(Pool(number_processes)).imap_unordered
+        for data in run_map(process_func, runs_list):
+            if aggregator is None:
+                results.extend(data)
+            else:
+                aggregator.add_rows(data)
+            pbar.update()
+
+    if aggregator is not None:
+        return aggregator.summary()
+    return results
+
+
+def sequential_batch_run(
+    model_cls: Type[Model],
+    parameters: Mapping[str, Union[Any, Iterable[Any]]],
+    reporter: str,
+    ci_width: float,
+    wave_size: int = 10,
+    max_iterations: int = 100,
+    z: float = 1.96,
+    number_processes: Optional[int] = 1,
+    data_collection_period: int = -1,
+    max_steps: int = 1000,
+    display_progress: bool = True,
+    reuse_models: bool = False,
+) -> List[Dict[str, Any]]:
+    """Batch run a mesa model, scheduling the iterations of every parameter
+    combination in waves until the confidence interval of the mean of a
+    reporter is narrow enough.
+
+    After every wave, the confidence interval of the mean final value of
+    `reporter` is computed per parameter combination; combinations whose
+    interval is narrower than `ci_width` (or that reached `max_iterations`)
+    get no further runs. Runs thus go to the uncertain combinations, e.g.
+    those near a transition, instead of being spread evenly.
+
+    Parameters
+    ----------
+    model_cls : Type[Model]
+        The model class to batch-run
+    parameters : Mapping[str, Union[Any, Iterable[Any]]],
+        Dictionary with model parameters over which to run the model. You can either pass single values or iterables.
+    reporter : str
+        Name of the model reporter whose mean is estimated, e.g. "%Altruist".
+    ci_width : float
+        Width of the confidence interval of the mean below which a parameter
+        combination stops receiving runs.
+    wave_size : int, optional
+        Number of iterations added per wave to every unfinished combination,
+        by default 10
+    max_iterations : int, optional
+        Maximum number of iterations of a combination, by default 100
+    z : float, optional
+        Standard normal quantile of the confidence level, by default 1.96 (95%)
+    number_processes : int, optional
+        Number of processes used, by default 1. Set this to None if you want to use all CPUs.
+    data_collection_period : int, optional
+        Number of steps after which data gets collected, by default -1 (end of episode)
+    max_steps : int, optional
+        Maximum number of model steps after which the model halts, by default 1000
+    display_progress : bool, optional
+        Display batch run process, by default True
+    reuse_models : bool, optional
+        Reuse models across runs with the same structural parameters, see
+        batch_run, by default False
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        The rows of all runs, as returned by batch_run.
+    """
+    if wave_size < 2:
+        raise ValueError("wave_size must be at least 2 to estimate a variance.")
+
+    process_func = partial(
+        _model_run_func,
+        model_cls,
+        max_steps=max_steps,
+        data_collection_period=data_collection_period,
+        reuse_models=reuse_models,
     )
 
+    all_kwargs = _make_model_kwargs(parameters)
+    final_values: List[List[Any]] = [[] for _ in all_kwargs]
+    active = list(range(len(all_kwargs)))
     results: List[Dict[str, Any]] = []
+    run_id = 0
 
-    with tqdm(total=len(runs_list), disable=not display_progress) as pbar:
+    with contextlib.ExitStack() as stack:
+        pbar = stack.enter_context(tqdm(total=0, disable=not display_progress))
         if number_processes == 1:
-            for run in runs_list:
-                data = process_func(run)
+            run_map = map
+            stack.callback(_model_pool.clear)
+        else:
+            run_map = stack.enter_context(Pool(number_processes)).imap_unordered
+
+        while active:
+            runs_list = []
+            point_of_run = {}
+            for point in active:
+                done = len(final_values[point])
+                n_runs = min(wave_size, max_iterations - done)
+                for iteration in range(done, done + n_runs):
+                    runs_list.append((run_id, iteration, all_kwargs[point]))
+                    point_of_run[run_id] = point
+                    run_id += 1
+            pbar.total += len(runs_list)
+            pbar.refresh()
+
+            for data in run_map(process_func, runs_list):
                 results.extend(data)
+                final_row = max(data, key=lambda row: row["Step"])
+                final_values[point_of_run[final_row["RunId"]]].append(
+                    final_row[reporter]
+                )
                 pbar.update()
-        else:
-            with Pool(number_processes) as p:
-                for data in p.imap_unordered(process_func, runs_list):
-                    results.extend(data)
-                    pbar.update()
+
+            still_active = []
+            for point in active:
+                values = final_values[point]
+                if len(values) >= max_iterations:
+                    continue
+                half_width = z * statistics.stdev(values) / math.sqrt(len(values))
+                if 2 * half_width >= ci_width:
+                    still_active.append(point)
+            active = still_active
 
     return results
 
 
 def _make_model_kwargs(
-    parameters: Mapping[str, Union[Any, Iterable[Any]]]
+    parameters: Union[
+        Mapping[str, Union[Any, Iterable[Any]]], Iterable[Mapping[str, Any]]
+    ]
 ) -> List[Dict[str, Any]]:
     """Create model kwargs from parameters dictionary.
 
     Parameters
     ----------
     parameters : Mapping[str, Union[Any, Iterable[Any]]]
-        Single or multiple values for each model parameter name
+        Single or multiple values for each model parameter name, or an
+        iterable of kwargs dictionaries which are used as they are
 
     Returns
     -------
     List[Dict[str, Any]]
         A list of all kwargs combinations.
     """
+    if not isinstance(parameters, Mapping):
+        return [dict(kwargs) for kwargs in parameters]
     parameter_list = []
     for param, values in parameters.items():
         if isinstance(values, str):
@@ -126,11 +306,45 @@ def _make_model_kwargs(
     return kwargs_list
 
 
+# Models of this process that later runs can reuse, keyed by model class and
+# structural parameter values, least recently used first.
+_model_pool: "OrderedDict[Tuple[Any, ...], Model]" = OrderedDict()
+# Number of structural variants kept in the pool.
+MODEL_POOL_SIZE = 4
+_DEFAULT = object()
+
+
+def _pooled_model(model_cls: Type[Model], kwargs: Dict[str, Any]) -> Model:
+    """A model for a run with kwargs: a pooled model of the same structure
+    reset for the run, or a new one, which is then pooled.
+
+    Models that do not set structural_parameters, or runs with unhashable
+    structural values, always get a new model.
+    """
+    structural_parameters = getattr(model_cls, "structural_parameters", None)
+    if structural_parameters is None:
+        return model_cls(**kwargs)
+    key = (model_cls, *(kwargs.get(name, _DEFAULT) for name in structural_parameters))
+    try:
+        model = _model_pool.pop(key, None)
+    except TypeError:
+        return model_cls(**kwargs)
+    if model is None:
+        model = model_cls(**kwargs)
+    else:
+        model.reset(**kwargs)
+    _model_pool[key] = model
+    while len(_model_pool) > MODEL_POOL_SIZE:
+        _model_pool.popitem(last=False)
+    return model
+
+
 def _model_run_func(
     model_cls: Type[Model],
     run: Tuple[int, int, Dict[str, Any]],
     max_steps: int,
     data_collection_period: int,
+    reuse_models: bool = False,
 ) -> List[Dict[str, Any]]:
     """Run a single model run and collect model and agent data.
 
@@ -144,6 +358,8 @@ def _model_run_func(
         Maximum number of model steps after which the model halts, by default 1000
     data_collection_period : int
         Number of steps after which data gets collected
+    reuse_models : bool
+        Take the model from the pool of this process, see _pooled_model
 
     Returns
     -------
@@ -151,7 +367,10 @@ def _model_run_func(
         Return model_data, agent_data from the reporters
     """
     run_id, iteration, kwargs = run
-    model = model_cls(**kwargs)
+    if reuse_models:
+        model = _pooled_model(model_cls, kwargs)
+    else:
+        model = model_cls(**kwargs)
     while model.running and model.schedule.steps <= max_steps:
         model.step()
 
@@ -211,6 +430,354 @@ def _collect_data(
     return model_data, all_agents_data
 
 
+def find_transition(
+    model_cls: Type[Model],
+    parameters: Mapping[str, Any],
+    search_parameter: str,
+    bounds: Tuple[float, float],
+    outcome: Callable[[Dict[str, Any]], bool],
+    target: float = 0.5,
+    replicates: int = 10,
+    max_replicates: int = 100,
+    tolerance: float = 0.005,
+    number_processes: Optional[int] = 1,
+    max_steps: int = 1000,
+    display_progress: bool = True,
+    reuse_models: bool = False,
+) -> Dict[str, Any]:
+    """Find the value of one parameter at which the probability of an outcome
+    crosses a target, by noisy bisection over batch runs.
+
+    The probability of the outcome is assumed to change monotonically over
+    `bounds`. Replicates are run in waves at each probed value until the
+    confidence interval of the outcome probability excludes the target (or
+    `max_replicates` is reached), so runs are only spent where it is unclear
+    on which side of the transition a value lies.
+
+    Parameters
+    ----------
+    model_cls : Type[Model]
+        The model class to batch-run
+    parameters : Mapping[str, Any]
+        Fixed model parameters, passed to every run.
+    search_parameter : str
+        Name of the parameter to search over.
+    bounds : Tuple[float, float]
+        Values of the search parameter that bracket the transition.
+    outcome : Callable[[Dict[str, Any]], bool]
+        Called with the final batch_run row of a run, returns whether the
+        outcome occurred, e.g. ``lambda row: row["Altruist"] > 0``.
+    target : float, optional
+        Outcome probability that defines the transition, by default 0.5
+    replicates : int, optional
+        Number of runs per wave at a probed value, by default 10
+    max_replicates : int, optional
+        Number of runs after which a probed value whose confidence interval
+        still contains the target is taken as the transition, by default 100
+    tolerance : float, optional
+        Width of the bracket at which the search stops, by default 0.005
+    number_processes : int, optional
+        Number of processes used, by default 1. Set this to None if you want to use all CPUs.
+    max_steps : int, optional
+        Maximum number of model steps after which the model halts, by default 1000
+    display_progress : bool, optional
+        Display the progress of the runs and the last probed value, by default True
+    reuse_models : bool, optional
+        Let every process reuse its models for later runs, by default False.
+        All runs of the search share one process pool, so models are reused
+        across probed values and waves. See batch_run.
+
+    Returns
+    -------
+    Dict[str, Any]
+        "transition": the estimated value of the search parameter,
+        "bracket": the final (low, high) bracket,
+        "evaluations": per probed value the number of runs, of successes and
+        the estimated probability, and "runs": the total number of runs.
+    """
+    evaluations: Dict[float, Dict[str, Any]] = {}
+    run_ids = count()
+    process_func = partial(
+        _model_run_func,
+        model_cls,
+        max_steps=max_steps,
+        data_collection_period=-1,
+        reuse_models=reuse_models,
+    )
+
+    with contextlib.ExitStack() as stack:
+        pbar = stack.enter_context(tqdm(total=0, disable=not display_progress))
+        if number_processes == 1:
+            run_map = map
+            stack.callback(_model_pool.clear)
+        else:
+            run_map = stack.enter_context(Pool(number_processes)).imap_unordered
+
+        def evaluate(value: float) -> Dict[str, Any]:
+            kwargs = dict(parameters)
+            kwargs[search_parameter] = value
+            evaluation = evaluations.setdefault(
+                value, {search_parameter: value, "replicates": 0, "successes": 0}
+            )
+            done = evaluation["replicates"]
+            runs_list = [
+                (next(run_ids), iteration, kwargs)
+                for iteration in range(done, done + replicates)
+            ]
+            pbar.total += len(runs_list)
+            pbar.refresh()
+
+            for data in run_map(process_func, runs_list):
+                # with agent reporters there is a row per agent; one is enough
+                final_row = max(data, key=lambda row: row["Step"])
+                evaluation["replicates"] += 1
+                evaluation["successes"] += bool(outcome(final_row))
+                pbar.update()
+            evaluation["probability"] = (
+                evaluation["successes"] / evaluation["replicates"]
+            )
+            return evaluation
+
+        def side(value: float) -> int:
+            """1 or -1 if the outcome probability at value is confidently above
+            or below the target, 0 if it is still undecided after max_replicates."""
+            while True:
+                evaluation = evaluate(value)
+                low, high = _wilson_interval(
+                    evaluation["successes"], evaluation["replicates"]
+                )
+                pbar.set_postfix_str(
+                    f"{search_parameter}={value}: "
+                    f"P={evaluation['probability']:.3f} [{low:.3f}, {high:.3f}] "
+                    f"({evaluation['replicates']} runs)"
+                )
+                if low > target:
+                    return 1
+                if high < target:
+                    return -1
+                if evaluation["replicates"] >= max_replicates:
+                    return 0
+
+        low, high = bounds
+        low_side, high_side = side(low), side(high)
+        if low_side != 0 and low_side == high_side:
+            raise ValueError(
+                f"The outcome probability is on the same side of {target} at "
+                f"both bounds {bounds}; they do not bracket the transition."
+            )
+
+        transition = None
+        if low_side == 0:
+            transition = low
+        elif high_side == 0:
+            transition = high
+        while transition is None and high - low > tolerance:
+            middle = (low + high) / 2
+            middle_side = side(middle)
+            if middle_side == 0:
+                transition = middle
+            elif middle_side == low_side:
+                low = middle
+            else:
+                high = middle
+
+    if transition is None:
+        # interpolate the crossing between the estimates at the bracket ends
+        p_low = evaluations[low]["probability"]
+        p_high = evaluations[high]["probability"]
+        fraction = (target - p_low) / (p_high - p_low) if p_high != p_low else 0.5
+        transition = low + min(max(fraction, 0.0), 1.0) * (high - low)
+
+    return {
+        "transition": transition,
+        "bracket": (low, high),
+        "evaluations": [evaluations[value] for value in sorted(evaluations)],
+        "runs": sum(e["replicates"] for e in evaluations.values()),
+    }
+
+
+def _wilson_interval(
+    successes: int, trials: int, z: float = 1.96
+) -> Tuple[float, float]:
+    """Wilson score confidence interval of a binomial proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z**2 / trials
+    center = (p + z**2 / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z**2 / (4 * trials**2)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+class RunningStats:
+    """Count, mean, variance, minimum and maximum of a stream of values,
+    updated with Welford's algorithm."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def push(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def var(self) -> float:
+        """Sample variance; nan for fewer than two values."""
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+
+class P2Quantile:
+    """Streaming estimate of a quantile with the P-square algorithm of Jain
+    and Chlamtac (1985), which keeps five markers instead of all values."""
+
+    def __init__(self, p: float) -> None:
+        if not 0 < p < 1:
+            raise ValueError("The quantile must be between 0 and 1.")
+        self.p = p
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def push(self, value: float) -> None:
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = max(i for i in range(4) if heights[i] <= value)
+        positions = self._positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # adjust the middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self._desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (
+                d <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + d * (heights[i + d] - heights[i]) / (
+                        positions[i + d] - positions[i]
+                    )
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float:
+        if self.count == 0:
+            return math.nan
+        if self.count <= 5:
+            # exact, interpolated like numpy.quantile
+            index = self.p * (self.count - 1)
+            low = math.floor(index)
+            high = min(low + 1, self.count - 1)
+            fraction = index - low
+            return self._heights[low] + fraction * (
+                self._heights[high] - self._heights[low]
+            )
+        return self._heights[2]
+
+
+class _Aggregator:
+    """Online statistics of reporters, grouped by row columns."""
+
+    MOMENTS = ("count", "mean", "var", "std", "min", "max")
+
+    def __init__(
+        self, aggregate: Mapping[str, Iterable[str]], group_by: Iterable[str]
+    ) -> None:
+        self.group_by = list(group_by)
+        self.aggregate = {name: list(stats) for name, stats in aggregate.items()}
+        for name, stats in self.aggregate.items():
+            for stat in stats:
+                if stat not in self.MOMENTS and self._quantile(stat) is None:
+                    raise ValueError(f"Unknown statistic {stat!r} for {name!r}.")
+        self.groups: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+
+    @staticmethod
+    def _quantile(stat: str) -> Optional[float]:
+        if not stat.startswith("q"):
+            return None
+        try:
+            return float(stat[1:])
+        except ValueError:
+            return None
+
+    def _new_group(self) -> Dict[str, Any]:
+        # a run gives a row per collected step, its RunId is counted once
+        group: Dict[str, Any] = {"runs": set()}
+        for name, stats in self.aggregate.items():
+            group[name] = RunningStats()
+            for stat in stats:
+                p = self._quantile(stat)
+                if p is not None:
+                    group[(name, stat)] = P2Quantile(p)
+        return group
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            key = tuple(row[column] for column in self.group_by)
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = self._new_group()
+            group["runs"].add(row["RunId"])
+            for name, stats in self.aggregate.items():
+                value = row[name]
+                group[name].push(value)
+                for stat in stats:
+                    if (name, stat) in group:
+                        group[(name, stat)].push(value)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        summary = []
+        for key, group in self.groups.items():
+            row = dict(zip(self.group_by, key))
+            row["runs"] = len(group["runs"])
+            for name, stats in self.aggregate.items():
+                for stat in stats:
+                    if stat in self.MOMENTS:
+                        value = getattr(group[name], stat)
+                    else:
+                        value = group[(name, stat)].value
+                    row[f"{name}_{stat}"] = value
+            summary.append(row)
+        return summary
+
+
 class ParameterError(TypeError):
     MESSAGE = (
         "Parameters must map a name to a value. "
@@ -522,6 +1089,287 @@ class ParameterSampler:
         raise StopIteration()
 
 
+# Primitive polynomials and initial direction numbers m_1..m_s of the Sobol
+# sequence for dimensions 2 and up, from Joe and Kuo, "Constructing Sobol
+# sequences with better two-dimensional projections" (2008), file
+# new-joe-kuo-6.21201: (degree s, coefficients a, initial direction numbers).
+_SOBOL_DIRECTIONS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+)
+
+# Bits of precision of the Sobol points, and so at most 2**30 points.
+_SOBOL_BITS = 30
+
+
+def _sobol_direction_numbers(dimensions: int) -> np.ndarray:
+    """Direction numbers v_1..v_bits per dimension, scaled to integers."""
+    if dimensions > len(_SOBOL_DIRECTIONS) + 1:
+        raise ValueError(
+            f"The Sobol sampler supports at most {len(_SOBOL_DIRECTIONS) + 1} dimensions."
+        )
+    bits = _SOBOL_BITS
+    directions = np.zeros((dimensions, bits), dtype=np.int64)
+    directions[0] = [1 << (bits - 1 - k) for k in range(bits)]
+    for d in range(1, dimensions):
+        s, a, m = _SOBOL_DIRECTIONS[d - 1]
+        v = [m[k] << (bits - 1 - k) for k in range(s)]
+        for k in range(s, bits):
+            value = v[k - s] ^ (v[k - s] >> s)
+            for j in range(1, s):
+                if (a >> (s - 1 - j)) & 1:
+                    value ^= v[k - j]
+            v.append(value)
+        directions[d] = v
+    return directions
+
+
+class _DesignSampler(abc.ABC):
+    """Base of the space-filling samplers: n points in the unit cube, scaled
+    to the parameter bounds.
+
+    Unlike ParameterSampler these can be iterated more than once (always
+    giving the same points), so they can be passed to batch_run directly.
+    """
+
+    def __init__(
+        self,
+        bounds: Mapping[str, Tuple[float, float]],
+        n: int,
+        fixed_parameters: Optional[Mapping[str, Any]] = None,
+        random_state: Union[None, int, np.random.Generator] = None,
+    ) -> None:
+        """
+        Args:
+            bounds: (low, high) of every varied parameter.
+            n: Number of points.
+            fixed_parameters: Parameters passed unchanged with every point.
+            random_state: Seed or numpy Generator of the randomization.
+        """
+        if not bounds:
+            raise ValueError("At least one parameter must be varied.")
+        self.param_names = tuple(bounds)
+        self.bounds = np.array([bounds[name] for name in self.param_names], dtype=float)
+        self.n = n
+        self.fixed_parameters = dict(fixed_parameters or {})
+        self.random_state = np.random.default_rng(random_state)
+        self.points = self.scale(self.sample_unit(n, len(self.param_names)))
+
+    @abc.abstractmethod
+    def sample_unit(self, n: int, dimensions: int) -> np.ndarray:
+        """n points in the unit cube of the given dimensions, as an
+        (n, dimensions) array."""
+
+    def scale(self, unit: np.ndarray) -> np.ndarray:
+        low, high = self.bounds[:, 0], self.bounds[:, 1]
+        return low + unit * (high - low)
+
+    def to_kwargs(self, point: Iterable[float]) -> Dict[str, Any]:
+        return {
+            **self.fixed_parameters,
+            **{name: float(value) for name, value in zip(self.param_names, point)},
+        }
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __iter__(self):
+        return (self.to_kwargs(point) for point in self.points)
+
+
+class LatinHypercubeSampler(_DesignSampler):
+    """Latin hypercube design: every parameter range is split into n equal
+    strata and every stratum is sampled exactly once, at a random position
+    within it (or at its center when centered)."""
+
+    def __init__(self, *args, centered: bool = False, **kwargs) -> None:
+        self.centered = centered
+        super().__init__(*args, **kwargs)
+
+    def sample_unit(self, n: int, dimensions: int) -> np.ndarray:
+        rng = self.random_state
+        strata = np.argsort(rng.random((dimensions, n)), axis=1).T
+        offset = 0.5 if self.centered else rng.random((n, dimensions))
+        return (strata + offset) / n
+
+
+class SobolSampler(_DesignSampler):
+    """Sobol low-discrepancy sequence, scrambled by default with a random
+    linear matrix scramble and digital shift, which keeps its balance
+    properties. Use a power of 2 for n."""
+
+    def __init__(self, *args, scramble: bool = True, **kwargs) -> None:
+        self.scramble = scramble
+        super().__init__(*args, **kwargs)
+
+    def sample_unit(self, n: int, dimensions: int) -> np.ndarray:
+        if n & (n - 1):
+            warn("The balance properties of Sobol points require n to be a power of 2.")
+        bits = _SOBOL_BITS
+        directions = _sobol_direction_numbers(dimensions)
+        shift = np.zeros(dimensions, dtype=np.int64)
+        if self.scramble:
+            rng = self.random_state
+            for d in range(dimensions):
+                # random lower triangular matrix with unit diagonal over GF(2),
+                # row r acting on bit r counted from the most significant one
+                matrix = np.tril(rng.integers(0, 2, (bits, bits)), -1) + np.eye(
+                    bits, dtype=np.int64
+                )
+                rows = [
+                    sum(1 << (bits - 1 - c) for c in np.flatnonzero(matrix[r]))
+                    for r in range(bits)
+                ]
+                directions[d] = [
+                    sum(
+                        (bin(int(v) & row).count("1") & 1) << (bits - 1 - r)
+                        for r, row in enumerate(rows)
+                    )
+                    for v in directions[d]
+                ]
+            shift = rng.integers(0, 1 << bits, dimensions, dtype=np.int64)
+
+        index = np.arange(n, dtype=np.int64)
+        gray = index ^ (index >> 1)
+        points = np.repeat(shift[np.newaxis, :], n, axis=0)
+        for k in range(bits):
+            points ^= ((gray >> k) & 1)[:, np.newaxis] * directions[:, k]
+        return points / float(1 << bits)
+
+
+class SaltelliDesign:
+    """Sample design of Saltelli (2010) for the first order and total Sobol
+    sensitivity indices of a model output.
+
+    Two Sobol samples A and B of n points each are combined into n * (d + 2)
+    parameter combinations: A, B and, for every parameter i, A with column i
+    taken from B. Pass the design to batch_run (more than one iteration
+    averages over the model's own noise) and the results to analyze.
+    """
+
+    def __init__(
+        self,
+        bounds: Mapping[str, Tuple[float, float]],
+        n: int,
+        fixed_parameters: Optional[Mapping[str, Any]] = None,
+        random_state: Union[None, int, np.random.Generator] = None,
+    ) -> None:
+        self.param_names = tuple(bounds)
+        dimensions = len(self.param_names)
+        # a single Sobol sample of twice the dimension gives A and B
+        sampler = SobolSampler(
+            {f"{name}_{half}": bounds[name] for half in "AB" for name in self.param_names},
+            n,
+            random_state=random_state,
+        )
+        self.fixed_parameters = dict(fixed_parameters or {})
+        self.n = n
+        self.a = sampler.points[:, :dimensions]
+        self.b = sampler.points[:, dimensions:]
+        self.ab = np.repeat(self.a[np.newaxis], dimensions, axis=0)
+        for i in range(dimensions):
+            self.ab[i, :, i] = self.b[:, i]
+
+    @property
+    def points(self) -> np.ndarray:
+        return np.concatenate([self.a, self.b, *self.ab])
+
+    def to_kwargs(self, point: Iterable[float]) -> Dict[str, Any]:
+        return {
+            **self.fixed_parameters,
+            **{name: float(value) for name, value in zip(self.param_names, point)},
+        }
+
+    def __len__(self) -> int:
+        return self.n * (len(self.param_names) + 2)
+
+    def __iter__(self):
+        return (self.to_kwargs(point) for point in self.points)
+
+    def analyze(
+        self,
+        results: Iterable[Dict[str, Any]],
+        reporter: str,
+        n_resamples: int = 100,
+        z: float = 1.96,
+        random_state: Union[None, int, np.random.Generator] = None,
+    ) -> Dict[str, Dict[str, float]]:
+        """Sobol indices of a reporter from the rows returned by batch_run.
+
+        Rows of the same parameter combination (several iterations or
+        collected steps) are averaged. The first order index uses the
+        estimator of Saltelli et al. (2010), the total index the one of
+        Jansen (1999); the confidence half-widths are z times the standard
+        deviation over bootstrap resamples of the n sample rows.
+
+        Returns
+        -------
+        Dict[str, Dict[str, float]]
+            "S1", "S1_conf", "ST" and "ST_conf" of every parameter.
+        """
+        outputs: Dict[Tuple[float, ...], List[float]] = {}
+        for row in results:
+            key = tuple(row[name] for name in self.param_names)
+            outputs.setdefault(key, []).append(row[reporter])
+
+        def evaluate(points):
+            try:
+                return np.array(
+                    [statistics.fmean(outputs[tuple(map(float, p))]) for p in points]
+                )
+            except KeyError:
+                raise ValueError(
+                    "The results do not cover every point of the design."
+                ) from None
+
+        f_a = evaluate(self.a)
+        f_b = evaluate(self.b)
+        f_ab = np.array([evaluate(ab) for ab in self.ab])
+
+        def indices(rows):
+            a, b, ab = f_a[rows], f_b[rows], f_ab[:, rows]
+            variance = np.var(np.concatenate([a, b]))
+            if variance == 0:
+                nan = np.full(len(ab), math.nan)
+                return nan, nan
+            first = np.mean(b * (ab - a), axis=1) / variance
+            total = 0.5 * np.mean((a - ab) ** 2, axis=1) / variance
+            return first, total
+
+        first, total = indices(np.arange(self.n))
+        rng = np.random.default_rng(random_state)
+        resampled = [indices(rng.integers(0, self.n, self.n)) for _ in range(n_resamples)]
+        first_conf = z * np.std([r[0] for r in resampled], axis=0)
+        total_conf = z * np.std([r[1] for r in resampled], axis=0)
+        return {
+            name: {
+                "S1": float(first[i]),
+                "S1_conf": float(first_conf[i]),
+                "ST": float(total[i]),
+                "ST_conf": float(total_conf[i]),
+            }
+            for i, name in enumerate(self.param_names)
+        }
+
+
 class BatchRunner(FixedBatchRunner):
     """DEPRECATION WARNING: BatchRunner Class has been replaced batch_run function
     This class is instantiated with a model class, and model parameters
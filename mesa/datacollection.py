@@ -28,6 +28,7 @@ The DataCollector then stores the data it collects in dictionaries:
       and its values.
 
 Finally, DataCollector can create a pandas DataFrame from each collection.
+pandas is only imported then, collecting does not need it.
 
 The default DataCollector here makes several assumptions:
     * The model has a schedule object called 'schedule'
@@ -37,7 +38,6 @@ The default DataCollector here makes several assumptions:
 from functools import partial
 import itertools
 from operator import attrgetter
-import pandas as pd
 import types
 
 
@@ -207,6 +207,16 @@ class DataCollector:
             else:
                 raise Exception("Could not insert row with missing column")
 
+    def clear(self):
+        """Drop the rows collected so far, keeping the reporters and the
+        table columns, to collect a new run."""
+        for values in self.model_vars.values():
+            values.clear()
+        self._agent_records.clear()
+        for table in self.tables.values():
+            for column in table.values():
+                column.clear()
+
     @staticmethod
     def _getattr(name, _object):
         """Turn around arguments of getattr to make it partially callable."""
@@ -218,6 +228,8 @@ class DataCollector:
         The DataFrame has one column for each model variable, and the index is
         (implicitly) the model tick.
         """
+        import pandas as pd
+
         return pd.DataFrame(self.model_vars)
 
     def get_agent_vars_dataframe(self):
@@ -226,6 +238,8 @@ class DataCollector:
         The DataFrame has one column for each variable, with two additional
         columns for tick and agent_id.
         """
+        import pandas as pd
+
         all_records = itertools.chain.from_iterable(self._agent_records.values())
         rep_names = list(self.agent_reporters)
 
@@ -243,6 +257,8 @@ class DataCollector:
             table_name: The name of the table to convert.
         """
        # pd.set_option('max_columns', None)
+        import pandas as pd
+
         if table_name not in self.tables:
             raise Exception("No such table.")
         return pd.DataFrame(self.tables[table_name])
@@ -33,6 +33,76 @@ def runserver(project):
         exec(code, {}, {})
 
 
+JOB_PATH = click.Path(exists=True, file_okay=True, dir_okay=False)
+
+
+def _load_job(job, processes, output):
+    from mesa.sweep import load_job
+
+    try:
+        job = load_job(job)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if processes is not None:
+        # 0 for all CPUs, as null in the job file
+        job["processes"] = processes or None
+    if output is not None:
+        job["output"] = output
+    return job
+
+
+@cli.command()
+@click.argument("job", type=JOB_PATH)
+@click.option(
+    "--processes", type=int, default=None, help="Override the processes of the job, 0 for all CPUs."
+)
+@click.option("--output", default=None, help="Override the output of the job.")
+@click.option("--no-progress", is_flag=True, help="Do not show a progress bar.")
+def sweep(job, processes, output, no_progress):
+    """Run the parameter sweep described by the JSON file JOB headless
+
+    See mesa.sweep for the format of JOB. The rows go to the output of the
+    job, the progress and throughput to stderr.
+    """
+    from mesa.sweep import run_sweep, write_rows
+
+    job = _load_job(job, processes, output)
+    try:
+        rows, n_runs, seconds = run_sweep(job, display_progress=not no_progress)
+        write_rows(rows, job["output"])
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(
+        f"{n_runs} runs in {seconds:.2f} s, {n_runs / seconds:.2f} runs/s",
+        err=True,
+    )
+
+
+@cli.command()
+@click.argument("job", type=JOB_PATH)
+@click.option("--repeat", type=int, default=None, help="Override the repeats of the job.")
+@click.option("--output", default=None, help="Override the output of the job.")
+def bench(job, repeat, output):
+    """Time the model of the JSON job file JOB
+
+    Every parameter combination of JOB is constructed and stepped up to
+    max_steps, repeat times, in this process. The median times go to the
+    output of the job.
+    """
+    from mesa.sweep import run_bench, write_rows
+
+    job = _load_job(job, None, output)
+    if repeat is not None:
+        job["repeat"] = repeat
+    try:
+        rows = run_bench(
+            job, progress=lambda kwargs: click.echo(f"{kwargs} ...", err=True)
+        )
+        write_rows(rows, job["output"])
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+
 @click.command()
 @click.option(
     "--no-input", is_flag=True, help="Do not prompt user for custom mesa model input."
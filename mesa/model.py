@@ -9,8 +9,6 @@ from __future__ import annotations
 
 import random
 
-from mesa.datacollection import DataCollector
-
 # mypy
 from typing import Any
 
@@ -18,6 +16,11 @@ from typing import Any
 class Model:
     """Base class for models."""
 
+    # Names of the constructor arguments that fix the structure of the model,
+    # e.g. the grid size. A model that sets them and overrides reset() can be
+    # reused by batch_run for every run with the same structural values.
+    structural_parameters: tuple[str, ...] | None = None
+
     def __new__(cls, *args: Any, **kwargs: Any) -> Any:
         """Create a new model object and instantiate its RNG automatically."""
         obj = object.__new__(cls)
@@ -65,6 +68,27 @@ class Model:
             seed = self._seed
         self.random.seed(seed)
         self._seed = seed
+        self._reseed_schedule()
+
+    def _reseed_schedule(self) -> None:
+        # the shuffled activation order of the schedule is drawn from a
+        # generator seeded from self.random, it follows a reset of it
+        reseed = getattr(getattr(self, "schedule", None), "reseed", None)
+        if reseed is not None:
+            reseed()
+
+    def reset(self, **kwargs: Any) -> None:
+        """Reinitialize the model for a new run, as if it were constructed
+        with kwargs, keeping what only depends on the structural parameters.
+
+        kwargs hold the same structural parameter values the model was
+        constructed with. Models that set structural_parameters override
+        this and call it first; it reseeds the RNG as a new model would.
+        """
+        self._seed = kwargs.get("seed", None)
+        self.random.seed(self._seed)
+        self._reseed_schedule()
+        self.running = True
 
     def initialize_data_collector(
         self, model_reporters=None, agent_reporters=None, tables=None
@@ -77,6 +101,9 @@ class Model:
             raise RuntimeError(
                 "You must add agents to the scheduler before initializing the data collector."
             )
+        # imported here so that models without a data collector do not load pandas
+        from mesa.datacollection import DataCollector
+
         self.datacollector = DataCollector(
             model_reporters=model_reporters,
             agent_reporters=agent_reporters,
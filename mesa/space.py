@@ -810,9 +810,11 @@ class ContinuousSpace:
     Assumes that all agents have a pos property storing their position as
     an (x, y) tuple.
 
-    This class uses a numpy array internally to store agents in order to speed
-    up neighborhood lookups. This array is calculated on the first neighborhood
-    lookup, and is updated if agents are added or removed.
+    This class keeps the positions of the agents in a numpy array to speed
+    up neighborhood lookups; it is updated in place when agents are placed,
+    moved or removed. Given a cell_size, the agents are also kept in a
+    uniform grid of buckets (a cell list), so get_neighbors only looks at the
+    agents in the buckets that overlap the search radius.
     """
 
     def __init__(
@@ -822,6 +824,7 @@ class ContinuousSpace:
         torus: bool,
         x_min: float = 0,
         y_min: float = 0,
+        cell_size: float | None = None,
     ) -> None:
         """Create a new continuous space.
 
@@ -831,6 +834,9 @@ class ContinuousSpace:
             x_min, y_min: (default 0) If provided, set the minimum x and y
                           coordinates for the space. Below them, values loop to
                           the other edge (if torus=True) or raise an exception.
+            cell_size: (default None) Side of the buckets of the cell list
+                       index. About the usual search radius works best. If
+                       None, get_neighbors compares against every agent.
         """
         self.x_min = x_min
         self.x_max = x_max
@@ -842,23 +848,54 @@ class ContinuousSpace:
         self.size = np.array((self.width, self.height))
         self.torus = torus
 
-        self._agent_points: npt.NDArray[FloatCoordinate] | None = None
+        # positions of the agents in rows 0 to _n_agents - 1; rows are
+        # appended on place and the last row fills the hole on remove
+        self._agent_points: npt.NDArray[FloatCoordinate] = np.empty((16, 2))
+        self._n_agents = 0
         self._index_to_agent: dict[int, Agent] = {}
-        self._agent_to_index: dict[Agent, int | None] = {}
-
-    def _build_agent_cache(self):
-        """Cache agents positions to speed up neighbors calculations."""
-        self._index_to_agent = {}
-        for idx, agent in enumerate(self._agent_to_index):
-            self._agent_to_index[agent] = idx
-            self._index_to_agent[idx] = agent
-        # Since dicts are ordered by insertion, we can iterate through agents keys
-        self._agent_points = np.array([agent.pos for agent in self._agent_to_index])
-
-    def _invalidate_agent_cache(self):
-        """Clear cached data of agents and positions in the space."""
-        self._agent_points = None
-        self._index_to_agent = {}
+        self._agent_to_index: dict[Agent, int] = {}
+
+        if cell_size is not None and cell_size <= 0:
+            raise ValueError("cell_size must be positive.")
+        self.cell_size = cell_size
+        if cell_size is not None:
+            self._n_cells = (
+                max(1, math.ceil(self.width / cell_size)),
+                max(1, math.ceil(self.height / cell_size)),
+            )
+        self._cells: dict[tuple[int, int], dict[Agent, None]] = collections.defaultdict(dict)
+        self._agent_cell: dict[Agent, tuple[int, int]] = {}
+
+    def _cell_of(self, pos: FloatCoordinate) -> tuple[int, int]:
+        """The bucket of a position inside the space."""
+        return (
+            min(int((pos[0] - self.x_min) // self.cell_size), self._n_cells[0] - 1),
+            min(int((pos[1] - self.y_min) // self.cell_size), self._n_cells[1] - 1),
+        )
+
+    def _cell_range(self, low: float, high: float, axis: int) -> Iterable[int]:
+        """The buckets along an axis that overlap [low, high]."""
+        n_cells = self._n_cells[axis]
+        minimum = (self.x_min, self.y_min)[axis]
+        extent = (self.width, self.height)[axis]
+        if not self.torus:
+            first = max(0, int((low - minimum) // self.cell_size))
+            last = min(n_cells - 1, int((high - minimum) // self.cell_size))
+            return range(first, last + 1)
+        if high - low >= extent:
+            return range(n_cells)
+        # wrapped into the space; the interval wraps around when its ends
+        # swap, even if they fall into the same bucket
+        low = (low - minimum) % extent
+        high = (high - minimum) % extent
+        first = min(int(low // self.cell_size), n_cells - 1)
+        last = min(int(high // self.cell_size), n_cells - 1)
+        if low <= high:
+            return range(first, last + 1)
+        if first <= last:
+            # the two pieces of the interval meet in a bucket
+            return range(n_cells)
+        return itertools.chain(range(first, n_cells), range(0, last + 1))
 
     def place_agent(self, agent: Agent, pos: FloatCoordinate) -> None:
         """Place a new agent in the space.
@@ -867,11 +904,21 @@ class ContinuousSpace:
             agent: Agent object to place.
             pos: Coordinate tuple for where to place the agent.
         """
-        self._invalidate_agent_cache()
-        self._agent_to_index[agent] = None
         pos = self.torus_adj(pos)
         agent.pos = pos
 
+        idx = self._n_agents
+        if idx == len(self._agent_points):
+            self._agent_points = np.concatenate([self._agent_points, np.empty_like(self._agent_points)])
+        self._agent_points[idx] = pos
+        self._n_agents += 1
+        self._agent_to_index[agent] = idx
+        self._index_to_agent[idx] = agent
+        if self.cell_size is not None:
+            cell = self._cell_of(pos)
+            self._cells[cell][agent] = None
+            self._agent_cell[agent] = cell
+
     def move_agent(self, agent: Agent, pos: FloatCoordinate) -> None:
         """Move an agent from its current position to a new position.
 
@@ -882,11 +929,14 @@ class ContinuousSpace:
         pos = self.torus_adj(pos)
         agent.pos = pos
 
-        if self._agent_points is not None:
-            # instead of invalidating the full cache,
-            # apply the move to the cached values
-            idx = self._agent_to_index[agent]
-            self._agent_points[idx] = pos
+        self._agent_points[self._agent_to_index[agent]] = pos
+        if self.cell_size is not None:
+            cell = self._cell_of(pos)
+            old_cell = self._agent_cell[agent]
+            if cell != old_cell:
+                del self._cells[old_cell][agent]
+                self._cells[cell][agent] = None
+                self._agent_cell[agent] = cell
 
     def remove_agent(self, agent: Agent) -> None:
         """Remove an agent from the space.
@@ -896,9 +946,17 @@ class ContinuousSpace:
         """
         if agent not in self._agent_to_index:
             raise Exception("Agent does not exist in the space")
-        del self._agent_to_index[agent]
-
-        self._invalidate_agent_cache()
+        idx = self._agent_to_index.pop(agent)
+        last = self._n_agents - 1
+        if idx != last:
+            moved = self._index_to_agent[last]
+            self._agent_points[idx] = self._agent_points[last]
+            self._agent_to_index[moved] = idx
+            self._index_to_agent[idx] = moved
+        del self._index_to_agent[last]
+        self._n_agents = last
+        if self.cell_size is not None:
+            del self._cells[self._agent_cell.pop(agent)][agent]
         agent.pos = None
 
     def get_neighbors(
@@ -914,20 +972,109 @@ class ContinuousSpace:
                             neighbors of a given agent, True will include that
                             agent in the results.
         """
-        if self._agent_points is None:
-            self._build_agent_cache()
+        if self.cell_size is None:
+            idxs = np.arange(self._n_agents)
+        else:
+            agent_to_index = self._agent_to_index
+            idxs = np.array(
+                sorted(
+                    agent_to_index[agent]
+                    for cx in self._cell_range(pos[0] - radius, pos[0] + radius, 0)
+                    for cy in self._cell_range(pos[1] - radius, pos[1] + radius, 1)
+                    for agent in self._cells.get((cx, cy), ())
+                ),
+                dtype=np.intp,
+            )
 
-        deltas = np.abs(self._agent_points - np.array(pos))
+        deltas = np.abs(self._agent_points[idxs] - np.array(pos))
         if self.torus:
             deltas = np.minimum(deltas, self.size - deltas)
         dists = deltas[:, 0] ** 2 + deltas[:, 1] ** 2
 
-        (idxs,) = np.where(dists <= radius**2)
+        (found,) = np.where(dists <= radius**2)
         neighbors = [
-            self._index_to_agent[x] for x in idxs if include_center or dists[x] > 0
+            self._index_to_agent[idxs[x]] for x in found if include_center or dists[x] > 0
         ]
         return neighbors
 
+    def get_neighbor_lists(
+        self, radius: float, include_center: bool = True
+    ) -> tuple[list[Agent], npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+        """Get the agents within a certain radius of every agent at once.
+
+        The agents are sorted into buckets of at least radius wide, so only
+        the pairs in neighboring buckets are compared, all in numpy.
+
+        Args:
+            radius: Get all the objects within this distance of every agent.
+            include_center: If True, include the objects at the exact position
+                            of an agent, the agent itself among them.
+
+        Returns:
+            (agents, indptr, indices): the neighbors of agents[i] are
+            agents[j] for j in indices[indptr[i]:indptr[i + 1]], in CSR form,
+            in increasing order.
+        """
+        n = self._n_agents
+        agents = [self._index_to_agent[i] for i in range(n)]
+        points = self._agent_points[:n]
+
+        n_cells = [
+            max(1, int(extent // radius)) if radius > 0 else 1
+            for extent in (self.width, self.height)
+        ]
+        cell_sizes = np.array((self.width / n_cells[0], self.height / n_cells[1]))
+        cells = np.minimum(
+            ((points - (self.x_min, self.y_min)) // cell_sizes).astype(np.intp),
+            np.array(n_cells) - 1,
+        )
+        keys = cells[:, 0] * n_cells[1] + cells[:, 1]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        offsets = set()
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if self.torus:
+                    # on a narrow torus several offsets are the same bucket
+                    offsets.add((dx % n_cells[0], dy % n_cells[1]))
+                else:
+                    offsets.add((dx, dy))
+
+        rows, columns = [], []
+        for dx, dy in sorted(offsets):
+            neighbor_cells = cells + (dx, dy)
+            if self.torus:
+                neighbor_cells %= n_cells
+                valid = np.arange(n)
+            else:
+                inside = (neighbor_cells >= 0).all(axis=1) & (neighbor_cells < n_cells).all(axis=1)
+                valid = np.flatnonzero(inside)
+            neighbor_keys = neighbor_cells[valid, 0] * n_cells[1] + neighbor_cells[valid, 1]
+            starts = np.searchsorted(sorted_keys, neighbor_keys, side="left")
+            counts = np.searchsorted(sorted_keys, neighbor_keys, side="right") - starts
+            # every agent paired with every agent of the neighboring bucket
+            row = np.repeat(valid, counts)
+            first = np.repeat(starts - np.cumsum(counts) + counts, counts)
+            column = order[first + np.arange(len(row))]
+
+            deltas = np.abs(points[row] - points[column])
+            if self.torus:
+                deltas = np.minimum(deltas, self.size - deltas)
+            dists = deltas[:, 0] ** 2 + deltas[:, 1] ** 2
+            keep = dists <= radius**2
+            if not include_center:
+                keep &= dists > 0
+            rows.append(row[keep])
+            columns.append(column[keep])
+
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+        columns = np.concatenate(columns) if columns else np.empty(0, dtype=np.intp)
+        pair_order = np.lexsort((columns, rows))
+        indices = columns[pair_order]
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+        return agents, indptr, indices
+
     def get_heading(
         self, pos_1: FloatCoordinate, pos_2: FloatCoordinate
     ) -> FloatCoordinate:
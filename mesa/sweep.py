@@ -0,0 +1,277 @@
+"""
+Sweep jobs
+==========
+
+Declarative batch runs for the `mesa sweep` and `mesa bench` commands. A job
+is a JSON file, so a sweep can be versioned and rerun instead of edited into
+a script:
+
+    {
+        "model": "selfish_altruist.model_batch:SelfishAltruist",
+        "path": [".."],
+        "parameters": {
+            "cost_of_altruism": 0.13,
+            "harshness": [0.96, 0.97],
+            "disease": {"range": [0.15, 0.25, 0.005]}
+        },
+        "iterations": 100,
+        "max_steps": 200,
+        "common_random_numbers": true,
+        "aggregate": {"%Altruist": ["mean"]},
+        "group_by": ["disease"],
+        "processes": null,
+        "output": "disease.csv"
+    }
+
+model
+    "module:Class" of the model to run.
+path
+    Directories, relative to the job file, to put on sys.path to import it.
+parameters
+    A single value, a list of values, {"range": [start, stop, step]} or
+    {"linspace": [start, stop, num]} per model parameter; every combination
+    is run.
+sampler
+    Instead of every combination, {"type": "latin_hypercube", "n": 64,
+    "bounds": {"disease": [0.1, 0.3]}, "seed": 0}, with type one of
+    SAMPLERS; parameters must then be single values, passed unchanged.
+stop
+    {"reporter": "%Altruist", "ci_width": 0.02, "wave_size": 10,
+    "max_iterations": 100}: run the iterations in waves until the confidence
+    interval of the mean of the reporter is narrower than ci_width, see
+    sequential_batch_run. iterations is then ignored.
+output
+    A .csv, .json or .jsonl file, relative to the job file, or "-" to write
+    CSV to stdout.
+processes
+    Number of processes, null for all CPUs.
+repeat
+    Number of timed runs of every parameter combination, for mesa bench.
+
+iterations, max_steps, data_collection_period, common_random_numbers,
+aggregate, group_by and reuse_models are passed on to batch_run.
+"""
+import contextlib
+import importlib
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Type
+
+import numpy as np
+
+from mesa.model import Model
+
+SAMPLERS = ("latin_hypercube", "sobol", "saltelli")
+
+DEFAULTS = {
+    "path": [],
+    "parameters": {},
+    "sampler": None,
+    "stop": None,
+    "iterations": 1,
+    "max_steps": 1000,
+    "data_collection_period": -1,
+    "common_random_numbers": False,
+    "aggregate": None,
+    "group_by": None,
+    "reuse_models": False,
+    "processes": 1,
+    "output": "-",
+    "repeat": 5,
+}
+
+
+def load_job(path: str) -> Dict[str, Any]:
+    """Read and check a job file; relative paths in it are resolved against
+    its directory."""
+    with open(path) as f:
+        config = json.load(f)
+    if "model" not in config:
+        raise ValueError(f"{path}: the job must name a model.")
+    unknown = set(config) - set(DEFAULTS) - {"model"}
+    if unknown:
+        raise ValueError(f"{path}: unknown keys {', '.join(sorted(unknown))}.")
+    if config.get("stop") is not None and config.get("aggregate") is not None:
+        raise ValueError(f"{path}: stop and aggregate cannot be combined.")
+
+    job = dict(DEFAULTS, **config)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    job["path"] = [os.path.join(base_dir, directory) for directory in job["path"]]
+    if job["output"] != "-":
+        job["output"] = os.path.join(base_dir, job["output"])
+    return job
+
+
+def import_model(job: Mapping[str, Any]) -> Type[Model]:
+    for directory in reversed(job["path"]):
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+    module_name, _, class_name = job["model"].partition(":")
+    if not class_name:
+        module_name, _, class_name = job["model"].rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _values(spec: Any) -> Any:
+    """The values of a parameter of a job."""
+    if not isinstance(spec, dict):
+        return spec
+    if set(spec) == {"range"}:
+        start, stop, step = spec["range"]
+        if all(isinstance(v, int) for v in spec["range"]):
+            return list(range(start, stop, step))
+        # stop excluded as by range, whatever the rounding of the steps; the
+        # values are rounded so that 0.15 + 2 * 0.005 is written as 0.16
+        count = max(0, math.ceil((stop - start) / step - 1e-9))
+        return (start + step * np.arange(count)).round(12).tolist()
+    if set(spec) == {"linspace"}:
+        start, stop, num = spec["linspace"]
+        return np.linspace(start, stop, num).round(12).tolist()
+    raise ValueError(f"Unknown parameter values {spec!r}.")
+
+
+def make_parameters(job: Mapping[str, Any]) -> Any:
+    """The parameters argument of batch_run for a job."""
+    from mesa import batchrunner
+
+    parameters = {name: _values(spec) for name, spec in job["parameters"].items()}
+    sampler = job["sampler"]
+    if sampler is None:
+        return parameters
+
+    varied = [name for name, values in parameters.items() if isinstance(values, list)]
+    if varied:
+        raise ValueError(f"With a sampler, {', '.join(varied)} must be single values.")
+    classes = {
+        "latin_hypercube": batchrunner.LatinHypercubeSampler,
+        "sobol": batchrunner.SobolSampler,
+        "saltelli": batchrunner.SaltelliDesign,
+    }
+    if sampler.get("type") not in classes:
+        raise ValueError(f"sampler type must be one of {', '.join(SAMPLERS)}.")
+    bounds = {name: tuple(bound) for name, bound in sampler["bounds"].items()}
+    return classes[sampler["type"]](
+        bounds, sampler["n"], fixed_parameters=parameters, random_state=sampler.get("seed")
+    )
+
+
+def run_sweep(
+    job: Mapping[str, Any], display_progress: bool = True
+) -> Tuple[List[Dict[str, Any]], int, float]:
+    """Run a job with batch_run, or sequential_batch_run when it has a stop
+    rule.
+
+    Returns:
+        The rows, the number of model runs and the wall time in seconds.
+    """
+    from mesa import batchrunner
+
+    model_cls = import_model(job)
+    parameters = make_parameters(job)
+    options = {
+        "number_processes": job["processes"],
+        "data_collection_period": job["data_collection_period"],
+        "max_steps": job["max_steps"],
+        "display_progress": display_progress,
+        "reuse_models": job["reuse_models"],
+    }
+
+    start = time.perf_counter()
+    if job["stop"] is not None:
+        if job["common_random_numbers"]:
+            raise ValueError("common_random_numbers cannot be combined with stop.")
+        rows = batchrunner.sequential_batch_run(
+            model_cls, parameters, **job["stop"], **options
+        )
+        n_runs = len({row["RunId"] for row in rows})
+    else:
+        rows = batchrunner.batch_run(
+            model_cls,
+            parameters,
+            iterations=job["iterations"],
+            aggregate=job["aggregate"],
+            group_by=job["group_by"],
+            common_random_numbers=job["common_random_numbers"],
+            **options,
+        )
+        n_runs = len(batchrunner._make_model_kwargs(parameters)) * job["iterations"]
+    return rows, n_runs, time.perf_counter() - start
+
+
+def run_bench(job: Mapping[str, Any], progress=None) -> List[Dict[str, Any]]:
+    """Time constructing and stepping the model of a job, `repeat` times for
+    every parameter combination, in this process.
+
+    A run stops after max_steps or when the model stops running. With
+    common_random_numbers, repeat k passes seed=k. What the models print is
+    discarded.
+
+    Returns:
+        One row per parameter combination with its parameters and the median
+        construction time, step time and steps per second.
+    """
+    from mesa import batchrunner
+
+    model_cls = import_model(job)
+    rows = []
+    for kwargs in batchrunner._make_model_kwargs(make_parameters(job)):
+        if progress is not None:
+            progress(kwargs)
+        construct_times, step_times = [], []
+        for repeat in range(job["repeat"]):
+            run_kwargs = kwargs
+            if job["common_random_numbers"]:
+                run_kwargs = {**kwargs, "seed": repeat}
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                model = model_cls(**run_kwargs)
+                constructed = time.perf_counter()
+                steps = 0
+                while model.running and steps < job["max_steps"]:
+                    model.step()
+                    steps += 1
+                stepped = time.perf_counter()
+            construct_times.append(constructed - start)
+            if steps:
+                step_times.append((stepped - constructed) / steps)
+        step_time = statistics.median(step_times) if step_times else float("nan")
+        rows.append(
+            {
+                **kwargs,
+                "construct [s]": statistics.median(construct_times),
+                "step [s]": step_time,
+                "steps/s": 1 / step_time if step_time > 0 else float("inf"),
+            }
+        )
+    return rows
+
+
+def _json_default(value: Any) -> Any:
+    # numpy scalars in the rows
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_rows(rows: List[Dict[str, Any]], output: Optional[str]) -> None:
+    """Write rows to a .csv, .json or .jsonl file, or as CSV to stdout when
+    output is "-" or None."""
+    if output is None or output == "-" or output.endswith(".csv"):
+        import pandas as pd
+
+        pd.DataFrame(rows).to_csv(
+            sys.stdout if output in (None, "-") else output, index=False
+        )
+    elif output.endswith(".jsonl"):
+        with open(output, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=_json_default) + "\n")
+    elif output.endswith(".json"):
+        with open(output, "w") as f:
+            json.dump(rows, f, default=_json_default, indent=1)
+    else:
+        raise ValueError(f"Unknown output format of {output}, use .csv, .json or .jsonl.")
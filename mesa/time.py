@@ -28,7 +28,10 @@ from __future__ import annotations
 from collections import defaultdict
 
 # mypy
-from typing import Iterator, Union
+from typing import Any, Callable, Dict, Hashable, Iterator, Union
+
+import numpy as np
+
 from mesa.agent import Agent
 from mesa.model import Model
 
@@ -36,6 +39,9 @@ from mesa.model import Model
 # StagedActivation has a self.time of float
 TimeT = Union[float, int]
 
+# batched phase of a group of agents, called with the state arrays
+Kernel = Callable[[Dict[str, Any]], None]
+
 
 class BaseScheduler:
     """Simplest scheduler; activates agents one at a time, in the order
@@ -52,6 +58,15 @@ class BaseScheduler:
         self.steps = 0
         self.time: TimeT = 0
         self._agents: dict[int, Agent] = {}
+        # bumped on every add and remove; the cached agent tuple is rebuilt
+        # when it no longer matches
+        self._version = 0
+        self._agent_cache: tuple[Agent, ...] = ()
+        self._agent_cache_version = 0
+        # the cached agents as an object array, for indexing with a permutation
+        self._agent_array = np.empty(0, dtype=object)
+        self._agent_array_version = 0
+        self._permutation_rng: np.random.Generator | None = None
 
     def add(self, agent: Agent) -> None:
         """Add an Agent object to the schedule.
@@ -66,6 +81,7 @@ class BaseScheduler:
             )
 
         self._agents[agent.unique_id] = agent
+        self._version += 1
 
     def remove(self, agent: Agent) -> None:
         """Remove all instances of a given agent from the schedule.
@@ -74,6 +90,20 @@ class BaseScheduler:
             agent: An agent object.
         """
         del self._agents[agent.unique_id]
+        self._version += 1
+
+    def reset(self) -> None:
+        """Put the schedule back at step 0, keeping its agents, for a model
+        that is reset for a new run."""
+        self.steps = 0
+        self.time = 0
+        self.reseed()
+
+    def reseed(self) -> None:
+        """Seed the generator of the shuffled activation order anew from the
+        model RNG, on the next shuffled step. Called when the model RNG is
+        reset, so that a reset run repeats the activation order."""
+        self._permutation_rng = None
 
     def step(self) -> None:
         """Execute the step of all the agents, one at a time."""
@@ -88,30 +118,68 @@ class BaseScheduler:
 
     @property
     def agents(self) -> list[Agent]:
-        return list(self._agents.values())
+        return list(self._agent_tuple())
+
+    def _agent_tuple(self) -> tuple[Agent, ...]:
+        """The agents in the order they were added, cached until the next
+        add or remove."""
+        if self._agent_cache_version != self._version:
+            self._agent_cache = tuple(self._agents.values())
+            self._agent_cache_version = self._version
+        return self._agent_cache
+
+    def _agent_object_array(self) -> np.ndarray:
+        """The cached agent tuple as a NumPy object array."""
+        if self._agent_array_version != self._version or len(self._agent_array) != len(self._agents):
+            agents = self._agent_tuple()
+            self._agent_array = np.empty(len(agents), dtype=object)
+            self._agent_array[:] = agents
+            self._agent_array_version = self._version
+        return self._agent_array
+
+    def _permutation(self, n: int) -> np.ndarray:
+        """A random permutation of range(n). The NumPy generator is seeded
+        from the model RNG the first time after construction or a reseed(),
+        so runs stay reproducible."""
+        if self._permutation_rng is None:
+            self._permutation_rng = np.random.default_rng(self.model.random.getrandbits(128))
+        return self._permutation_rng.permutation(n)
 
     def agent_buffer(self, shuffled: bool = False) -> Iterator[Agent]:
         """Simple generator that yields the agents while letting the user
         remove and/or add agents during stepping.
+
+        The agents present when the iteration starts are yielded. As long as
+        none is added or removed the cached agent tuple is walked as it is;
+        after a change every agent is first checked to still be scheduled.
+
+        With shuffled, the order is a NumPy permutation, drawn from a
+        generator seeded from model.random. It is not the order that
+        model.random.shuffle gave: a seeded model activates its agents in a
+        different, equally random, order than it did with the shuffle, and
+        model.random is advanced by 128 bits once, and after every reseed(),
+        instead of by a shuffle every step.
         """
-        # To be able to remove and/or add agents during stepping
-        # it's necessary to cast the keys view to a list.
-        agent_keys = list(self._agents.keys())
-        #print(agent_keys)
+        version = self._version
         if shuffled:
-            self.model.random.shuffle(agent_keys)
-        #print(agent_keys)
+            agents = self._agent_object_array()
+            agents = agents[self._permutation(len(agents))]
+        else:
+            agents = self._agent_tuple()
 
-        for agent_key in agent_keys:
-            #print(str(self._agents[agent_key].name)+"_"+str(self._agents[agent_key].unique_id))
-            if agent_key in self._agents:
-                yield self._agents[agent_key]
+        for agent in agents:
+            if self._version == version or self._agents.get(agent.unique_id) is agent:
+                yield agent
 
 
 class RandomActivation(BaseScheduler):
     """A scheduler which activates each agent once per step, in random order,
     with the order reshuffled every step.
 
+    The order is drawn with NumPy, see agent_buffer; seeded models activate
+    their agents in another order than with mesa versions that used
+    model.random.shuffle.
+
     This is equivalent to the NetLogo 'ask agents...' and is generally the
     default behavior for an ABM.
 
@@ -152,6 +220,92 @@ class SimultaneousActivation(BaseScheduler):
         self.time += 1
 
 
+class SynchronousActivation(BaseScheduler):
+    """A scheduler for synchronous update that can run each phase as a batch.
+
+    Like SimultaneousActivation, every step is a step phase, in which the
+    agents stage their changes, followed by an advance phase, in which the
+    changes are applied. A group of agents (an agent class) can register a
+    step_all and/or advance_all kernel, which runs the phase for the whole
+    group at once on the state arrays shared by the scheduler, e.g. as NumPy
+    array operations. Agents of groups without a kernel for a phase get their
+    step() or advance() called one at a time, in the order they were added.
+
+    A group can also be any other hashable key, for state that only lives in
+    the arrays and has no agent objects at all; its kernels run every step.
+    """
+
+    def __init__(self, model: Model, state_arrays: dict[str, Any] | None = None) -> None:
+        """Create an empty SynchronousActivation schedule.
+
+        Args:
+            model: Model object associated with the schedule.
+            state_arrays: The dictionary passed to every kernel; a new empty
+                one if None.
+        """
+        super().__init__(model)
+        self.state_arrays = {} if state_arrays is None else state_arrays
+        self.kernels: dict[Hashable, tuple[Kernel | None, Kernel | None]] = {}
+        # per phase, the agents without a kernel, with the schedule and
+        # kernel versions they were collected at
+        self._kernel_version = 0
+        self._per_agent_cache: dict[int, tuple[tuple[int, int], tuple[Agent, ...]]] = {}
+
+    def register_kernel(
+            self,
+            group: Hashable,
+            step_all: Kernel | None = None,
+            advance_all: Kernel | None = None,
+    ) -> None:
+        """Run a phase of a group of agents as one call.
+
+        Args:
+            group: An agent class, or another key for state without agents.
+            step_all: Stages the changes of the whole group, called with
+                state_arrays instead of step() on every agent of the group.
+            advance_all: Applies the staged changes of the whole group,
+                called with state_arrays instead of advance() on every
+                agent of the group.
+        """
+        self.kernels[group] = (step_all, advance_all)
+        self._kernel_version += 1
+
+    def unregister_kernel(self, group: Hashable) -> None:
+        """Go back to per-agent calls for a group."""
+        del self.kernels[group]
+        self._kernel_version += 1
+
+    def _per_agent(self, phase: int) -> tuple[Agent, ...]:
+        """The agents whose group has no kernel for a phase."""
+        versions = (self._version, self._kernel_version)
+        cached = self._per_agent_cache.get(phase)
+        if cached is None or cached[0] != versions:
+            agents = tuple(
+                agent
+                for agent in self._agent_tuple()
+                if self.kernels.get(type(agent), (None, None))[phase] is None
+            )
+            cached = self._per_agent_cache[phase] = (versions, agents)
+        return cached[1]
+
+    def _run_phase(self, phase: int, method: str) -> None:
+        for kernels in list(self.kernels.values()):
+            if kernels[phase] is not None:
+                kernels[phase](self.state_arrays)
+        # like agent_buffer, skip agents removed during the phase
+        version = self._version
+        for agent in self._per_agent(phase):
+            if self._version == version or self._agents.get(agent.unique_id) is agent:
+                getattr(agent, method)()
+
+    def step(self) -> None:
+        """Step all groups, then advance them."""
+        self._run_phase(0, "step")
+        self._run_phase(1, "advance")
+        self.steps += 1
+        self.time += 1
+
+
 class StagedActivation(BaseScheduler):
     """A scheduler which allows agent activation to be divided into several
     stages instead of a single `step` method. All agents execute one stage
@@ -162,6 +316,9 @@ class StagedActivation(BaseScheduler):
 
     This schedule tracks steps and time separately. Time advances in fractional
     increments of 1 / (# of stages), meaning that 1 step = 1 unit of time.
+
+    Shuffled orders are drawn with NumPy like those of RandomActivation, see
+    BaseScheduler.agent_buffer.
     """
 
     def __init__(
@@ -190,20 +347,13 @@ class StagedActivation(BaseScheduler):
 
     def step(self) -> None:
         """Executes all the stages for all agents."""
-        # To be able to remove and/or add agents during stepping
-        # it's necessary to cast the keys view to a list.
-        agent_keys = list(self._agents.keys())
-        if self.shuffle:
-            self.model.random.shuffle(agent_keys)
+        # the first stage in the order of the step, the later ones reshuffled
+        # or in the order the agents were added
+        shuffled = self.shuffle
         for stage in self.stage_list:
-            for agent_key in agent_keys:
-                if agent_key in self._agents:
-                    getattr(self._agents[agent_key], stage)()  # Run stage
-            # We recompute the keys because some agents might have been removed
-            # in the previous loop.
-            agent_keys = list(self._agents.keys())
-            if self.shuffle_between_stages:
-                self.model.random.shuffle(agent_keys)
+            for agent in self.agent_buffer(shuffled=shuffled):
+                getattr(agent, stage)()  # Run stage
+            shuffled = self.shuffle_between_stages
             self.time += self.stage_time
 
         self.steps += 1
@@ -227,11 +377,16 @@ class RandomActivationByType(BaseScheduler):
     type, you can either:
     - loop through all agents, and filter by their type
     - access via `your_model.scheduler.agents_by_type[your_type_class]`
+
+    Shuffled orders are drawn with NumPy like those of RandomActivation, see
+    BaseScheduler.agent_buffer.
     """
 
     def __init__(self, model: Model) -> None:
         super().__init__(model)
         self.agents_by_type = defaultdict(dict)
+        # per type, the schedule version and the agents as an object array
+        self._type_agent_arrays: dict[type[Agent], tuple[int, np.ndarray]] = {}
 
     def add(self, agent: Agent) -> None:
         """
@@ -248,7 +403,7 @@ class RandomActivationByType(BaseScheduler):
         """
         Remove all instances of a given agent from the schedule.
         """
-        del self._agents[agent.unique_id]
+        super().remove(agent)
 
         agent_class: type[Agent] = type(agent)
         del self.agents_by_type[agent_class][agent.unique_id]
@@ -267,11 +422,9 @@ class RandomActivationByType(BaseScheduler):
         # it's necessary to cast the keys view to a list.
         type_keys: list[type[Agent]] = list(self.agents_by_type.keys())
         if shuffle_types:
-            self.model.random.shuffle(type_keys)
+            type_keys = [type_keys[i] for i in self._permutation(len(type_keys))]
         for agent_class in type_keys:
             self.step_type(agent_class, shuffle_agents=shuffle_agents)
-            print("agent_type")
-            print(agent_class)
         self.steps += 1
         self.time += 1
 
@@ -282,12 +435,26 @@ class RandomActivationByType(BaseScheduler):
         Args:
             type_class: Class object of the type to run.
         """
-        agent_keys: list[int] = list(self.agents_by_type[type_class].keys())
+        agents_of_type = self.agents_by_type[type_class]
+        agents = self._type_agent_array(type_class)
         if shuffle_agents:
-            self.model.random.shuffle(agent_keys)
-        for agent_key in agent_keys:
-            if agent_key in self.agents_by_type[type_class]:
-                self.agents_by_type[type_class][agent_key].step()
+            agents = agents[self._permutation(len(agents))]
+        version = self._version
+        for agent in agents:
+            # like agent_buffer, skip agents removed during the step
+            if self._version == version or agents_of_type.get(agent.unique_id) is agent:
+                agent.step()
+
+    def _type_agent_array(self, type_class: type[Agent]) -> np.ndarray:
+        """The agents of a type as a NumPy object array, cached until the
+        next add or remove."""
+        cached = self._type_agent_arrays.get(type_class)
+        if cached is None or cached[0] != self._version:
+            agents = list(self.agents_by_type[type_class].values())
+            array = np.empty(len(agents), dtype=object)
+            array[:] = agents
+            cached = self._type_agent_arrays[type_class] = (self._version, array)
+        return cached[1]
 
     def get_type_count(self, type_class: type[Agent]) -> int:
         """
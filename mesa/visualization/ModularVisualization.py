@@ -93,6 +93,33 @@ Client -> Server:
     {
     "type": "get_params"
     }
+
+A ReplayServer shows a recorded run instead of a model and adds to this:
+
+Server -> Client:
+    Informs the client of the number of recorded steps, so it can show a
+    scrub bar.
+    {
+    "type": "replay_info",
+    "n_steps": number of recorded steps
+    }
+
+    The state at a step the client seeked to, plus for every element with a
+    render_history method (None for the others) the data of the steps
+    before it, so charts can be redrawn at once.
+    {
+    "type": "seek_state",
+    "step": the step,
+    "data": as for viz_state,
+    "history": [{"ticks": [...], "values": [...]}, None, ...]
+    }
+
+Client -> Server:
+    Jump to a step.
+    {
+    "type": "seek",
+    "step": index of the step to show
+    }
 """
 import asyncio
 import os
@@ -250,10 +277,49 @@ class SocketHandler(tornado.websocket.WebSocketHandler):
                 print("Unexpected message!")
 
 
+class ReplaySocketHandler(SocketHandler):
+    """Handler for the websocket of a ReplayServer: steps are looked up in
+    the recording instead of computed."""
+
+    def open(self):
+        super().open()
+        self.write_message(
+            {"type": "replay_info", "n_steps": self.application.model.n_steps}
+        )
+
+    def on_message(self, message):
+        if self.application.verbose:
+            print(message)
+        msg = tornado.escape.json_decode(message)
+        if msg["type"] == "get_step":
+            if msg["step"] >= self.application.model.n_steps:
+                self.write_message({"type": "end"})
+            else:
+                self.application.model.seek(msg["step"])
+                self.write_message(self.viz_state_message)
+        elif msg["type"] == "seek":
+            step = min(max(int(msg["step"]), 0), self.application.model.n_steps - 1)
+            self.application.model.seek(step)
+            self.write_message(
+                {
+                    "type": "seek_state",
+                    "step": step,
+                    "data": self.application.render_model(),
+                    "history": self.application.render_history(),
+                }
+            )
+        elif msg["type"] == "reset":
+            self.application.reset_model()
+            self.write_message(self.viz_state_message)
+        elif self.application.verbose:
+            print("Unexpected message!")
+
+
 class ModularServer(tornado.web.Application):
     """Main visualization application."""
 
     EXCLUDE_LIST = ("width", "height")
+    socket_handler = SocketHandler
 
     def __init__(
         self,
@@ -288,7 +354,7 @@ class ModularServer(tornado.web.Application):
 
         # Handlers and other globals:
         page_handler = (r"/", PageHandler)
-        socket_handler = (r"/ws", SocketHandler)
+        socket_handler = (r"/ws", self.socket_handler)
         static_handler = (
             r"/static/(.*)",
             tornado.web.StaticFileHandler,
@@ -431,3 +497,46 @@ class ModularServer(tornado.web.Application):
             self._auto_convert_fn_to_TextElement(e) for e in visualization_elements
         ]
         return out_elements
+
+
+class ReplayServer(ModularServer):
+    """Visualization server that plays back a recorded run, with seeking,
+    scrubbing and a variable number of steps per frame, without running a
+    model.
+
+    The replay takes the place of the model: it is passed to the render
+    methods of the visualization elements, so it must provide what they read
+    (e.g. a grid for CanvasGrid, a datacollector for ChartModule), and
+
+        n_steps: the number of recorded steps,
+        seek(step): put the replay into the state of the given step.
+
+    Elements with a render_history(model) method, like ChartModule, also get
+    to send the data of all steps before the one seeked to.
+    """
+
+    socket_handler = ReplaySocketHandler
+
+    def __init__(self, replay, visualization_elements, name="Mesa Replay", port=None):
+        """
+        Args:
+            replay: The recorded run, see above.
+            visualization_elements: visualisation elements
+            name: A String for the model name
+            port: Port the webserver listens to (int), see ModularServer
+        """
+        self.replay = replay
+        super().__init__(type(replay), visualization_elements, name, port=port)
+
+    def reset_model(self):
+        """Go back to the first recorded step."""
+        self.model = self.replay
+        self.model.seek(0)
+
+    def render_history(self):
+        return [
+            element.render_history(self.model)
+            if hasattr(element, "render_history")
+            else None
+            for element in self.visualization_elements
+        ]
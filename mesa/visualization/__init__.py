@@ -7,3 +7,16 @@ TextVisualization: Base class for writing ASCII visualizations of model state.
 TextServer: Class which takes a TextVisualization child class as an input, and
 renders it in-browser, along with an interface.
 """
+import importlib
+
+
+def __getattr__(name):
+    # mesa.visualization stands for the flat namespace of
+    # mesa.flat.visualization, see mesa/__init__.py; when a submodule is
+    # imported before mesa.visualization is first accessed, this package is
+    # bound in its place, and the flat names are looked up from here
+    flat = importlib.import_module("mesa.flat.visualization")
+    try:
+        return getattr(flat, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
@@ -82,3 +82,18 @@ class ChartModule(VisualizationElement):
                 val = 0
             current_values.append(val)
         return current_values
+
+    def render_history(self, model, max_points=1000):
+        """The values of the series at the steps before the latest one, at
+        most max_points of them (evenly spaced), for redrawing the chart
+        after a seek."""
+        data_collector = getattr(model, self.data_collector_name)
+        columns = [data_collector.model_vars.get(s["Label"], []) for s in self.series]
+        n_steps = max(len(column) for column in columns) - 1
+        stride = max(1, -(-n_steps // max_points))
+        ticks = list(range(0, n_steps, stride))
+        values = [
+            [column[tick] if tick < len(column) else 0 for column in columns]
+            for tick in ticks
+        ]
+        return {"ticks": ticks, "values": values}
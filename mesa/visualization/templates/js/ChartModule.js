@@ -84,6 +84,18 @@ const ChartModule = function (series, canvas_width, canvas_height) {
     chart.update();
   };
 
+  this.renderHistory = (history) => {
+    // add many steps at once, e.g. after seeking in a replay
+    history.ticks.forEach((tick, index) => {
+      chart.data.labels.push(tick);
+      const values = history.values[index];
+      for (let i = 0; i < values.length; i++) {
+        chart.data.datasets[i].data.push(values[i]);
+      }
+    });
+    chart.update();
+  };
+
   this.reset = () => {
     while (chart.data.labels.length) {
       chart.data.labels.pop();
@@ -3,6 +3,10 @@
  step() send a message to the server, which then sends back the appropriate data.
  start() just calls the step() method at fixed intervals.
 
+ When the server is a ReplayServer it announces the number of recorded steps,
+ and the controller gets a scrub bar to seek() to any step and a number of
+ steps to advance per frame.
+
  The model parameters are controlled via the ModelController object.
 */
 
@@ -33,6 +37,10 @@ function ModelController(tick = 0, fps = 3, running = false, finished = false) {
   this.fps = fps;
   this.running = running;
   this.finished = finished;
+  // only set when replaying a recorded run
+  this.nSteps = null;
+  this.stride = 1;
+  this.scrubber = null;
 
   /** Start the model and keep it running until stopped */
   this.start = function start() {
@@ -56,7 +64,13 @@ function ModelController(tick = 0, fps = 3, running = false, finished = false) {
    * after the visualization elements are rendered. */
   const max_model_steps = 100000;
   this.step = function step() {
-    this.tick += 1;
+    if (this.nSteps === null) {
+      this.tick += 1;
+    } else {
+      // do not skip the last recorded step
+      const last = this.nSteps - 1;
+      this.tick = this.tick < last ? Math.min(this.tick + this.stride, last) : this.tick + 1;
+    }
     stepDisplay.innerText = this.tick;
     //nPredators.innerText = this.tick+10;  //PVD
     send({ type: "get_step", step: this.tick });
@@ -79,6 +93,60 @@ function ModelController(tick = 0, fps = 3, running = false, finished = false) {
     send({ type: "reset" });
   };
 
+  /**
+   * Jump to a step of a replay.
+   * @param {number} step - The step to show
+   */
+  this.seek = function seek(step) {
+    clearTimeout(this.timeout);
+    send({ type: "seek", step: step });
+  };
+
+  /**
+   * Show the state of a replay after a seek, redrawing elements with history.
+   * @param {number} step - The step seeked to
+   * @param {any[]} data - Its state data, as for render
+   * @param {any[]} history - Per element the data of the earlier steps, or null
+   */
+  this.showSeek = function showSeek(step, data, history) {
+    this.tick = step;
+    stepDisplay.innerText = this.tick;
+    vizElements.forEach((element, index) => {
+      element.reset();
+      if (history[index] !== null && element.renderHistory) {
+        element.renderHistory(history[index]);
+      }
+    });
+    if (this.finished) {
+      this.finished = false;
+      startModelButton.firstElementChild.innerText = this.running ? "Stop" : "Start";
+    }
+    this.render(data);
+  };
+
+  /**
+   * Add the scrub bar and steps per frame input of a replay.
+   * @param {number} nSteps - The number of recorded steps
+   */
+  this.initReplay = function initReplay(nSteps) {
+    this.nSteps = nSteps;
+    const topbar = document.getElementById("elements-topbar");
+    const div = document.createElement("div");
+    div.innerHTML = `
+      <label class="badge bg-primary" for="scrubber">Step</label>
+      <input id="scrubber" type="range" min="0" max="${nSteps - 1}" value="0" style="width: 100%">
+      <label class="badge bg-primary" for="stride" style="margin-right: 15px">Steps Per Frame</label>
+      <input id="stride" type="number" min="1" max="${Math.max(1, nSteps - 1)}" value="1">
+    `;
+    topbar.appendChild(div);
+    this.scrubber = document.getElementById("scrubber");
+    this.scrubber.addEventListener("input", () => this.seek(Number(this.scrubber.value)));
+    const strideInput = document.getElementById("stride");
+    strideInput.addEventListener("change", () => {
+      this.stride = Math.max(1, Math.floor(Number(strideInput.value)));
+    });
+  };
+
   /** Stops the model and put it into a finished state */
   this.done = function done() {
     this.stop();
@@ -92,6 +160,9 @@ function ModelController(tick = 0, fps = 3, running = false, finished = false) {
    */
   this.render = function render(data) {
     vizElements.forEach((element, index) => element.render(data[index]));
+    if (this.scrubber !== null) {
+      this.scrubber.value = this.tick;
+    }
 
     if (this.running) {
       this.timeout = setTimeout(() => this.step(), 1000 / this.fps);
@@ -174,6 +245,14 @@ ws.onmessage = function (message) {
       // We have reached the end of the model
       controller.done();
       break;
+    case "replay_info":
+      // The server replays a recorded run
+      controller.initReplay(msg["n_steps"]);
+      break;
+    case "seek_state":
+      // State of a replay at the step we jumped to
+      controller.showSeek(msg["step"], msg["data"], msg["history"]);
+      break;
     case "model_params":
       // Create GUI elements for each model parameter and reset everything
       initGUI(msg["params"]);
@@ -1,3 +1,16 @@
-from selfish_altruist.server import server
+import sys
+
+if sys.argv[1:] == ["--hex"]:
+    # the model on a hexagonal lattice
+    from selfish_altruist.hexlattice import make_hex_server
+
+    server = make_hex_server()
+elif len(sys.argv) > 1:
+    # replay a recording made with selfish_altruist.trajectory.TrajectoryRecorder
+    from selfish_altruist.replay import make_replay_server
+
+    server = make_replay_server(sys.argv[1])
+else:
+    from selfish_altruist.server import server
 
 server.launch()
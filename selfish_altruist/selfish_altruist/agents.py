@@ -12,9 +12,14 @@ class SelfishAltruistAgent(mesa.Agent):
             fully_grown: (boolean) Whether the patch of grass is fully grown or not
         """
         super().__init__(unique_id, model)
-        self.name = str()
+        self._name = str()
         self.pcolor = str()
         self.pos = pos
+        self.reset()
+
+    def reset(self):
+        """Clear the fitness and neighborhood sums, for a new run; the
+        strategy is set by the model."""
         self.fitness: float = 0
 
         self.n_neighboring_altruists = 0  # N_A in paper
@@ -26,12 +31,29 @@ class SelfishAltruistAgent(mesa.Agent):
         self.weight_fitness_altruists_in_neighborhood = 0
         self.weight_fitness_harshness_in_neighborhood = 0
 
+    @property
+    def name(self):
+        """The strategy of the cell: "altruist", "selfish" or "void"."""
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        old_value = self._name
+        self._name = value
+        if value != old_value:
+            # keeps the strategy counts of the scheduler up to date
+            state_changed = getattr(self.model.schedule, "state_changed", None)
+            if state_changed is not None:
+                state_changed(self, "name", old_value)
+
     def n_neighboring_agents_per_type(self):
         #print("position " + str(self.pos))
         n_neighbor_selfish = 0
         n_neighbor_altruists = 0
         n_neighbor_voids = 0
-        neighbor_iterator = self.model.grid.iter_neighbors(self.pos, moore=False, include_center=True, radius=1)
+        neighbor_iterator = self.model.grid.iter_neighbors(
+            self.pos, moore=self.model.moore, include_center=True, radius=self.model.radius
+        )
         for neighbor in neighbor_iterator:
             #print(str(neighbor.pos) + ":  " + str(neighbor.name))
             if neighbor.name == "selfish":
@@ -61,17 +83,15 @@ class SelfishAltruistAgent(mesa.Agent):
             return fitness_void
 
     def step(self):
-        n_selfish, n_altruists, n_voids, n_cells = self.n_neighboring_agents_per_type()
         self.fitness = self.calculate_fitness()
         self.model.datacollector.add_table_row(
             "Fitness", {
                 "position": self.pos,
                 "agent": self.name,
-                "fitness": self.calculate_fitness(),
+                "fitness": self.fitness,
             }
         )
 
-        print("position " + str(self.pos) + " fitness " + str(self.name) + " = " + str(self.fitness) + " N_A = " + str(n_altruists))
         # print("n_altruists")
         # print(n_altruists)
         # print("n_altruists/5")
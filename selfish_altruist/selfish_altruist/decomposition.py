@@ -0,0 +1,368 @@
+"""
+Domain decomposed Selfish-Altruist Lattice
+
+Runs a SelfishAltruistLattice in several worker processes. The strategy codes
+(double buffered), the fitness and the per-worker counters live in
+multiprocessing.shared_memory blocks; every worker owns a strip of
+consecutive row bands and reads the halo rows of its neighbors straight from
+the shared buffers.
+
+The step is bulk-synchronous, every tick the workers and the main process
+pass the same barrier four times:
+
+    A  start: the main process has published the command for this tick
+    B  every strip has its fitness, so halo fitness rows can be read
+    C  every strip has bred into the other code buffer
+    D  every strip has reset the fitness of its void cells and reported
+       its counts, which the main process then reduces
+
+Results are identical to a SelfishAltruistLattice with the same seed and
+number of bands, whatever the number of workers.
+
+Every barrier but A, where the workers idle between ticks, is passed with a
+timeout. A worker that dies or hangs breaks the barrier instead of leaving
+the others waiting forever; the main process then stops the workers and
+raises RuntimeError.
+"""
+
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from selfish_altruist import snapshot
+from selfish_altruist.lattice import (
+    ALTRUIST,
+    CELLS,
+    SELFISH,
+    VOID,
+    SelfishAltruistLattice,
+    breed,
+    calculate_fitness,
+    halo_rows,
+    lottery_weights,
+)
+
+# commands in the shared control block
+STEP = 1
+STOP = 2
+# copy the lottery streams of the workers to and from the shared block
+SAVE_RNGS = 3
+LOAD_RNGS = 4
+
+# seconds to wait for the other processes at a barrier
+BARRIER_TIMEOUT = 60.0
+
+
+def pack_rng_state(rng, out):
+    """Write the state of a PCG64 generator to 6 uint64 values."""
+    state = rng.bit_generator.state
+    mask = (1 << 64) - 1
+    out[:] = (
+        state["state"]["state"] >> 64,
+        state["state"]["state"] & mask,
+        state["state"]["inc"] >> 64,
+        state["state"]["inc"] & mask,
+        state["has_uint32"],
+        state["uinteger"],
+    )
+
+
+def unpack_rng_state(rng, packed):
+    """Set the state of a PCG64 generator from pack_rng_state values."""
+    state_high, state_low, inc_high, inc_low, has_uint32, uinteger = (int(value) for value in packed)
+    rng.bit_generator.state = {
+        "bit_generator": "PCG64",
+        "state": {"state": state_high << 64 | state_low, "inc": inc_high << 64 | inc_low},
+        "has_uint32": has_uint32,
+        "uinteger": uinteger,
+    }
+
+
+class SharedArray:
+    """A NumPy array backed by a shared memory block."""
+
+    def __init__(self, shape, dtype, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def spec(self):
+        """What another process needs to attach to the block."""
+        return self.shm.name, self.shape, self.dtype.str
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        return cls(shape, dtype, name=name)
+
+    def close(self, unlink=False):
+        # the buffer can only be released once no array refers to it
+        self.array = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _run_worker(worker, specs, parameters, band_indices, bands, band_rngs, barrier, timeout):
+    """Main loop of a worker process, see the module docstring."""
+    blocks = {key: SharedArray.attach(spec) for key, spec in specs.items()}
+    code_buffers = (blocks["codes_0"].array, blocks["codes_1"].array)
+    fitness = blocks["fitness"].array
+    control = blocks["control"].array
+    counts = blocks["counts"].array
+    rng_states = blocks["rng_states"].array
+    cost_of_altruism, benefit_of_altruism, harshness, disease = parameters
+    try:
+        while True:
+            barrier.wait()  # A
+            if control[0] == STOP:
+                break
+            if control[0] in (SAVE_RNGS, LOAD_RNGS):
+                for i, rng in zip(band_indices, band_rngs):
+                    if control[0] == SAVE_RNGS:
+                        pack_rng_state(rng, rng_states[i])
+                    else:
+                        unpack_rng_state(rng, rng_states[i])
+                barrier.wait(timeout)
+                continue
+            codes = code_buffers[control[1]]
+            next_codes = code_buffers[1 - control[1]]
+
+            for start, stop in bands:
+                fitness[start:stop] = calculate_fitness(
+                    halo_rows(codes, start, stop), cost_of_altruism, benefit_of_altruism, harshness
+                )
+            barrier.wait(timeout)  # B
+
+            n_altruist = n_selfish = 0
+            for (start, stop), rng in zip(bands, band_rngs):
+                weight_altruists, weight_selfish = lottery_weights(
+                    halo_rows(codes, start, stop), halo_rows(fitness, start, stop), disease
+                )
+                band_codes = breed(weight_altruists, weight_selfish, rng.random(weight_altruists.shape))
+                next_codes[start:stop] = band_codes
+                n_altruist += np.count_nonzero(band_codes == ALTRUIST)
+                n_selfish += np.count_nonzero(band_codes == SELFISH)
+            barrier.wait(timeout)  # C
+
+            for start, stop in bands:
+                strip = fitness[start:stop]
+                strip[next_codes[start:stop] == VOID] = harshness
+            counts[worker] = n_altruist, n_selfish
+            barrier.wait(timeout)  # D
+    except threading.BrokenBarrierError:
+        pass
+    except BaseException:
+        # wake everybody up rather than leave them waiting forever
+        barrier.abort()
+        raise
+    finally:
+        code_buffers = fitness = control = counts = rng_states = None
+        for block in blocks.values():
+            block.close()
+
+
+class SelfishAltruistDecomposed(SelfishAltruistLattice):
+    """
+    SelfishAltruistLattice stepped by n_workers processes over shared memory.
+
+    Call close() (or use the model as a context manager) to stop the workers
+    and free the shared memory. The workers are processes of their own, and
+    the daemonic processes of a multiprocessing pool cannot start any, so the
+    model does not run in batch_run with several processes; it is meant for
+    single very large lattices.
+    """
+
+    def __init__(self, *args, n_workers=2, timeout=BARRIER_TIMEOUT, **kwargs):
+        """
+        Args:
+            n_workers: Number of worker processes; every worker owns a strip
+                of consecutive row bands, so there can be at most n_bands
+                workers. The other arguments are the ones of
+                SelfishAltruistLattice, except n_threads.
+            timeout: Seconds to wait for the workers at a barrier before the
+                model is closed and RuntimeError raised.
+        """
+        kwargs["n_threads"] = 1
+        super().__init__(*args, **kwargs)
+        if not self.neighborhood.is_default:
+            # the workers only exchange one halo row
+            raise ValueError("The decomposed lattice only supports the von Neumann radius 1 neighborhood.")
+        if not 1 <= n_workers <= len(self.bands):
+            raise ValueError("n_workers must be between 1 and the number of bands.")
+        self.n_workers = n_workers
+        self.timeout = timeout
+        # the workers run the tick, the scheduler only keeps the time
+        self.schedule.unregister_kernel(CELLS)
+
+        shape = self.codes.shape
+        self.blocks = {
+            "codes_0": SharedArray(shape, np.uint8),
+            "codes_1": SharedArray(shape, np.uint8),
+            "fitness": SharedArray(shape, np.float64),
+            "control": SharedArray((2,), np.int64),
+            "counts": SharedArray((n_workers, 2), np.int64),
+            "rng_states": SharedArray((len(self.bands), 6), np.uint64),
+        }
+        self.blocks["codes_0"].array[:] = self.codes
+        self.blocks["fitness"].array[:] = self.fitness
+        self.control = self.blocks["control"].array
+        self.control[:] = (STEP, 0)
+        self.codes = self.blocks["codes_0"].array
+        self.fitness = self.blocks["fitness"].array
+
+        specs = {key: block.spec for key, block in self.blocks.items()}
+        parameters = (self.cost_of_altruism, self.benefit_of_altruism, self.harshness, self.disease)
+        chunks = np.array_split(np.arange(len(self.bands)), n_workers)
+        self.barrier = multiprocessing.Barrier(n_workers + 1)
+        self.workers = []
+        for worker, chunk in enumerate(chunks):
+            process = multiprocessing.Process(
+                target=_run_worker,
+                args=(
+                    worker,
+                    specs,
+                    parameters,
+                    chunk.tolist(),
+                    [self.bands[i] for i in chunk],
+                    [self.band_rngs[i] for i in chunk],
+                    self.barrier,
+                    timeout,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.workers.append(process)
+        self.closed = False
+
+    def wait(self):
+        # a worker that died asleep at the barrier never acknowledges being
+        # woken up, the last process to arrive would wait for it forever
+        if all(process.is_alive() for process in self.workers):
+            try:
+                self.barrier.wait(self.timeout)
+                return
+            except threading.BrokenBarrierError:
+                pass
+        exited = [process for process in self.workers if not process.is_alive()]
+        self.close()
+        if exited:
+            codes = ", ".join(str(process.exitcode) for process in exited)
+            raise RuntimeError(
+                f"{len(exited)} worker process(es) of the decomposed lattice exited, exit codes {codes}."
+            )
+        raise RuntimeError(
+            f"The worker processes of the decomposed lattice did not reach the barrier within {self.timeout} s."
+        )
+
+    def step(self):
+        if self.closed:
+            raise RuntimeError("The decomposed lattice has been closed.")
+        self.update_counts()
+
+        self.control[0] = STEP
+        self.wait()  # A
+        self.wait()  # B
+        self.schedule.step()
+        self.datacollector.collect(self)
+        self.wait()  # C
+        self.wait()  # D
+
+        current = 1 - self.control[1]
+        self.control[1] = current
+        self.codes = self.blocks[f"codes_{current}"].array
+        n_altruist, n_selfish = self.blocks["counts"].array.sum(axis=0)
+        self.n_altruist = int(n_altruist)
+        self.n_selfish = int(n_selfish)
+
+        if self.percentage_of_altruist > 0.7:
+            self.running = False
+
+    def exchange_rngs(self, command):
+        """Copy the lottery streams of the workers to band_rngs (SAVE_RNGS)
+        or the other way around (LOAD_RNGS), through the shared block."""
+        rng_states = self.blocks["rng_states"].array
+        if command == LOAD_RNGS:
+            for i, rng in enumerate(self.band_rngs):
+                pack_rng_state(rng, rng_states[i])
+        self.control[0] = command
+        self.wait()  # A
+        self.wait()  # the workers are done with the block
+        if command == SAVE_RNGS:
+            for i, rng in enumerate(self.band_rngs):
+                unpack_rng_state(rng, rng_states[i])
+
+    def snapshot(self):
+        """
+        Return the state of the run as snapshot bytes, like
+        SelfishAltruistLattice.snapshot; the lottery streams are first
+        fetched from the workers.
+        """
+        if not self.closed:
+            self.exchange_rngs(SAVE_RNGS)
+        return super().snapshot()
+
+    @classmethod
+    def restore(cls, data, n_workers=2, timeout=BARRIER_TIMEOUT):
+        """
+        Return a new model in the state of the snapshot bytes data, stepped
+        by n_workers worker processes. The DataCollector starts empty.
+        """
+        header, arrays = snapshot.loads(data, cls.__name__)
+        model = cls(**header["parameters"], n_workers=n_workers, timeout=timeout)
+        model.load_state(header, arrays)
+        return model
+
+    def load_state(self, header, arrays):
+        # codes and fitness are written to the shared blocks, the lottery
+        # streams are handed on to the workers
+        super().load_state(header, arrays)
+        self.exchange_rngs(LOAD_RNGS)
+
+    def close(self):
+        """Stop the worker processes and release the shared memory."""
+        if self.closed:
+            return
+        self.closed = True
+        if not self.barrier.broken and all(process.is_alive() for process in self.workers):
+            # keep the lottery streams, for a snapshot of the final state
+            try:
+                self.exchange_rngs(SAVE_RNGS)
+            except RuntimeError:
+                pass
+            self.control[0] = STOP
+            try:
+                self.barrier.wait(self.timeout)
+            except threading.BrokenBarrierError:
+                pass
+            for process in self.workers:
+                process.join(self.timeout)
+        for process in self.workers:
+            if process.is_alive():
+                # waiting at a barrier the others will not reach, or hung
+                process.terminate()
+            process.join()
+        # keep private copies so the final state can still be inspected
+        self.codes = self.codes.copy()
+        self.fitness = self.fitness.copy()
+        self.control = None
+        for block in self.blocks.values():
+            block.close(unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, "closed", True) is False:
+            self.close()
@@ -0,0 +1,234 @@
+"""
+Selfish-Altruist Hex Lattice Model
+
+SelfishAltruistLattice on a hexagonal torus: every cell has six neighbors,
+laid out by the odd-q rules of mesa.space.HexGrid. The neighborhood of every
+cell, the cell itself included, is precomputed once as a (n_cells, 7) table
+of flat indices y * width + x, and fitness and the lottery gather over it for
+the whole lattice at once.
+
+The cells have no agent objects while running. The grid attribute, which
+CanvasHexGrid renders, is a HexGrid of read-only cell views that is only
+built when it is first used.
+"""
+
+import mesa
+import numpy as np
+
+from selfish_altruist.lattice import (
+    ALTRUIST,
+    SELFISH,
+    STRATEGY_NAMES,
+    VOID,
+    SelfishAltruistLattice,
+    breed,
+)
+
+# number of cells in a hex neighborhood, center included
+N_HEX_NEIGHBORHOOD_CELLS = 7
+
+# (dx, dy) of the six neighbors of a cell in an even and an odd column, in
+# the order of HexGrid.get_neighborhood
+EVEN_COLUMN_OFFSETS = ((0, -1), (0, 1), (-1, 1), (-1, 0), (1, 1), (1, 0))
+ODD_COLUMN_OFFSETS = ((0, -1), (0, 1), (-1, 0), (-1, -1), (1, 0), (1, -1))
+
+
+def hex_neighbor_table(width, height):
+    """
+    (width * height, 7) flat indices y * width + x of every cell, followed by
+    its six neighbors on the hexagonal torus.
+    """
+    y, x = np.divmod(np.arange(width * height), width)
+    even = x % 2 == 0
+    columns = [y * width + x]
+    for (even_dx, even_dy), (odd_dx, odd_dy) in zip(EVEN_COLUMN_OFFSETS, ODD_COLUMN_OFFSETS):
+        dx = np.where(even, even_dx, odd_dx)
+        dy = np.where(even, even_dy, odd_dy)
+        columns.append((y + dy) % height * width + (x + dx) % width)
+    return np.stack(columns, axis=1)
+
+
+def table_sum(values, columns):
+    """
+    Sum of a flat array over the neighborhood of every cell, in the dtype of
+    the array.
+
+    Args:
+        values: Flat array with a value per cell.
+        columns: The neighbor table transposed, (7, n_cells), so every
+            gather reads one contiguous row of indices.
+    """
+    out = values[columns[0]]
+    for column in columns[1:]:
+        out += values[column]
+    return out
+
+
+def neighborhood_counts(codes, columns):
+    """
+    Number of altruists and of selfish cells in the neighborhood of every
+    cell of a flat strategy array.
+    """
+    # both counts fit in a nibble, so one uint8 gather gives both
+    packed = (codes == ALTRUIST).view(np.uint8) | ((codes == SELFISH).view(np.uint8) << 4)
+    counts = table_sum(packed, columns)
+    return counts & 15, counts >> 4
+
+
+class HexCell(mesa.Agent):
+    """
+    Read-only view of a cell of a SelfishAltruistHex with the attributes of
+    a SelfishAltruistAgent, for the portrayal functions of the server.
+    """
+
+    def __init__(self, unique_id, pos, model):
+        super().__init__(unique_id, model)
+        self.pos = pos
+        self.index = pos[1] * model.n_grid_cells_width + pos[0]
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name in ("model", "index"):
+            raise AttributeError(name)
+        details = self.model.cell_details()
+        if name not in details:
+            raise AttributeError(name)
+        return details[name][self.index]
+
+
+class SelfishAltruistHex(SelfishAltruistLattice):
+    n_grid_cells_height = 6
+    n_grid_cells_width = 6
+
+    description = (
+        "An array based model for simulating Selfish-Altruist behavior on a hexagonal lattice."
+    )
+
+    verbose_1 = True  # Fitness values in grid and advanced tooltips
+
+    def __init__(self, n_grid_cells_width=n_grid_cells_width, n_grid_cells_height=n_grid_cells_height, **kwargs):
+        """
+        Create a new hexagonal Selfish-Altruist lattice. The arguments are
+        the ones of SelfishAltruistLattice; the lattice is a single band
+        stepped by one thread, and its width must be even for the odd-q
+        columns to wrap around.
+        """
+        if n_grid_cells_width % 2:
+            raise ValueError("The width of a hex lattice must be even.")
+        if kwargs.get("moore") or kwargs.get("radius", 1) != 1 or kwargs.get("stencil") is not None:
+            raise ValueError("The hex lattice only supports its own radius 1 neighborhood.")
+        kwargs["n_bands"] = 1
+        kwargs["n_threads"] = 1
+        super().__init__(n_grid_cells_width, n_grid_cells_height, **kwargs)
+        self.neighbors = hex_neighbor_table(self.n_grid_cells_width, self.n_grid_cells_height)
+        self.neighbor_columns = np.ascontiguousarray(self.neighbors.T)
+        self._grid = None
+        self._details = None
+
+    def hex_fitness(self, codes):
+        """Fitness of every cell of a flat strategy array, and the numbers of
+        altruists and of selfish cells in its neighborhood."""
+        n_neighboring_altruists, n_neighboring_selfish = neighborhood_counts(codes, self.neighbor_columns)
+        share = n_neighboring_altruists / N_HEX_NEIGHBORHOOD_CELLS
+        fitness = np.full(codes.shape, self.harshness, dtype=np.float64)
+        altruist = codes == ALTRUIST
+        selfish = codes == SELFISH
+        fitness[altruist] = 1 - self.cost_of_altruism + self.benefit_of_altruism * share[altruist]
+        fitness[selfish] = 1 + self.benefit_of_altruism * share[selfish]
+        return fitness, n_neighboring_altruists, n_neighboring_selfish
+
+    def hex_lottery(self, codes, fitness, n_neighboring_altruists, n_neighboring_selfish):
+        """Neighborhood fitness sums, disease included, and the lottery
+        weights of the altruists, the selfish and the void."""
+        sums = {
+            code: table_sum(np.where(codes == code, fitness, 0.0), self.neighbor_columns)
+            for code in (ALTRUIST, SELFISH)
+        }
+        # every void cell has the fitness of the void
+        n_void = N_HEX_NEIGHBORHOOD_CELLS - n_neighboring_altruists - n_neighboring_selfish
+        sums[VOID] = self.harshness * n_void
+        total = sums[ALTRUIST] + sums[SELFISH] + sums[VOID] + self.disease
+        positive = total > 0
+        safe_total = np.where(positive, total, 1.0)
+        weights = {
+            ALTRUIST: np.where(positive, sums[ALTRUIST] / safe_total, 0.0),
+            SELFISH: np.where(positive, sums[SELFISH] / safe_total, 0.0),
+            VOID: np.where(positive, (sums[VOID] + self.disease) / safe_total, 0.0),
+        }
+        return total, weights
+
+    def breed_all(self, state_arrays):
+        """Step kernel: breed every cell into state_arrays["next_codes"]."""
+        codes = state_arrays["codes"].reshape(-1)
+        fitness, n_neighboring_altruists, n_neighboring_selfish = self.hex_fitness(codes)
+        state_arrays["fitness"][...] = fitness.reshape(state_arrays["fitness"].shape)
+        _, weights = self.hex_lottery(codes, fitness, n_neighboring_altruists, n_neighboring_selfish)
+        breed_chance = self.band_rngs[0].random(codes.shape)
+        next_codes = breed(weights[ALTRUIST], weights[SELFISH], breed_chance)
+        state_arrays["next_codes"] = next_codes.reshape(state_arrays["codes"].shape)
+        state_arrays["band_counts"] = [
+            (np.count_nonzero(next_codes == ALTRUIST), np.count_nonzero(next_codes == SELFISH))
+        ]
+
+    def cell_details(self):
+        """
+        Per cell (flat index) values shown in the tooltips: strategy, fitness
+        and lottery of the current lattice. Computed on first use in a tick.
+        """
+        if self._details is not None and self._details[0] == self.schedule.steps:
+            return self._details[1]
+        codes = self.codes.reshape(-1)
+        fitness, n_neighboring_altruists, n_neighboring_selfish = self.hex_fitness(codes)
+        total, weights = self.hex_lottery(codes, fitness, n_neighboring_altruists, n_neighboring_selfish)
+        details = {
+            "name": [STRATEGY_NAMES[code] for code in codes.tolist()],
+            "fitness": fitness.tolist(),
+            "n_neighboring_altruists": n_neighboring_altruists.astype(int).tolist(),
+            "sum_total_fitness_in_neighborhood": total.tolist(),
+            "weight_fitness_altruists_in_neighborhood": weights[ALTRUIST].tolist(),
+            "weight_fitness_selfish_in_neighborhood": weights[SELFISH].tolist(),
+            "weight_fitness_harshness_in_neighborhood": weights[VOID].tolist(),
+        }
+        self._details = (self.schedule.steps, details)
+        return details
+
+    @property
+    def grid(self):
+        """HexGrid of HexCell views, for CanvasHexGrid."""
+        if self._grid is None:
+            self._grid = mesa.space.HexGrid(self.n_grid_cells_width, self.n_grid_cells_height, torus=True)
+            for index in range(self.n_cells):
+                y, x = divmod(index, self.n_grid_cells_width)
+                self._grid.place_agent(HexCell(index + 1, (x, y), self), (x, y))
+        return self._grid
+
+
+def hex_portrayal(cell):
+    """The portrayal of the live server, drawn as a hexagon."""
+    from selfish_altruist.server import selfish_altruist_portrayal
+
+    portrayal = selfish_altruist_portrayal(cell)
+    portrayal["Shape"] = "hex"
+    portrayal["r"] = 1
+    return portrayal
+
+
+def make_hex_server(port=None):
+    """A ModularServer for SelfishAltruistHex, with the charts and sliders of
+    the live server."""
+    from selfish_altruist import server as live
+
+    canvas_width = live.SelfishAltruist.canvas_width
+    canvas_element = mesa.visualization.CanvasHexGrid(
+        hex_portrayal,
+        SelfishAltruistHex.n_grid_cells_width,
+        SelfishAltruistHex.n_grid_cells_height,
+        canvas_width,
+        canvas_width * (SelfishAltruistHex.n_grid_cells_height / SelfishAltruistHex.n_grid_cells_width),
+    )
+    return mesa.visualization.ModularServer(
+        SelfishAltruistHex,
+        [canvas_element, live.static_string, live.chart_element1, live.chart_element],
+        "Selfish-Altruist Model (hex lattice)",
+        live.model_params,
+        port=port,
+    )
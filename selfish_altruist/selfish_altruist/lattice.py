@@ -0,0 +1,556 @@
+"""
+Selfish-Altruist Lattice Model
+
+Array based version of the Selfish-Altruist model: the strategy of every cell
+is a code in a NumPy array and fitness, lottery weights and breeding are
+computed for the whole lattice at once, instead of by one agent object per
+cell. Use it for lattices that are too large for SelfishAltruist.
+
+The torus can be split into row bands that are stepped in a thread pool; each
+band reads its neighbors through a one-row halo and draws its lottery numbers
+from its own random stream, so results only depend on the seed and the number
+of bands, not on the number of threads.
+
+Other neighborhoods (Moore, larger radii, weighted stencils) are evaluated
+for the whole lattice at once as a convolution on the torus, see
+Neighborhood; the cost of a tick then does not depend on the radius.
+
+A tick is a synchronous update run by a SynchronousActivation scheduler: the
+step phase computes the fitness and breeds every cell into a new array, the
+advance phase makes it the current one. Both are kernels over the arrays in
+model.state_arrays, there are no agent objects.
+"""
+
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mesa
+import numpy as np
+
+from selfish_altruist import snapshot
+
+# strategy codes of a lattice cell
+VOID = 0
+ALTRUIST = 1
+SELFISH = 2
+STRATEGY_NAMES = ("void", "altruist", "selfish")
+
+# number of cells in a (von Neumann, radius 1, center included) neighborhood
+N_NEIGHBORHOOD_CELLS = 5
+
+# rows per band when the number of bands is not given
+BAND_HEIGHT = 256
+
+# kernel group of the cells in the scheduler
+CELLS = "cells"
+
+
+def neighborhood_sum(padded, out=None):
+    """
+    Sum over the von Neumann neighborhood, center included, of every cell of
+    the inner rows of a row-padded array; columns wrap around.
+
+    Args:
+        padded: (h + 2, w) array, the rows of interest plus one halo row above
+            and below.
+        out: Optional (h, w) array to write the result to.
+    """
+    inner = padded[1:-1]
+    out = np.add(inner, padded[:-2], out=out)
+    out += padded[2:]
+    out[:, 1:] += inner[:, :-1]
+    out[:, :1] += inner[:, -1:]
+    out[:, :-1] += inner[:, 1:]
+    out[:, -1:] += inner[:, :1]
+    return out
+
+
+def calculate_fitness(codes, cost_of_altruism, benefit_of_altruism, harshness):
+    """
+    Fitness of the inner rows of a row-padded strategy array, see
+    SelfishAltruistAgent.calculate_fitness.
+    """
+    inner = codes[1:-1]
+    n_neighboring_altruists = neighborhood_sum((codes == ALTRUIST).astype(np.int8))
+    share = n_neighboring_altruists / N_NEIGHBORHOOD_CELLS
+    fitness = np.full(inner.shape, harshness, dtype=np.float64)
+    altruist = inner == ALTRUIST
+    selfish = inner == SELFISH
+    fitness[altruist] = 1 - cost_of_altruism + benefit_of_altruism * n_neighboring_altruists[altruist] / N_NEIGHBORHOOD_CELLS
+    fitness[selfish] = 1 + benefit_of_altruism * share[selfish]
+    return fitness
+
+
+def lottery_weights(codes, fitness, disease):
+    """
+    Lottery weights of the altruists and the selfish for the inner rows of
+    row-padded strategy and fitness arrays; the void gets the remainder.
+    """
+    sum_fitness_altruists = neighborhood_sum(np.where(codes == ALTRUIST, fitness, 0.0))
+    sum_fitness_selfish = neighborhood_sum(np.where(codes == SELFISH, fitness, 0.0))
+    sum_fitness_harshness = neighborhood_sum(np.where(codes == VOID, fitness, 0.0))
+    sum_total_fitness = sum_fitness_selfish + sum_fitness_altruists + sum_fitness_harshness + disease
+    positive = sum_total_fitness > 0
+    np.divide(sum_fitness_altruists, sum_total_fitness, out=sum_fitness_altruists, where=positive)
+    np.divide(sum_fitness_selfish, sum_total_fitness, out=sum_fitness_selfish, where=positive)
+    sum_fitness_altruists[~positive] = 0
+    sum_fitness_selfish[~positive] = 0
+    return sum_fitness_altruists, sum_fitness_selfish
+
+
+def breed(weight_altruists, weight_selfish, breed_chance):
+    """New strategy codes given the lottery weights and uniform draws in [0, 1)."""
+    codes = np.full(breed_chance.shape, VOID, dtype=np.uint8)
+    codes[breed_chance < weight_altruists + weight_selfish] = SELFISH
+    codes[breed_chance < weight_altruists] = ALTRUIST
+    return codes
+
+
+def halo_rows(array, start, stop):
+    """Rows start - 1 up to and including stop of array, wrapping around."""
+    height = array.shape[0]
+    if start >= 1 and stop < height:
+        return array[start - 1:stop + 1]
+    return array.take(np.arange(start - 1, stop + 1) % height, axis=0)
+
+
+class Neighborhood:
+    """
+    Weights of the cells around a cell, the cell itself included, as a
+    (2 * radius_y + 1, 2 * radius_x + 1) stencil centered on the cell.
+
+    sum() adds up an array over the neighborhood of every cell of the torus:
+    the von Neumann radius 1 neighborhood of SelfishAltruist with shifted
+    additions, stencils with equal weights in a rectangle with running sums
+    along each axis, and any other stencil with an FFT convolution.
+    """
+
+    def __init__(self, stencil):
+        self.stencil = np.array(stencil, dtype=np.float64)
+        if self.stencil.ndim != 2 or not all(size % 2 for size in self.stencil.shape):
+            raise ValueError("A neighborhood stencil must be a 2D array with odd sides.")
+        if self.stencil.min() < 0 or self.stencil.sum() <= 0:
+            raise ValueError("A neighborhood stencil must have non-negative weights and a positive total.")
+        self.radius_y, self.radius_x = self.stencil.shape[0] // 2, self.stencil.shape[1] // 2
+        # the total weight, the number of cells of an unweighted neighborhood
+        self.size = float(self.stencil.sum())
+        self.integral = bool(np.all(self.stencil == np.round(self.stencil)))
+        self.is_default = self.stencil.shape == (3, 3) and np.array_equal(
+            self.stencil, [[0, 1, 0], [1, 1, 1], [0, 1, 0]]
+        )
+        self.is_box = bool(np.all(self.stencil == self.stencil.flat[0]))
+        self._kernel_ffts = {}
+        self._support = None
+
+    @classmethod
+    def of(cls, moore=False, radius=1, stencil=None):
+        """The neighborhood of the model parameters: a custom stencil if
+        given, else the Moore or von Neumann neighborhood of radius."""
+        if stencil is not None:
+            return cls(stencil)
+        if radius < 1:
+            raise ValueError("The radius of a neighborhood must be at least 1.")
+        dy, dx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+        if moore:
+            return cls(np.ones(dy.shape))
+        return cls((np.abs(dy) + np.abs(dx) <= radius).astype(np.float64))
+
+    def check_fits(self, height, width):
+        """A stencil wider than the torus would count cells twice."""
+        if 2 * self.radius_y + 1 > height or 2 * self.radius_x + 1 > width:
+            raise ValueError("The neighborhood does not fit on the lattice.")
+
+    def sum(self, values):
+        """
+        Weighted sum of a (height, width) array over the neighborhood of every
+        cell, wrapping around. Sums of bool or integer arrays over a stencil
+        of integer weights are returned as exact integers.
+        """
+        exact = self.integral and values.dtype.kind in "biu"
+        if self.is_default:
+            values = values.astype(np.int64) if values.dtype.kind == "b" else values
+            return neighborhood_sum(np.concatenate([values[-1:], values, values[:1]]))
+        if self.is_box:
+            values = values.astype(np.int64 if exact else np.float64)
+            out = _box_sum(_box_sum(values, self.radius_y, 0), self.radius_x, 1)
+            weight = self.stencil.flat[0]
+            if weight != 1:
+                out *= int(weight) if exact else weight
+            return out
+        out = np.fft.irfft2(np.fft.rfft2(values) * self._kernel_fft(values.shape), s=values.shape)
+        return np.rint(out).astype(np.int64) if exact else out
+
+    def _kernel_fft(self, shape):
+        kernel_fft = self._kernel_ffts.get(shape)
+        if kernel_fft is None:
+            # sum(values)[y, x] = sum of w[dy, dx] * values[y + dy, x + dx] is
+            # the convolution with the kernel k[-dy, -dx] = w[dy, dx]
+            kernel = np.zeros(shape)
+            dy, dx = np.mgrid[-self.radius_y:self.radius_y + 1, -self.radius_x:self.radius_x + 1]
+            np.add.at(kernel, (-dy % shape[0], -dx % shape[1]), self.stencil)
+            kernel_fft = self._kernel_ffts[shape] = np.fft.rfft2(kernel)
+        return kernel_fft
+
+    def fitness(self, codes, cost_of_altruism, benefit_of_altruism, harshness):
+        """Fitness of a strategy array, see SelfishAltruistAgent.calculate_fitness."""
+        n_neighboring_altruists = self.sum(codes == ALTRUIST)
+        share = n_neighboring_altruists / self.size
+        fitness = np.full(codes.shape, harshness, dtype=np.float64)
+        altruist = codes == ALTRUIST
+        selfish = codes == SELFISH
+        fitness[altruist] = 1 - cost_of_altruism + benefit_of_altruism * n_neighboring_altruists[altruist] / self.size
+        fitness[selfish] = 1 + benefit_of_altruism * share[selfish]
+        return fitness
+
+    def lottery_weights(self, codes, fitness, disease):
+        """Lottery weights of the altruists and the selfish of a strategy and
+        a fitness array; the void gets the remainder."""
+        sum_fitness_altruists = self._fitness_sum(codes, fitness, ALTRUIST)
+        sum_fitness_selfish = self._fitness_sum(codes, fitness, SELFISH)
+        sum_fitness_harshness = self._fitness_sum(codes, fitness, VOID)
+        sum_total_fitness = sum_fitness_selfish + sum_fitness_altruists + sum_fitness_harshness + disease
+        positive = sum_total_fitness > 0
+        np.divide(sum_fitness_altruists, sum_total_fitness, out=sum_fitness_altruists, where=positive)
+        np.divide(sum_fitness_selfish, sum_total_fitness, out=sum_fitness_selfish, where=positive)
+        sum_fitness_altruists[~positive] = 0
+        sum_fitness_selfish[~positive] = 0
+        return sum_fitness_altruists, sum_fitness_selfish
+
+    def _fitness_sum(self, codes, fitness, code):
+        """Sum of the fitness of the cells of a strategy over the neighborhood
+        of every cell. Running sums and the FFT leave round-off where no cell
+        of the strategy is in range, which the lottery would turn into a
+        weight of up to 1; these sums are set to exactly 0."""
+        of_strategy = codes == code
+        sums = self.sum(np.where(of_strategy, fitness, 0.0))
+        if not self.is_default:
+            np.maximum(sums, 0, out=sums)
+            sums[self.support.sum(of_strategy) == 0] = 0
+        return sums
+
+    @property
+    def support(self):
+        """The neighborhood of the cells with a positive weight, all weighted
+        1, so that its sums of a bool array are exact counts."""
+        if self._support is None:
+            self._support = Neighborhood((self.stencil > 0).astype(np.float64))
+        return self._support
+
+
+def _box_sum(values, radius, axis):
+    """Sum over the 2 * radius + 1 cells around every cell along an axis,
+    wrapping around, with a running sum."""
+    values = np.moveaxis(values, axis, 0)
+    n = values.shape[0]
+    padded = np.concatenate([values[n - radius - 1:], values, values[:radius]])
+    running = np.cumsum(padded, axis=0)
+    return np.moveaxis(running[2 * radius + 1:] - running[:n], 0, axis)
+
+
+def resolve_seed(seed):
+    """The seed, or for None a seed drawn from OS entropy. A model stores the
+    seed it ran with, so that an unseeded run can be repeated too."""
+    if seed is None:
+        return np.random.SeedSequence().entropy
+    return seed
+
+
+def band_bounds(height, n_bands):
+    """(start, stop) rows of n_bands row bands of (nearly) equal height."""
+    edges = np.linspace(0, height, n_bands + 1).round().astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:])]
+
+
+# thread pools by number of threads, shared by all lattice models of the
+# process, so that the many models of a sweep do not each start threads
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def shared_executor(n_threads):
+    """The thread pool of n_threads threads shared by the lattice models."""
+    with _executors_lock:
+        executor = _executors.get(n_threads)
+        if executor is None:
+            executor = _executors[n_threads] = ThreadPoolExecutor(
+                n_threads, thread_name_prefix=f"lattice-bands-{n_threads}"
+            )
+        return executor
+
+
+@atexit.register
+def shutdown_executors():
+    """Stop the threads of the shared thread pools; a later model starts new
+    ones."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
+
+
+class SelfishAltruistLattice(mesa.Model):
+    n_grid_cells_height = 5
+    n_grid_cells_width = 5
+    altruistic_probability = 0.26
+    selfish_probability = 0.26
+    cost_of_altruism = 0.13
+    benefit_of_altruism = 0.5
+    disease = 0.0
+    harshness = 0.0
+    moore = False
+    radius = 1
+
+    description = (
+        "An array based model for simulating Selfish-Altruist behavior on large lattices."
+    )
+
+    def __init__(
+            self,
+            n_grid_cells_width=n_grid_cells_width,
+            n_grid_cells_height=n_grid_cells_height,
+            altruistic_probability=altruistic_probability,
+            selfish_probability=selfish_probability,
+            cost_of_altruism=cost_of_altruism,
+            benefit_of_altruism=benefit_of_altruism,
+            disease=disease,
+            harshness=harshness,
+            seed=None,
+            n_bands=None,
+            n_threads=1,
+            moore=moore,
+            radius=radius,
+            stencil=None,
+    ):
+        """
+        Create a new Selfish-Altruist lattice with the given parameters.
+
+        Args:
+            seed: Seed of the random streams for the initial lattice and the
+                lottery. If None, one is drawn and stored as the seed
+                attribute.
+            n_bands: Number of row bands the lattice is split into, each with
+                its own lottery random stream. Defaults to one band per
+                BAND_HEIGHT rows.
+            n_threads: Number of threads stepping the bands. Does not affect
+                the results.
+            moore: Use the Moore instead of the von Neumann neighborhood.
+            radius: Radius of the neighborhood.
+            stencil: Custom neighborhood, a 2D array of weights with odd
+                sides centered on the cell, instead of moore and radius. The
+                fitness of a cell then counts the weighted share of
+                altruists, and the lottery the weighted fitness sums.
+        """
+        super().__init__()
+        if n_grid_cells_width < 3 or n_grid_cells_height < 3:
+            raise ValueError("The lattice must be at least 3 cells wide and high.")
+        self.n_grid_cells_width = n_grid_cells_width
+        self.n_grid_cells_height = n_grid_cells_height
+        self.n_cells = n_grid_cells_width * n_grid_cells_height
+
+        self.harshness = harshness
+        self.disease = disease
+        self.altruistic_probability = altruistic_probability
+        self.selfish_probability = selfish_probability
+        self.cost_of_altruism = cost_of_altruism
+        self.benefit_of_altruism = benefit_of_altruism
+        self.moore = moore
+        self.radius = radius
+        self.stencil = None if stencil is None else np.asarray(stencil, dtype=np.float64).tolist()
+        self.neighborhood = Neighborhood.of(moore, radius, stencil)
+        self.neighborhood.check_fits(n_grid_cells_height, n_grid_cells_width)
+
+        if n_bands is None:
+            n_bands = -(-n_grid_cells_height // BAND_HEIGHT)
+        if not 1 <= n_bands <= n_grid_cells_height:
+            raise ValueError("n_bands must be between 1 and the lattice height.")
+        self.bands = band_bounds(n_grid_cells_height, n_bands)
+        self.n_threads = n_threads
+        self.seed = resolve_seed(seed)
+        self.reset_randomizer(self.seed)
+
+        initial_seed, lottery_seed = np.random.SeedSequence(self.seed).spawn(2)
+        self.band_rngs = [np.random.default_rng(s) for s in lottery_seed.spawn(n_bands)]
+
+        # codes and fitness live in here, shared with the scheduler kernels
+        self.state_arrays = {}
+        self.schedule = mesa.time.SynchronousActivation(self, state_arrays=self.state_arrays)
+        self.schedule.register_kernel(CELLS, step_all=self.breed_all, advance_all=self.advance_all)
+        self.datacollector = mesa.DataCollector(
+            model_reporters={
+                "Selfish": lambda m: m.n_selfish,
+                "Altruist": lambda m: m.n_altruist,
+                "Void": lambda m: m.n_void,
+                "Population": lambda m: m.n_population,
+                "%Altruist": lambda m: m.percentage_of_altruist,
+            },
+        )
+
+        # initialize patches
+        ptype = np.random.default_rng(initial_seed).random((n_grid_cells_height, n_grid_cells_width))
+        self.codes = np.full(ptype.shape, VOID, dtype=np.uint8)
+        self.codes[ptype < altruistic_probability + selfish_probability] = SELFISH
+        self.codes[ptype < altruistic_probability] = ALTRUIST
+        self.fitness = np.zeros(ptype.shape, dtype=np.float64)
+        self.n_altruist = int(np.count_nonzero(self.codes == ALTRUIST))
+        self.n_selfish = int(np.count_nonzero(self.codes == SELFISH))
+
+        self.running = True
+        self.update_counts()
+        self.datacollector.collect(self)
+
+    @property
+    def codes(self):
+        return self.state_arrays["codes"]
+
+    @codes.setter
+    def codes(self, value):
+        self.state_arrays["codes"] = value
+
+    @property
+    def fitness(self):
+        return self.state_arrays["fitness"]
+
+    @fitness.setter
+    def fitness(self, value):
+        self.state_arrays["fitness"] = value
+
+    def update_counts(self):
+        self.n_population = self.n_altruist + self.n_selfish
+        self.n_void = self.n_cells - self.n_population
+        self.percentage_of_altruist = self.n_altruist / self.n_cells
+
+    def map_bands(self, func):
+        if self.n_threads <= 1:
+            return [func(i) for i in range(len(self.bands))]
+        # looked up every tick, the pools may have been shut down in between
+        executor = shared_executor(self.n_threads)
+        return list(executor.map(func, range(len(self.bands))))
+
+    def fitness_band(self, i):
+        start, stop = self.bands[i]
+        self.fitness[start:stop] = calculate_fitness(
+            halo_rows(self.codes, start, stop),
+            self.cost_of_altruism,
+            self.benefit_of_altruism,
+            self.harshness,
+        )
+
+    def breed_band(self, i):
+        start, stop = self.bands[i]
+        weight_altruists, weight_selfish = lottery_weights(
+            halo_rows(self.codes, start, stop),
+            halo_rows(self.fitness, start, stop),
+            self.disease,
+        )
+        breed_chance = self.band_rngs[i].random(weight_altruists.shape)
+        codes = breed(weight_altruists, weight_selfish, breed_chance)
+        self.state_arrays["next_codes"][start:stop] = codes
+        return np.count_nonzero(codes == ALTRUIST), np.count_nonzero(codes == SELFISH)
+
+    def breed_all(self, state_arrays):
+        """Step kernel: breed every cell into state_arrays["next_codes"]."""
+        state_arrays["next_codes"] = np.empty_like(state_arrays["codes"])
+        if not self.neighborhood.is_default:
+            # convolutions cover the whole lattice; the bands only draw
+            self.weights = self.neighborhood.lottery_weights(
+                state_arrays["codes"], self.whole_lattice_fitness(state_arrays), self.disease
+            )
+            state_arrays["band_counts"] = self.map_bands(self.breed_band_weighted)
+            del self.weights
+            return
+        # All bands need the fitness of their halo rows before any band can run
+        # its lottery, so the two passes are separated by a join.
+        self.map_bands(self.fitness_band)
+        state_arrays["band_counts"] = self.map_bands(self.breed_band)
+
+    def whole_lattice_fitness(self, state_arrays):
+        fitness = state_arrays["fitness"]
+        fitness[...] = self.neighborhood.fitness(
+            state_arrays["codes"], self.cost_of_altruism, self.benefit_of_altruism, self.harshness
+        )
+        return fitness
+
+    def breed_band_weighted(self, i):
+        start, stop = self.bands[i]
+        weight_altruists, weight_selfish = (weights[start:stop] for weights in self.weights)
+        breed_chance = self.band_rngs[i].random(weight_altruists.shape)
+        codes = breed(weight_altruists, weight_selfish, breed_chance)
+        self.state_arrays["next_codes"][start:stop] = codes
+        return np.count_nonzero(codes == ALTRUIST), np.count_nonzero(codes == SELFISH)
+
+    def advance_all(self, state_arrays):
+        """Advance kernel: make the bred cells the current ones."""
+        state_arrays["codes"] = state_arrays.pop("next_codes")
+        counts = state_arrays.pop("band_counts")
+        self.n_altruist = int(sum(n_altruist for n_altruist, _ in counts))
+        self.n_selfish = int(sum(n_selfish for _, n_selfish in counts))
+        # void cells get the fitness of the void right away, as in SelfishAltruist
+        state_arrays["fitness"][state_arrays["codes"] == VOID] = self.harshness
+
+    def step(self):
+        self.update_counts()
+        self.datacollector.collect(self)
+        self.schedule.step()
+
+        if self.percentage_of_altruist > 0.7:
+            self.running = False
+
+    def snapshot(self):
+        """
+        Return the state of the run as snapshot bytes (see
+        selfish_altruist.snapshot), to continue it later with restore().
+        """
+        header = {
+            "parameters": {
+                "n_grid_cells_width": self.n_grid_cells_width,
+                "n_grid_cells_height": self.n_grid_cells_height,
+                "altruistic_probability": self.altruistic_probability,
+                "selfish_probability": self.selfish_probability,
+                "cost_of_altruism": self.cost_of_altruism,
+                "benefit_of_altruism": self.benefit_of_altruism,
+                "disease": self.disease,
+                "harshness": self.harshness,
+                "seed": self.seed,
+                "n_bands": len(self.bands),
+                "moore": self.moore,
+                "radius": self.radius,
+                "stencil": self.stencil,
+            },
+            "state": {
+                "n_altruist": self.n_altruist,
+                "n_selfish": self.n_selfish,
+                "running": self.running,
+                "steps": self.schedule.steps,
+                "time": self.schedule.time,
+            },
+            "rng": {"bands": [rng.bit_generator.state for rng in self.band_rngs]},
+        }
+        return snapshot.dumps(type(self).__name__, header, {"codes": self.codes, "fitness": self.fitness})
+
+    @classmethod
+    def restore(cls, data, n_threads=1):
+        """
+        Return a new model in the state of the snapshot bytes data, stepped
+        by n_threads threads. The DataCollector starts empty.
+        """
+        header, arrays = snapshot.loads(data, cls.__name__)
+        model = cls(**header["parameters"], n_threads=n_threads)
+        model.load_state(header, arrays)
+        return model
+
+    def load_state(self, header, arrays):
+        """Put a new model in the state of a snapshot header and arrays."""
+        self.datacollector.clear()
+        self.codes[...] = arrays["codes"]
+        self.fitness[...] = arrays["fitness"]
+        state = header["state"]
+        self.n_altruist = state["n_altruist"]
+        self.n_selfish = state["n_selfish"]
+        self.update_counts()
+        self.running = state["running"]
+        self.schedule.steps = state["steps"]
+        self.schedule.time = state["time"]
+        for rng, rng_state in zip(self.band_rngs, header["rng"]["bands"]):
+            rng.bit_generator.state = rng_state
@@ -1,13 +1,25 @@
+"""
+Plot a column of a sweep against a parameter:
+
+    python matplot.py [csv] [x] [y]
+
+by default test1.csv as written by model_batch.py, disease and %Altruist. For
+the output of `mesa sweep ../sweeps/disease.json`, use
+`python matplot.py ../sweeps/disease.csv disease %Altruist_mean`.
+"""
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 
 plt.rcParams["figure.figsize"] = [7.50, 3.50]
 plt.rcParams["figure.autolayout"] = True
 
+defaults = ["test1.csv", "disease", "%Altruist"]
+path, x, y = (sys.argv[1:] + defaults[len(sys.argv) - 1:])[:3]
+df = pd.read_csv(path).sort_values(x)
 
-df = pd.read_csv('test1.csv')
-
-df.plot.scatter(x = 'disease', y = '%Altruist')
-df.plot('disease', '%Altruist')
+df.plot.scatter(x=x, y=y)
+df.plot(x, y)
 
-plt.show()
\ No newline at end of file
+plt.show()
@@ -0,0 +1,301 @@
+"""
+Mean-field and pair approximations of the Selfish-Altruist model
+
+Deterministic difference equations for the fraction of altruist, selfish and
+void cells of the (synchronously updated, von Neumann) Selfish-Altruist
+lattice, for the same parameters as SelfishAltruist. A trajectory of a few
+hundred ticks takes milliseconds, so they can be used to screen parameter
+space before running lattice sweeps.
+
+mean field: every cell is independent of every other cell, with the
+    densities of the previous tick. The cells of a neighborhood get the
+    expected fitness of their strategy.
+pair approximation: the state is the joint distribution P[X, Y] of the
+    strategies of two neighboring cells. A tick enumerates every strategy of
+    two neighboring cells and the composition of their other three neighbors
+    each, weighted by the pair distribution and the conditional distribution
+    q(Y | X) of a neighbor, and breeds both cells. The fitness of the six outer neighbors
+    is their expected fitness given their strategy and the one of the center
+    cell next to them.
+
+Where the two approximations disagree, correlations on the lattice matter and
+only the lattice models can be trusted.
+"""
+
+import itertools
+from math import factorial
+
+import numpy as np
+import pandas as pd
+
+from selfish_altruist.lattice import ALTRUIST, N_NEIGHBORHOOD_CELLS, SELFISH, VOID
+
+MEAN_FIELD = "mean_field"
+PAIR_APPROXIMATION = "pair_approximation"
+METHODS = (MEAN_FIELD, PAIR_APPROXIMATION)
+
+DEFAULT_PARAMETERS = {
+    "altruistic_probability": 0.26,
+    "selfish_probability": 0.26,
+    "cost_of_altruism": 0.13,
+    "benefit_of_altruism": 0.5,
+    "disease": 0.0,
+    "harshness": 0.0,
+}
+
+# compositions (n_void, n_altruist, n_selfish) of a neighborhood
+_COMPOSITIONS = np.array(
+    [
+        (n_void, n_altruist, N_NEIGHBORHOOD_CELLS - n_void - n_altruist)
+        for n_void in range(N_NEIGHBORHOOD_CELLS + 1)
+        for n_altruist in range(N_NEIGHBORHOOD_CELLS + 1 - n_void)
+    ]
+)
+_MULTINOMIAL = np.array(
+    [
+        factorial(N_NEIGHBORHOOD_CELLS) // np.prod([factorial(n) for n in composition])
+        for composition in _COMPOSITIONS
+    ]
+)
+
+# the pair approximation enumerates the strategies of two neighboring center
+# cells i and j and the compositions of the three other neighbors of each
+_N_OUTER = N_NEIGHBORHOOD_CELLS - 2
+_OUTER_COMPOSITIONS = np.array(
+    [
+        (n_void, n_altruist, _N_OUTER - n_void - n_altruist)
+        for n_void in range(_N_OUTER + 1)
+        for n_altruist in range(_N_OUTER + 1 - n_void)
+    ]
+)
+_OUTER_MULTINOMIAL = np.array(
+    [factorial(_N_OUTER) // np.prod([factorial(n) for n in composition]) for composition in _OUTER_COMPOSITIONS]
+)
+_CENTER_I, _CENTER_J, _OUTER_I, _OUTER_J = (
+    np.array(column)
+    for column in zip(
+        *itertools.product((VOID, ALTRUIST, SELFISH), (VOID, ALTRUIST, SELFISH),
+                           range(len(_OUTER_COMPOSITIONS)), range(len(_OUTER_COMPOSITIONS)))
+    )
+)
+# columns indexed by strategy code, like the composition tuples
+_OUTER_COUNTS_I = _OUTER_COMPOSITIONS[_OUTER_I]
+_OUTER_COUNTS_J = _OUTER_COMPOSITIONS[_OUTER_J]
+_PAIR_MULTIPLICITY = _OUTER_MULTINOMIAL[_OUTER_I] * _OUTER_MULTINOMIAL[_OUTER_J]
+
+
+def _lottery(sum_altruists, sum_selfish, sum_void, disease):
+    """Probabilities to become altruist, selfish and void, see
+    SelfishAltruist.calculate_lottery_weights."""
+    total = sum_altruists + sum_selfish + sum_void + disease
+    positive = total > 0
+    safe_total = np.where(positive, total, 1.0)
+    weight_altruists = np.where(positive, sum_altruists / safe_total, 0.0)
+    weight_selfish = np.where(positive, sum_selfish / safe_total, 0.0)
+    return weight_altruists, weight_selfish, 1 - weight_altruists - weight_selfish
+
+
+def mean_field_step(densities, cost_of_altruism, benefit_of_altruism, disease, harshness):
+    """
+    Densities (void, altruist, selfish) after one tick of the mean-field map.
+    """
+    density_void, density_altruist, density_selfish = densities
+    b, n = benefit_of_altruism, N_NEIGHBORHOOD_CELLS
+    # an altruist counts itself among its neighboring altruists
+    fitness_altruist = 1 - cost_of_altruism + b * (1 + (n - 1) * density_altruist) / n
+    fitness_selfish = 1 + b * (n - 1) * density_altruist / n
+
+    n_void, n_altruist, n_selfish = _COMPOSITIONS.T
+    probability = (
+        _MULTINOMIAL
+        * density_void ** n_void
+        * density_altruist ** n_altruist
+        * density_selfish ** n_selfish
+    )
+    weight_altruists, weight_selfish, weight_void = _lottery(
+        n_altruist * fitness_altruist, n_selfish * fitness_selfish, n_void * harshness, disease
+    )
+    new = np.array(
+        [probability @ weight_void, probability @ weight_altruists, probability @ weight_selfish]
+    )
+    # the map scales any rounding error in the total by the neighborhood size
+    # every tick, so keep it a distribution
+    return new / new.sum()
+
+
+def pair_step(pairs, cost_of_altruism, benefit_of_altruism, disease, harshness):
+    """
+    Pair distribution P[X, Y] (indexed by strategy code) after one tick of the
+    pair approximation.
+    """
+    b, n = benefit_of_altruism, N_NEIGHBORHOOD_CELLS
+    singles = pairs.sum(axis=1)
+    conditional = np.divide(
+        pairs, singles[:, np.newaxis], out=np.zeros_like(pairs), where=singles[:, np.newaxis] > 0
+    )
+
+    probability = (
+        _PAIR_MULTIPLICITY
+        * pairs[_CENTER_I, _CENTER_J]
+        * (conditional[_CENTER_I] ** _OUTER_COUNTS_I).prod(axis=1)
+        * (conditional[_CENTER_J] ** _OUTER_COUNTS_J).prod(axis=1)
+    )
+
+    def fitness(strategy, n_altruists):
+        return np.select(
+            [strategy == ALTRUIST, strategy == SELFISH],
+            [1 - cost_of_altruism + b * n_altruists / n, 1 + b * n_altruists / n],
+            harshness,
+        )
+
+    # the fitness of an outer neighbor, by its strategy (columns) and the one
+    # of the center next to it (rows): its other three neighbors are only
+    # known through q(. | outer)
+    strategies = np.arange(3)
+    outer_fitness = fitness(
+        strategies[np.newaxis, :],
+        (strategies[np.newaxis, :] == ALTRUIST).astype(int)
+        + (strategies[:, np.newaxis] == ALTRUIST)
+        + (n - 2) * conditional[np.newaxis, :, ALTRUIST],
+    )
+
+    center_altruists = (_CENTER_I == ALTRUIST).astype(int) + (_CENTER_J == ALTRUIST)
+    fitness_i = fitness(_CENTER_I, center_altruists + _OUTER_COUNTS_I[:, ALTRUIST])
+    fitness_j = fitness(_CENTER_J, center_altruists + _OUTER_COUNTS_J[:, ALTRUIST])
+
+    def new_strategy(center, fitness_center, other, fitness_other, outer_counts):
+        # the neighborhood of a center cell: itself, the other center and its
+        # three outer neighbors
+        sums = outer_counts * outer_fitness[center]
+        for cell, cell_fitness in ((center, fitness_center), (other, fitness_other)):
+            sums[np.arange(len(cell)), cell] += cell_fitness
+        weight_altruists, weight_selfish, weight_void = _lottery(
+            sums[:, ALTRUIST], sums[:, SELFISH], sums[:, VOID], disease
+        )
+        new = np.empty((len(center), 3))
+        new[:, VOID] = weight_void
+        new[:, ALTRUIST] = weight_altruists
+        new[:, SELFISH] = weight_selfish
+        return new
+
+    # the two cells draw their lottery numbers independently
+    new_i = new_strategy(_CENTER_I, fitness_i, _CENTER_J, fitness_j, _OUTER_COUNTS_I)
+    new_j = new_strategy(_CENTER_J, fitness_j, _CENTER_I, fitness_i, _OUTER_COUNTS_J)
+    new_pairs = np.einsum("c,cx,cy->xy", probability, new_i, new_j)
+    return new_pairs / new_pairs.sum()
+
+
+def solve(method=PAIR_APPROXIMATION, n_steps=200, tolerance=1e-10, **parameters):
+    """
+    Trajectory of the fractions of altruist, selfish and void cells.
+
+    Args:
+        method: MEAN_FIELD or PAIR_APPROXIMATION.
+        n_steps: Maximum number of ticks.
+        tolerance: Stop early once no fraction changes by more than this in
+            a tick.
+        parameters: The parameters of SelfishAltruist, see
+            DEFAULT_PARAMETERS.
+
+    Returns a DataFrame indexed by tick (0 is the initial state) with the
+    columns "Altruist", "Selfish" and "Void"; "Altruist" corresponds to the
+    "%Altruist" reporter of the lattice models.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}.")
+    unknown = set(parameters) - set(DEFAULT_PARAMETERS)
+    if unknown:
+        raise TypeError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    parameters = {**DEFAULT_PARAMETERS, **parameters}
+    dynamics = {key: parameters[key] for key in ("cost_of_altruism", "benefit_of_altruism", "disease", "harshness")}
+
+    # fractions and pair probabilities are indexed by strategy code
+    densities = np.zeros(3)
+    densities[ALTRUIST] = parameters["altruistic_probability"]
+    densities[SELFISH] = parameters["selfish_probability"]
+    densities[VOID] = 1 - densities[ALTRUIST] - densities[SELFISH]
+    # the initial lattice has independent cells
+    state = densities if method == MEAN_FIELD else np.outer(densities, densities)
+
+    trajectory = [densities]
+    for _ in range(n_steps):
+        if method == MEAN_FIELD:
+            state = mean_field_step(state, **dynamics)
+            densities = state
+        else:
+            state = pair_step(state, **dynamics)
+            densities = state.sum(axis=1)
+        change = np.abs(densities - trajectory[-1]).max()
+        trajectory.append(densities)
+        if change < tolerance:
+            break
+    trajectory = np.array(trajectory)
+    return pd.DataFrame(
+        {
+            "Altruist": trajectory[:, ALTRUIST],
+            "Selfish": trajectory[:, SELFISH],
+            "Void": trajectory[:, VOID],
+        }
+    ).rename_axis("Step")
+
+
+def fixed_points(method=PAIR_APPROXIMATION, n_starts=6, n_steps=2000, tolerance=1e-10, decimals=6, **parameters):
+    """
+    Attracting fixed points, found by iterating from initial densities on a
+    grid over the simplex (altruistic_probability and selfish_probability are
+    taken from the grid, not from the parameters).
+
+    Returns a DataFrame with one row per distinct fixed point: its fractions
+    and the number of starts that converged to it. Starts that do not
+    converge within n_steps (e.g. on a cycle) are left out.
+    """
+    parameters.pop("altruistic_probability", None)
+    parameters.pop("selfish_probability", None)
+    found = {}
+    for i, j in itertools.product(range(n_starts + 1), repeat=2):
+        if i + j > n_starts:
+            continue
+        trajectory = solve(
+            method,
+            n_steps,
+            tolerance,
+            altruistic_probability=i / n_starts,
+            selfish_probability=j / n_starts,
+            **parameters,
+        )
+        if len(trajectory) > n_steps:
+            continue
+        point = tuple(trajectory.iloc[-1].round(decimals))
+        found[point] = found.get(point, 0) + 1
+    rows = [(*point, n) for point, n in found.items()]
+    return pd.DataFrame(rows, columns=["Altruist", "Selfish", "Void", "starts"])
+
+
+def screen(parameters, n_steps=200):
+    """
+    Final fraction of altruists of both approximations for every combination
+    of parameter values.
+
+    Args:
+        parameters: Dictionary of parameter names to a value or a list of
+            values, as for mesa.batch_run.
+
+    Returns a DataFrame with the parameters, the final "Altruist" fraction of
+    both methods and their absolute difference, "disagreement", largest
+    first: the combinations that most need a lattice run.
+    """
+    names = list(parameters)
+    values = [
+        list(value) if np.iterable(value) and not isinstance(value, str) else [value]
+        for value in parameters.values()
+    ]
+    rows = []
+    for combination in itertools.product(*values):
+        kwargs = dict(zip(names, combination))
+        row = dict(kwargs)
+        for method in METHODS:
+            row[method] = solve(method, n_steps, **kwargs)["Altruist"].iloc[-1]
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    df["disagreement"] = (df[MEAN_FIELD] - df[PAIR_APPROXIMATION]).abs()
+    return df.sort_values("disagreement", ascending=False, ignore_index=True)
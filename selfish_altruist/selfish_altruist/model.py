@@ -6,8 +6,10 @@ Reproduction of:
 """
 
 import mesa
-import random
+import numpy as np
 
+from selfish_altruist import snapshot
+from selfish_altruist.lattice import STRATEGY_NAMES, Neighborhood, resolve_seed
 from selfish_altruist.scheduler import BaseSchedulerByFilteredType
 
 from selfish_altruist.agents import SelfishAltruistAgent
@@ -24,6 +26,16 @@ class SelfishAltruist(mesa.Model):
     benefit_of_altruism = 0.5
     disease = 0.0
     harshness = 0.0
+    incremental = False
+    activity_tracking = False
+    moore = False
+    radius = 1
+    # the grid, its neighborhood cache, the agents and the DataCollector are
+    # kept when batch_run reuses the model for another run, see reset()
+    structural_parameters = ("n_grid_cells_width", "n_grid_cells_height", "moore", "radius")
+    # gap between frontier cells above which the lottery stream is advanced
+    # rather than drawn, see draw_uniform_for_cells
+    ADVANCE_GAP = 64
 
     verbose_1 = True  # Fitness values in grid and advanced tooltips
 
@@ -40,37 +52,52 @@ class SelfishAltruist(mesa.Model):
             cost_of_altruism=cost_of_altruism,
             benefit_of_altruism=benefit_of_altruism,
             disease=disease,
-            harshness=harshness
-
+            harshness=harshness,
+            incremental=incremental,
+            activity_tracking=activity_tracking,
+            seed=None,
+            moore=moore,
+            radius=radius,
     ):
         """
         Create a new Predator-Prey model with the given parameters.
 
         Args:
+            incremental: Only recompute fitness and lottery weights around the
+                cells that flipped in the previous tick, instead of for every
+                cell, and only breed the frontier (see activity_tracking).
+                Gives the same dynamics as a full update, but the Fitness and
+                Lottery tables only get rows for the recomputed cells.
+            activity_tracking: Confine fitness, lottery and breeding to the
+                "frontier": the cells with at least one altruist or selfish
+                cell within twice the neighborhood radius. Cells outside the frontier are void in
+                an all-void neighborhood and can only stay void, so they are
+                skipped.
+            seed: Seed of the random streams for the initial grid and the
+                breed lottery. Every tick draws one uniform number per cell,
+                whether the cell is updated or not, so runs with the same
+                seed share their random numbers cell for cell across
+                parameter values (common random numbers), and with a
+                SelfishAltruistLattice of the same seed and a single band.
+                If None, one is drawn and stored as the seed attribute.
+            moore: Use the Moore instead of the von Neumann neighborhood,
+                for fitness and lottery alike.
+            radius: Radius of the neighborhood, the cell itself included.
         """
         super().__init__()
         # Set parameters
         self.n_grid_cells_width = n_grid_cells_width
         self.n_grid_cells_height = n_grid_cells_height
         self.n_cells = n_grid_cells_width * n_grid_cells_height
-
-        self.n_altruist = 0
-        self.n_selfish = 0
-        self.n_population = 0
-        self.n_void = 0
-        self.percentage_of_altruist = 0.0
-
-        # fitness parameters
-        self.harshness = harshness  # =/= to fitnes of a Void patch
-        self.disease = disease
-
-        # selfish-altruistic
-        self.altruistic_probability = altruistic_probability
-        self.selfish_probability = selfish_probability
-        self.cost_of_altruism = cost_of_altruism
-        self.benefit_of_altruism = benefit_of_altruism
+        self.moore = moore
+        self.radius = radius
+        # a neighborhood wider than the torus would hold cells twice in the
+        # lattice models, and once here
+        Neighborhood.of(moore, radius).check_fits(n_grid_cells_height, n_grid_cells_width)
 
         self.schedule = BaseSchedulerByFilteredType(self)
+        # n_altruist and n_selfish are looked up in the scheduler
+        self.schedule.register_state_key(SelfishAltruistAgent, "name")
 
         self.grid = mesa.space.SingleGrid(self.n_grid_cells_width, self.n_grid_cells_height, torus=True)
         self.datacollector = mesa.DataCollector(
@@ -88,22 +115,95 @@ class SelfishAltruist(mesa.Model):
             },
         )
 
-        # initialize patches
+        # create patches, their strategies are drawn by reset()
         for _, x, y in self.grid.coord_iter():
             selfish_altruist_agent = SelfishAltruistAgent(self.next_id(), (x, y), self)
             self.grid.place_agent(selfish_altruist_agent, (x, y))
             self.schedule.add(selfish_altruist_agent)
-            ptype = random.uniform(0, 1)
+
+        self.reset(
+            altruistic_probability=altruistic_probability,
+            selfish_probability=selfish_probability,
+            cost_of_altruism=cost_of_altruism,
+            benefit_of_altruism=benefit_of_altruism,
+            disease=disease,
+            harshness=harshness,
+            incremental=incremental,
+            activity_tracking=activity_tracking,
+            seed=seed,
+        )
+
+    def reset(
+            self,
+            altruistic_probability=altruistic_probability,
+            selfish_probability=selfish_probability,
+            cost_of_altruism=cost_of_altruism,
+            benefit_of_altruism=benefit_of_altruism,
+            disease=disease,
+            harshness=harshness,
+            incremental=incremental,
+            activity_tracking=activity_tracking,
+            seed=None,
+            **structure,
+    ):
+        """
+        Put the model in the state of a new model with the given parameters,
+        reusing its grid and agents. The structural parameters, if given,
+        must be the ones the model was created with.
+        """
+        for name, value in structure.items():
+            if name not in self.structural_parameters:
+                raise TypeError(f"reset() got an unexpected keyword argument {name!r}")
+            if getattr(self, name) != value:
+                raise ValueError(f"{name} is structural, a reset cannot change it.")
+        self.seed = resolve_seed(seed)
+        super().reset(seed=self.seed)
+
+        self.n_population = 0
+        self.n_void = 0
+        self.percentage_of_altruist = 0.0
+
+        # fitness parameters
+        self.harshness = harshness  # =/= to fitnes of a Void patch
+        self.disease = disease
+
+        # selfish-altruistic
+        self.altruistic_probability = altruistic_probability
+        self.selfish_probability = selfish_probability
+        self.cost_of_altruism = cost_of_altruism
+        self.benefit_of_altruism = benefit_of_altruism
+
+        # positions of the cells that flipped strategy in the last breed pass;
+        # None until the first full update has been done
+        self.incremental = incremental
+        self.flipped_cells = None
+
+        # frontier cells and, per cell, the number of altruist or selfish cells
+        # within twice the radius; None until the first full update has been done
+        self.activity_tracking = activity_tracking
+        self.frontier = None
+        self.n_occupied_nearby = None
+
+        initial_seed, lottery_seed = np.random.SeedSequence(self.seed).spawn(2)
+        # the same streams as a single band SelfishAltruistLattice
+        self.lottery_rng = np.random.default_rng(lottery_seed.spawn(1)[0])
+
+        self.schedule.reset()
+        self.datacollector.clear()
+
+        # initialize patches
+        ptypes = self.draw_uniform_per_cell(np.random.default_rng(initial_seed))
+        for selfish_altruist_agent, x, y in self.grid.coord_iter():
+            selfish_altruist_agent.reset()
+            ptype = ptypes[x][y]
             if ptype < self.altruistic_probability:
                 selfish_altruist_agent.benefit_out = 0
                 selfish_altruist_agent.name = "altruist"
                 selfish_altruist_agent.pcolor = "blue"
-                self.n_altruist += 1
             elif ptype < self.altruistic_probability + self.selfish_probability:
                 selfish_altruist_agent.benefit_out = 1
                 selfish_altruist_agent.name = "selfish"
                 selfish_altruist_agent.pcolor = "red"
-                self.n_selfish += 1
             else:
                 selfish_altruist_agent.benefit_out = 0
                 selfish_altruist_agent.name = "void"
@@ -117,12 +217,155 @@ class SelfishAltruist(mesa.Model):
         self.percentage_of_altruist = self.n_altruist / self.n_cells
         self.datacollector.collect(self)
 
+    @property
+    def n_altruist(self):
+        return self.schedule.get_type_count(SelfishAltruistAgent, name="altruist")
+
+    @property
+    def n_selfish(self):
+        return self.schedule.get_type_count(SelfishAltruistAgent, name="selfish")
+
+    def draw_uniform_per_cell(self, rng):
+        """
+        Return a uniform number in [0, 1) for every cell, indexed [x][y].
+        """
+        # drawn in (row, column) order, like SelfishAltruistLattice
+        return rng.random((self.n_grid_cells_height, self.n_grid_cells_width)).T.tolist()
+
+    def draw_uniform_for_cells(self, rng, cells):
+        """
+        Return the numbers draw_uniform_per_cell would give the given cells,
+        in the order of cells, for about the cost of these cells only: the
+        stream is advanced past the long gaps between them instead of drawing
+        for every cell.
+        """
+        if not cells:
+            rng.bit_generator.advance(self.n_cells)
+            return []
+        cells = np.array(cells, dtype=np.int64)
+        # one 64-bit output per double, in (row, column) order
+        indices = cells[:, 1] * self.n_grid_cells_width + cells[:, 0]
+        order = np.argsort(indices, kind="stable")
+        sorted_indices = indices[order]
+        # spans of cells with short gaps are drawn at once, the numbers of the
+        # cells in between thrown away; advancing costs about as much as
+        # drawing a few dozen numbers
+        gaps = np.flatnonzero(np.diff(sorted_indices) > self.ADVANCE_GAP) + 1
+        firsts = sorted_indices[np.concatenate([[0], gaps])].tolist()
+        lasts = sorted_indices[np.concatenate([gaps - 1, [len(indices) - 1]])].tolist()
+        spans = []
+        drawn = 0
+        for first, last in zip(firsts, lasts):
+            rng.bit_generator.advance(first - drawn)
+            spans.append(rng.random(last - first + 1))
+            drawn = last + 1
+        rng.bit_generator.advance(self.n_cells - drawn)
+        # position of every cell within the concatenated spans
+        span_lengths = np.array(lasts) - np.array(firsts) + 1
+        span_offsets = np.cumsum(span_lengths) - span_lengths - np.array(firsts)
+        span_of_cell = np.searchsorted(np.array(lasts), sorted_indices)
+        uniforms = np.empty(len(indices))
+        uniforms[order] = np.concatenate(spans)[sorted_indices + span_offsets[span_of_cell]]
+        return uniforms.tolist()
+
+    def neighborhood_of_cells(self, cells):
+        """
+        Return the set of positions within the neighborhood of any of the
+        given positions, the positions included.
+        """
+        region = set()
+        for position in cells:
+            region.update(self.grid.get_neighborhood(position, moore=self.moore, include_center=True, radius=self.radius))
+        return region
+
+    def track_occupation(self, position, delta):
+        """
+        Add delta to the number of occupied (altruist or selfish) cells near
+        every cell within twice the radius of position, and update the frontier.
+        """
+        neighborhood = self.grid.get_neighborhood(position, moore=self.moore, include_center=True, radius=2 * self.radius)
+        for x, y in neighborhood:
+            self.n_occupied_nearby[x][y] += delta
+            if self.n_occupied_nearby[x][y] > 0:
+                self.frontier.add((x, y))
+            else:
+                self.frontier.discard((x, y))
+
+    def reset_frontier(self):
+        self.frontier = set()
+        self.n_occupied_nearby = [[0] * self.n_grid_cells_height for _ in range(self.n_grid_cells_width)]
+        for agent, x, y in self.grid.coord_iter():
+            if agent.name != "void":
+                self.track_occupation((x, y), 1)
+
+    def calculate_lottery_weights(self, agent):
+        position_agent = agent.pos
+        agent.sum_fitness_selfish_in_neighborhood = 0
+        agent.sum_fitness_altruists_in_neighborhood = 0
+        agent.sum_fitness_harshness_in_neighborhood = 0
+        agent.sum_total_fitness_in_neighborhood = 0
+        agent.weight_fitness_selfish_in_neighborhood = 0
+        agent.weight_fitness_altruists_in_neighborhood = 0
+        agent.weight_fitness_harshness_in_neighborhood = 0
+        neighbor_iterator = self.grid.iter_neighbors(
+            position_agent, moore=self.moore, include_center=True, radius=self.radius
+        )
+        for neighbor in neighbor_iterator:
+            if neighbor.name == "selfish":
+                agent.sum_fitness_selfish_in_neighborhood += neighbor.fitness
+            elif neighbor.name == "altruist":
+                agent.sum_fitness_altruists_in_neighborhood += neighbor.fitness
+            elif neighbor.name == "void":
+                agent.sum_fitness_harshness_in_neighborhood += neighbor.fitness
+        agent.sum_total_fitness_in_neighborhood = agent.sum_fitness_selfish_in_neighborhood + \
+                                                  agent.sum_fitness_altruists_in_neighborhood + \
+                                                  agent.sum_fitness_harshness_in_neighborhood + self.disease
+        if agent.sum_total_fitness_in_neighborhood > 0:
+            # lottery weights
+            agent.weight_fitness_selfish_in_neighborhood = agent.sum_fitness_selfish_in_neighborhood / \
+                                                           agent.sum_total_fitness_in_neighborhood
+            agent.weight_fitness_altruists_in_neighborhood = agent.sum_fitness_altruists_in_neighborhood / \
+                                                             agent.sum_total_fitness_in_neighborhood
+            agent.weight_fitness_harshness_in_neighborhood = (
+                                                                     agent.sum_fitness_harshness_in_neighborhood + self.disease) / \
+                                                             agent.sum_total_fitness_in_neighborhood
+        else:
+            agent.weight_fitness_selfish_in_neighborhood = 0
+            agent.weight_fitness_altruists_in_neighborhood = 0
+            agent.weight_fitness_harshness_in_neighborhood = 0
+
+        self.datacollector.add_table_row(
+            "Lottery", {
+                "position": position_agent,
+                "current agent": agent.name,
+                "P[selfish]": agent.weight_fitness_selfish_in_neighborhood,
+                "P[altruists]": agent.weight_fitness_altruists_in_neighborhood,
+                "P[harshness]": agent.weight_fitness_harshness_in_neighborhood,
+            }
+        )
+
     def step(self):
         self.n_population = self.n_altruist + self.n_selfish
         self.n_void = self.n_cells - self.n_population
         self.percentage_of_altruist = self.n_altruist / self.n_cells
 
-        self.schedule.step()  # Base schedule to find out fitness per cell/agent
+        frontier_cells = sorted(self.frontier) if self.frontier is not None else None
+        if self.incremental and self.flipped_cells is not None:
+            # Fitness only depends on the strategies in a cell's neighborhood and
+            # the lottery weights on the fitness in a cell's neighborhood, so only
+            # the cells within one radius (fitness) and two radii (lottery) of a
+            # flipped cell can have changed since the previous tick.
+            fitness_cells = sorted(self.neighborhood_of_cells(self.flipped_cells))
+            lottery_cells = sorted(self.neighborhood_of_cells(fitness_cells))
+        elif self.activity_tracking:
+            fitness_cells = lottery_cells = frontier_cells
+        else:
+            # update every cell
+            fitness_cells = lottery_cells = None
+        if fitness_cells is None:
+            self.schedule.step()  # Base schedule to find out fitness per cell/agent
+        else:
+            self.schedule.step_agents(self.grid.get_cell_list_contents(fitness_cells))
         # collect fitness per cell/agent in Table
         # print(self.datacollector.get_model_vars_dataframe())
         self.datacollector.collect(self)
@@ -130,77 +373,39 @@ class SelfishAltruist(mesa.Model):
         # print("round 1: calculate fitness per cell:")
 
         # print(self.percentage_of_altruist)
-        grid_iterator = self.grid.coord_iter()
-        for agent, x, y in grid_iterator:
-            position_agent = (x, y)
-            agent.sum_fitness_selfish_in_neighborhood = 0
-            agent.sum_fitness_altruists_in_neighborhood = 0
-            agent.sum_fitness_harshness_in_neighborhood = 0
-            agent.sum_total_fitness_in_neighborhood = 0
-            agent.weight_fitness_selfish_in_neighborhood = 0
-            agent.weight_fitness_altruists_in_neighborhood = 0
-            agent.weight_fitness_harshness_in_neighborhood = 0
-            neighbor_iterator = self.grid.iter_neighbors(position_agent, moore=False, include_center=True, radius=1)
-            for neighbor in neighbor_iterator:
-                if neighbor.name == "selfish":
-                    agent.sum_fitness_selfish_in_neighborhood += neighbor.fitness
-                elif neighbor.name == "altruist":
-                    agent.sum_fitness_altruists_in_neighborhood += neighbor.fitness
-                elif neighbor.name == "void":
-                    agent.sum_fitness_harshness_in_neighborhood += neighbor.fitness
-            agent.sum_total_fitness_in_neighborhood = agent.sum_fitness_selfish_in_neighborhood + \
-                                                      agent.sum_fitness_altruists_in_neighborhood + \
-                                                      agent.sum_fitness_harshness_in_neighborhood + self.disease
-            if agent.sum_total_fitness_in_neighborhood > 0:
-                # lottery weights
-                agent.weight_fitness_selfish_in_neighborhood = agent.sum_fitness_selfish_in_neighborhood / \
-                                                               agent.sum_total_fitness_in_neighborhood
-                agent.weight_fitness_altruists_in_neighborhood = agent.sum_fitness_altruists_in_neighborhood / \
-                                                                 agent.sum_total_fitness_in_neighborhood
-                agent.weight_fitness_harshness_in_neighborhood = (
-                                                                         agent.sum_fitness_harshness_in_neighborhood + self.disease) / \
-                                                                 agent.sum_total_fitness_in_neighborhood
-            else:
-                agent.weight_fitness_selfish_in_neighborhood = 0
-                agent.weight_fitness_altruists_in_neighborhood = 0
-                agent.weight_fitness_harshness_in_neighborhood = 0
+        if lottery_cells is None:
+            for agent, x, y in self.grid.coord_iter():
+                self.calculate_lottery_weights(agent)
+        else:
+            for agent in self.grid.get_cell_list_contents(lottery_cells):
+                self.calculate_lottery_weights(agent)
 
-            self.datacollector.add_table_row(
-                "Lottery", {
-                    "position": position_agent,
-                    "current agent": agent.name,
-                    "P[selfish]": agent.weight_fitness_selfish_in_neighborhood,
-                    "P[altruists]": agent.weight_fitness_altruists_in_neighborhood,
-                    "P[harshness]": agent.weight_fitness_harshness_in_neighborhood,
-                }
+        flipped_cells = []
+        if frontier_cells is None:
+            breed_chances = self.draw_uniform_per_cell(self.lottery_rng)
+            grid_iterator = ((agent, x, y, breed_chances[x][y]) for agent, x, y in self.grid.coord_iter())
+        else:
+            # only the frontier cells are drawn for, the stream stays aligned
+            # with a full draw so common random numbers still hold
+            breed_chances = self.draw_uniform_for_cells(self.lottery_rng, frontier_cells)
+            grid_iterator = (
+                (self.grid[x][y], x, y, breed_chance) for (x, y), breed_chance in zip(frontier_cells, breed_chances)
             )
-        grid_iterator = self.grid.coord_iter()
-        for agent, x, y in grid_iterator:
-            breed_chance = random.uniform(0, 1)
+        for agent, x, y, breed_chance in grid_iterator:
+            old_type_name = agent.name
             if breed_chance < agent.weight_fitness_altruists_in_neighborhood:
-                old_type_name = agent.name
                 agent.benefit_out = 0  # todo: set into fitness equation
                 agent.name = "altruist"
                 agent.pcolor = "blue"
-                if old_type_name != "altruist":
-                    self.n_altruist += 1
-                    if old_type_name == "selfish":
-                        self.n_selfish -= 1
             elif breed_chance < agent.weight_fitness_altruists_in_neighborhood + agent.weight_fitness_selfish_in_neighborhood:
-                old_type_name = agent.name
                 agent.benefit_out = 1
                 agent.name = "selfish"
                 agent.pcolor = "red"
-                if old_type_name != "selfish":
-                    self.n_selfish += 1
-                    if old_type_name == "altruist":
-                        self.n_altruist -= 1
+            elif self.incremental and old_type_name == "void":
+                # a void cell that stays void keeps its lottery weights, they
+                # are not recomputed unless something changes around it
+                pass
             else:
-                old_type_name = agent.name
-                if old_type_name == "altruist":
-                    self.n_altruist -= 1
-                elif old_type_name == "selfish":
-                    self.n_selfish -= 1
                 agent.benefit_out = 0
                 agent.name = "void"
                 agent.pcolor = "black"
@@ -212,6 +417,14 @@ class SelfishAltruist(mesa.Model):
                 agent.sum_fitness_selfish_in_neighborhood = 0
                 agent.sum_fitness_altruists_in_neighborhood = 0
                 agent.sum_fitness_harshness_in_neighborhood = 0
+            if agent.name != old_type_name:
+                flipped_cells.append((x, y))
+                if self.frontier is not None and "void" in (agent.name, old_type_name):
+                    self.track_occupation((x, y), 1 if old_type_name == "void" else -1)
+        self.flipped_cells = flipped_cells
+        if (self.activity_tracking or self.incremental) and self.frontier is None:
+            # from now on only the frontier is bred
+            self.reset_frontier()
         df_selfish = self.datacollector.get_model_vars_dataframe()["Selfish"]
         df_altruist = self.datacollector.get_model_vars_dataframe()["Altruist"]
         percentage_altruist = df_altruist / (df_altruist + df_selfish)
@@ -226,3 +439,110 @@ class SelfishAltruist(mesa.Model):
             # https://stackoverflow.com/questions/34166030/obtaining-last-value-of-dataframe-column-without-index
 
             self.running = False
+
+    def snapshot(self):
+        """
+        Return the state of the run as snapshot bytes (see
+        selfish_altruist.snapshot), to continue it later with restore().
+        """
+        shape = (self.n_grid_cells_height, self.n_grid_cells_width)
+        codes = np.empty(shape, dtype=np.uint8)
+        n_neighboring_altruists = np.empty(shape, dtype=np.uint8)
+        cell_values = {
+            name: np.empty(shape, dtype=np.float64)
+            for name in (
+                "fitness",
+                "weight_fitness_altruists_in_neighborhood",
+                "weight_fitness_selfish_in_neighborhood",
+                "weight_fitness_harshness_in_neighborhood",
+            )
+        }
+        code_of_name = {name: code for code, name in enumerate(STRATEGY_NAMES)}
+        for agent, x, y in self.grid.coord_iter():
+            codes[y, x] = code_of_name[agent.name]
+            n_neighboring_altruists[y, x] = agent.n_neighboring_altruists
+            for name, values in cell_values.items():
+                values[y, x] = getattr(agent, name)
+        arrays = {"codes": codes, "n_neighboring_altruists": n_neighboring_altruists, **cell_values}
+        if self.flipped_cells is not None:
+            arrays["flipped_cells"] = np.array(self.flipped_cells, dtype=np.int64).reshape(-1, 2)
+
+        header = {
+            "parameters": {
+                "n_grid_cells_width": self.n_grid_cells_width,
+                "n_grid_cells_height": self.n_grid_cells_height,
+                "altruistic_probability": self.altruistic_probability,
+                "selfish_probability": self.selfish_probability,
+                "cost_of_altruism": self.cost_of_altruism,
+                "benefit_of_altruism": self.benefit_of_altruism,
+                "disease": self.disease,
+                "harshness": self.harshness,
+                "incremental": self.incremental,
+                "activity_tracking": self.activity_tracking,
+                "seed": self.seed,
+                "moore": self.moore,
+                "radius": self.radius,
+            },
+            "state": {
+                "n_altruist": self.n_altruist,
+                "n_selfish": self.n_selfish,
+                "running": self.running,
+                "steps": self.schedule.steps,
+                "time": self.schedule.time,
+                "current_id": self.current_id,
+                "frontier": self.frontier is not None,
+            },
+            "rng": {
+                "lottery": self.lottery_rng.bit_generator.state,
+                "random": snapshot.random_state(self.random),
+            },
+        }
+        return snapshot.dumps(type(self).__name__, header, arrays)
+
+    @classmethod
+    def restore(cls, data):
+        """
+        Return a new model in the state of the snapshot bytes data. The
+        DataCollector starts empty; the neighborhood sums shown in the
+        tooltips are filled in by the next step.
+        """
+        header, arrays = snapshot.loads(data, cls.__name__)
+        model = cls(**header["parameters"])
+        model.datacollector.clear()
+
+        codes = arrays["codes"].tolist()
+        n_neighboring_altruists = arrays["n_neighboring_altruists"].tolist()
+        cell_values = {
+            name: arrays[name].tolist()
+            for name in (
+                "fitness",
+                "weight_fitness_altruists_in_neighborhood",
+                "weight_fitness_selfish_in_neighborhood",
+                "weight_fitness_harshness_in_neighborhood",
+            )
+        }
+        pcolors = {"void": "black", "altruist": "blue", "selfish": "red"}
+        for agent, x, y in model.grid.coord_iter():
+            agent.name = STRATEGY_NAMES[codes[y][x]]
+            agent.pcolor = pcolors[agent.name]
+            agent.benefit_out = 1 if agent.name == "selfish" else 0
+            agent.n_neighboring_altruists = n_neighboring_altruists[y][x]
+            for name, values in cell_values.items():
+                setattr(agent, name, values[y][x])
+        if "flipped_cells" in arrays:
+            model.flipped_cells = [tuple(cell) for cell in arrays["flipped_cells"].tolist()]
+
+        state = header["state"]
+        model.n_population = model.n_altruist + model.n_selfish
+        model.n_void = model.n_cells - model.n_population
+        model.percentage_of_altruist = model.n_altruist / model.n_cells
+        model.running = state["running"]
+        model.schedule.steps = state["steps"]
+        model.schedule.time = state["time"]
+        model.current_id = state["current_id"]
+        if state["frontier"]:
+            model.reset_frontier()
+
+        model.lottery_rng.bit_generator.state = header["rng"]["lottery"]
+        snapshot.set_random_state(model.random, header["rng"]["random"])
+        return model
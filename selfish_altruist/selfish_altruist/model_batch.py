@@ -338,7 +338,7 @@ if __name__ == "__main__":
     params = {"cost_of_altruism": 0.13, "benefit_of_altruism": 0.48, "disease": disease_range,
               "harshness": harshness_range}
 
-    results = mesa.batch_run(
+    summary = mesa.batch_run(
         SelfishAltruist,
         parameters=params,
         iterations=100,
@@ -346,26 +346,12 @@ if __name__ == "__main__":
         number_processes=None,
         data_collection_period=-1,
         display_progress=True,
+        reuse_models=True,
+        aggregate={"%Altruist": ["mean"]},
+        group_by=["disease"],
     )
 
-    df = pd.DataFrame(results)
-    print(df.to_string())
-
-    i = 0
-    d_array = [0 for i in range(len(disease_range))]
-    # h_array = [0 for i in range(len(harshness_range))]
-    percentage_altruist_array = [0 for i in range(len(disease_range))]
-    for d in disease_range:
-        d_array[i] = d
-        dfh = df.query("disease==@d")
-        percentage_altruist_array[i] = dfh["%Altruist"].mean()
-        i += 1
-        # print("harshess: "+str(h)+" "+str(dfh["%Altruist"].mean()))
-
-    print(d_array)
-    print(percentage_altruist_array)
-    # df = pd.DataFrame(d_array, columns =['disease'])
-    df = pd.DataFrame(list(zip(d_array, percentage_altruist_array)),
-                      columns=['disease', '%Altruist'])
+    df = pd.DataFrame(summary).sort_values("disease", ignore_index=True)
+    df = df[["disease", "%Altruist_mean"]].rename(columns={"%Altruist_mean": "%Altruist"})
     print(df)
     df.to_csv("test1.csv", index=True)
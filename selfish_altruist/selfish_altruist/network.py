@@ -0,0 +1,252 @@
+"""
+Selfish-Altruist Network Model
+
+The Selfish-Altruist dynamics on a social network instead of a lattice: the
+neighborhood of a node is the node itself and the nodes it is linked to, so
+its size varies with the degree. The networkx graph is converted once to a
+CSR adjacency, and the number of altruists and the fitness sums in the
+neighborhood of every node are sparse matrix-vector products over it, one
+np.bincount per sum, for the whole network at once.
+"""
+
+import mesa
+import networkx as nx
+import numpy as np
+
+from selfish_altruist.lattice import ALTRUIST, SELFISH, VOID, breed, resolve_seed
+
+SMALL_WORLD = "small_world"
+SCALE_FREE = "scale_free"
+RANDOM = "random"
+NETWORKS = (SMALL_WORLD, SCALE_FREE, RANDOM)
+
+# kernel group of the nodes in the scheduler
+NODES = "nodes"
+
+
+def make_graph(network, n_nodes, mean_degree, rewiring_probability, seed):
+    """
+    A networkx graph of one of NETWORKS: a Watts-Strogatz small world, a
+    Barabasi-Albert scale-free network or an Erdos-Renyi random graph, with
+    about mean_degree links per node.
+    """
+    if network == SMALL_WORLD:
+        return nx.watts_strogatz_graph(n_nodes, mean_degree, rewiring_probability, seed=seed)
+    if network == SCALE_FREE:
+        return nx.barabasi_albert_graph(n_nodes, max(1, mean_degree // 2), seed=seed)
+    if network == RANDOM:
+        return nx.gnm_random_graph(n_nodes, n_nodes * mean_degree // 2, seed=seed)
+    raise ValueError(f"network must be one of {', '.join(NETWORKS)}.")
+
+
+class Adjacency:
+    """
+    CSR adjacency of an undirected graph: the neighbors of node i are
+    indices[indptr[i]:indptr[i + 1]]. Self-loops are dropped.
+    """
+
+    def __init__(self, graph):
+        if graph.is_directed():
+            raise ValueError("The network must be undirected.")
+        self.nodes = list(graph.nodes)
+        n_nodes = len(self.nodes)
+        if self.nodes == list(range(n_nodes)):
+            edges = np.array(list(graph.edges()), dtype=np.int64).reshape(-1, 2)
+        else:
+            index = {node: i for i, node in enumerate(self.nodes)}
+            edges = np.array([(index[u], index[v]) for u, v in graph.edges()], dtype=np.int64).reshape(-1, 2)
+        edges = edges[edges[:, 0] != edges[:, 1]]
+
+        rows = np.concatenate([edges[:, 0], edges[:, 1]])
+        columns = np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.argsort(rows, kind="stable")
+        # the row of every stored entry, the COO form bincount sums over
+        self.rows = rows[order]
+        self.indices = columns[order]
+        self.degree = np.bincount(self.rows, minlength=n_nodes)
+        self.indptr = np.concatenate([[0], np.cumsum(self.degree)])
+        self.n_nodes = n_nodes
+
+    def neighbors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def sum(self, values):
+        """Sum of values over the neighborhood of every node, the node itself
+        included: (A + I) @ values."""
+        return values + np.bincount(self.rows, weights=values[self.indices], minlength=self.n_nodes)
+
+
+class SelfishAltruistNetwork(mesa.Model):
+    network = SMALL_WORLD
+    n_nodes = 1000
+    mean_degree = 4
+    rewiring_probability = 0.1
+    altruistic_probability = 0.26
+    selfish_probability = 0.26
+    cost_of_altruism = 0.13
+    benefit_of_altruism = 0.5
+    disease = 0.0
+    harshness = 0.0
+
+    description = (
+        "A model for simulating Selfish-Altruist behavior on social networks."
+    )
+
+    def __init__(
+            self,
+            network=network,
+            n_nodes=n_nodes,
+            mean_degree=mean_degree,
+            rewiring_probability=rewiring_probability,
+            altruistic_probability=altruistic_probability,
+            selfish_probability=selfish_probability,
+            cost_of_altruism=cost_of_altruism,
+            benefit_of_altruism=benefit_of_altruism,
+            disease=disease,
+            harshness=harshness,
+            seed=None,
+            graph=None,
+    ):
+        """
+        Create a new Selfish-Altruist network with the given parameters.
+
+        Args:
+            network: Kind of network to generate, one of NETWORKS.
+            n_nodes: Number of nodes of the generated network.
+            mean_degree: About the mean number of links per node.
+            rewiring_probability: Rewiring probability of a small world.
+            seed: Seed of the random streams for the network, the initial
+                strategies and the lottery. The strategy and lottery streams
+                are the ones of a SelfishAltruistLattice with a single band,
+                over the nodes in graph order. If None, one is drawn and
+                stored as the seed attribute.
+            graph: An undirected networkx graph to use instead of generating
+                one; network, n_nodes, mean_degree and rewiring_probability
+                are then ignored.
+        """
+        super().__init__()
+        self.network = network
+        self.mean_degree = mean_degree
+        self.rewiring_probability = rewiring_probability
+        self.harshness = harshness
+        self.disease = disease
+        self.altruistic_probability = altruistic_probability
+        self.selfish_probability = selfish_probability
+        self.cost_of_altruism = cost_of_altruism
+        self.benefit_of_altruism = benefit_of_altruism
+        self.seed = resolve_seed(seed)
+        self.reset_randomizer(self.seed)
+
+        initial_seed, lottery_seed, graph_seed = np.random.SeedSequence(self.seed).spawn(3)
+        self.lottery_rng = np.random.default_rng(lottery_seed.spawn(1)[0])
+        if graph is None:
+            graph_seed = int(graph_seed.generate_state(1)[0])
+            graph = make_graph(network, n_nodes, mean_degree, rewiring_probability, graph_seed)
+        self.graph = graph
+        self.adjacency = Adjacency(graph)
+        self.n_nodes = self.n_cells = self.adjacency.n_nodes
+        # the node itself is part of its neighborhood
+        self.neighborhood_size = self.adjacency.degree + 1.0
+
+        self.state_arrays = {}
+        self.schedule = mesa.time.SynchronousActivation(self, state_arrays=self.state_arrays)
+        self.schedule.register_kernel(NODES, step_all=self.breed_all, advance_all=self.advance_all)
+        self.datacollector = mesa.DataCollector(
+            model_reporters={
+                "Selfish": lambda m: m.n_selfish,
+                "Altruist": lambda m: m.n_altruist,
+                "Void": lambda m: m.n_void,
+                "Population": lambda m: m.n_population,
+                "%Altruist": lambda m: m.percentage_of_altruist,
+            },
+        )
+
+        ptype = np.random.default_rng(initial_seed).random(self.n_nodes)
+        codes = np.full(ptype.shape, VOID, dtype=np.uint8)
+        codes[ptype < altruistic_probability + selfish_probability] = SELFISH
+        codes[ptype < altruistic_probability] = ALTRUIST
+        self.state_arrays["codes"] = codes
+        self.state_arrays["fitness"] = np.zeros(ptype.shape, dtype=np.float64)
+        self.n_altruist = int(np.count_nonzero(codes == ALTRUIST))
+        self.n_selfish = int(np.count_nonzero(codes == SELFISH))
+
+        self.running = True
+        self.update_counts()
+        self.datacollector.collect(self)
+
+    @property
+    def codes(self):
+        return self.state_arrays["codes"]
+
+    @property
+    def fitness(self):
+        return self.state_arrays["fitness"]
+
+    def update_counts(self):
+        self.n_population = self.n_altruist + self.n_selfish
+        self.n_void = self.n_cells - self.n_population
+        self.percentage_of_altruist = self.n_altruist / self.n_cells
+
+    def neighborhood_counts(self, codes):
+        """Number of altruists and of selfish nodes in the neighborhood of
+        every node."""
+        # both counts in one product, the selfish ones above bit 20 (degrees
+        # stay far below 2 ** 20, sums far below 2 ** 53)
+        packed = (codes == ALTRUIST) + (codes == SELFISH) * float(1 << 20)
+        counts = self.adjacency.sum(packed).astype(np.int64)
+        return counts & ((1 << 20) - 1), counts >> 20
+
+    def calculate_fitness(self, codes, n_neighboring_altruists):
+        """Fitness of every node, see SelfishAltruistAgent.calculate_fitness."""
+        size = self.neighborhood_size
+        fitness = np.full(codes.shape, self.harshness, dtype=np.float64)
+        altruist = codes == ALTRUIST
+        selfish = codes == SELFISH
+        fitness[altruist] = (
+            1 - self.cost_of_altruism + self.benefit_of_altruism * n_neighboring_altruists[altruist] / size[altruist]
+        )
+        fitness[selfish] = 1 + self.benefit_of_altruism * (n_neighboring_altruists[selfish] / size[selfish])
+        return fitness
+
+    def lottery_weights(self, codes, fitness, n_neighboring_altruists, n_neighboring_selfish):
+        """Lottery weights of the altruists and the selfish of every node; the
+        void gets the remainder."""
+        sum_fitness_altruists = self.adjacency.sum(np.where(codes == ALTRUIST, fitness, 0.0))
+        sum_fitness_selfish = self.adjacency.sum(np.where(codes == SELFISH, fitness, 0.0))
+        # every void node has the fitness of the void
+        n_neighboring_void = self.neighborhood_size - n_neighboring_altruists - n_neighboring_selfish
+        sum_fitness_harshness = self.harshness * n_neighboring_void
+        sum_total_fitness = sum_fitness_selfish + sum_fitness_altruists + sum_fitness_harshness + self.disease
+        positive = sum_total_fitness > 0
+        np.divide(sum_fitness_altruists, sum_total_fitness, out=sum_fitness_altruists, where=positive)
+        np.divide(sum_fitness_selfish, sum_total_fitness, out=sum_fitness_selfish, where=positive)
+        sum_fitness_altruists[~positive] = 0
+        sum_fitness_selfish[~positive] = 0
+        return sum_fitness_altruists, sum_fitness_selfish
+
+    def breed_all(self, state_arrays):
+        """Step kernel: breed every node into state_arrays["next_codes"]."""
+        codes = state_arrays["codes"]
+        n_neighboring_altruists, n_neighboring_selfish = self.neighborhood_counts(codes)
+        fitness = state_arrays["fitness"]
+        fitness[...] = self.calculate_fitness(codes, n_neighboring_altruists)
+        weight_altruists, weight_selfish = self.lottery_weights(
+            codes, fitness, n_neighboring_altruists, n_neighboring_selfish
+        )
+        state_arrays["next_codes"] = breed(weight_altruists, weight_selfish, self.lottery_rng.random(codes.shape))
+
+    def advance_all(self, state_arrays):
+        """Advance kernel: make the bred nodes the current ones."""
+        codes = state_arrays["codes"] = state_arrays.pop("next_codes")
+        self.n_altruist = int(np.count_nonzero(codes == ALTRUIST))
+        self.n_selfish = int(np.count_nonzero(codes == SELFISH))
+        # void nodes get the fitness of the void right away, as in SelfishAltruist
+        state_arrays["fitness"][codes == VOID] = self.harshness
+
+    def step(self):
+        self.update_counts()
+        self.datacollector.collect(self)
+        self.schedule.step()
+
+        if self.percentage_of_altruist > 0.7:
+            self.running = False
@@ -0,0 +1,149 @@
+"""
+Selfish-Altruist Replay
+
+Plays back a recording made with TrajectoryRecorder or DiffLogRecorder in
+the browser, through the same canvas and charts as the live server, with a
+scrub bar to seek to any tick. No model is run: the lattice of a tick is read from the
+memory-mapped recording, its fitness and lottery weights are recomputed from
+it for the tooltips, and the charts are fed from the recorded counts.
+
+    python run.py <recording>
+"""
+
+import mesa
+import numpy as np
+
+from selfish_altruist.agents import SelfishAltruistAgent
+from selfish_altruist.lattice import ALTRUIST, SELFISH, STRATEGY_NAMES, VOID, Neighborhood
+from selfish_altruist.trajectory import open_recording
+
+COLORS = {VOID: "black", ALTRUIST: "blue", SELFISH: "red"}
+
+
+class _History:
+    """Read-only sequence over the first `length` values of a column."""
+
+    def __init__(self, values, length):
+        self.values = values
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        return self.values[: self.length][index].tolist()
+
+
+class _ReplayDataCollector:
+    """Stands in for the DataCollector of a run: model_vars hold the recorded
+    values up to and including the current tick."""
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.step = 0
+
+    @property
+    def model_vars(self):
+        return {name: _History(self.counts[name].to_numpy(), self.step + 1) for name in self.counts}
+
+    def get_model_vars_dataframe(self):
+        return self.counts.iloc[: self.step + 1]
+
+
+class TrajectoryReplay(mesa.Model):
+    """
+    A recorded run that can be put in the state of any of its ticks, for a
+    ReplayServer.
+    """
+
+    verbose_1 = True
+
+    def __init__(self, path):
+        super().__init__()
+        self.trajectory = open_recording(path)
+        self.n_steps = len(self.trajectory)
+        if self.n_steps == 0:
+            raise ValueError(f"{path} holds no recorded ticks.")
+        for name, value in self.trajectory.parameters.items():
+            setattr(self, name, value)
+        self.neighborhood = Neighborhood.of(
+            getattr(self, "moore", False), getattr(self, "radius", 1), getattr(self, "stencil", None)
+        )
+        self.n_grid_cells_height, self.n_grid_cells_width = self.trajectory.shape
+        self.description = f"Replay of a {self.trajectory.header['model']} run"
+
+        self.schedule = mesa.time.BaseScheduler(self)
+        self.grid = mesa.space.SingleGrid(self.n_grid_cells_width, self.n_grid_cells_height, torus=True)
+        self.cells = {}
+        for _, x, y in self.grid.coord_iter():
+            agent = SelfishAltruistAgent(self.next_id(), (x, y), self)
+            self.grid.place_agent(agent, (x, y))
+            self.cells[x, y] = agent
+        self.datacollector = _ReplayDataCollector(self.trajectory.counts_dataframe())
+        self.current_step = None
+        self.seek(0)
+
+    def seek(self, step):
+        if not 0 <= step < self.n_steps:
+            raise IndexError(f"step {step} is not in the recording of {self.n_steps} ticks")
+        self.current_step = step
+        self.datacollector.step = step
+        self.schedule.steps = self.trajectory.first_step + step
+
+        codes = np.asarray(self.trajectory.codes[step])
+        neighborhood = self.neighborhood
+        fitness = neighborhood.fitness(codes, self.cost_of_altruism, self.benefit_of_altruism, self.harshness)
+        n_neighboring_altruists = neighborhood.sum(codes == ALTRUIST)
+        sums = {code: neighborhood.sum(np.where(codes == code, fitness, 0.0)) for code in (VOID, ALTRUIST, SELFISH)}
+        total = sums[VOID] + sums[ALTRUIST] + sums[SELFISH] + self.disease
+        positive = total > 0
+        safe_total = np.where(positive, total, 1.0)
+        weights = {
+            VOID: np.where(positive, (sums[VOID] + self.disease) / safe_total, 0.0),
+            ALTRUIST: np.where(positive, sums[ALTRUIST] / safe_total, 0.0),
+            SELFISH: np.where(positive, sums[SELFISH] / safe_total, 0.0),
+        }
+
+        # only the cells of the tick shown are touched, like the canvas does
+        codes, fitness, n_neighboring_altruists, total = (
+            codes.tolist(), fitness.tolist(), n_neighboring_altruists.tolist(), total.tolist()
+        )
+        weights = {code: weight.tolist() for code, weight in weights.items()}
+        for (x, y), agent in self.cells.items():
+            code = codes[y][x]
+            agent.name = STRATEGY_NAMES[code]
+            agent.pcolor = COLORS[code]
+            agent.fitness = fitness[y][x]
+            agent.n_neighboring_altruists = n_neighboring_altruists[y][x]
+            agent.sum_total_fitness_in_neighborhood = total[y][x]
+            agent.weight_fitness_harshness_in_neighborhood = weights[VOID][y][x]
+            agent.weight_fitness_altruists_in_neighborhood = weights[ALTRUIST][y][x]
+            agent.weight_fitness_selfish_in_neighborhood = weights[SELFISH][y][x]
+
+    def step(self):
+        if self.current_step + 1 >= self.n_steps:
+            self.running = False
+            return
+        self.seek(self.current_step + 1)
+
+
+def make_replay_server(path, port=None):
+    """A ReplayServer for the recording at path, with the elements of the live
+    server."""
+    from selfish_altruist import server as live
+
+    replay = TrajectoryReplay(path)
+    canvas_width = live.SelfishAltruist.canvas_width
+    canvas_element = mesa.visualization.CanvasGrid(
+        live.selfish_altruist_portrayal,
+        replay.n_grid_cells_width,
+        replay.n_grid_cells_height,
+        canvas_width,
+        canvas_width * (replay.n_grid_cells_height / replay.n_grid_cells_width),
+    )
+    return mesa.visualization.ReplayServer(
+        replay,
+        [canvas_element, live.static_string, live.chart_element1, live.chart_element],
+        "Selfish-Altruist Model (replay)",
+        port=port,
+    )
@@ -1,4 +1,4 @@
-from typing import Type, Callable
+from typing import Type, Callable, Iterable, List
 from collections import defaultdict
 
 import mesa
@@ -9,6 +9,10 @@ class BaseSchedulerByFilteredType(mesa.time.BaseScheduler):
     def __init__(self, model: mesa.Model) -> None:
         super().__init__(model)
         self.agents_by_type = defaultdict(dict)
+        # registered state keys per agent class, and per (class, key, value)
+        # the agents in that state, kept up to date by state_changed()
+        self.state_keys = defaultdict(set)
+        self.agents_by_state = defaultdict(dict)
 
     def add(self, agent: mesa.Agent) -> None:
         """
@@ -20,18 +24,105 @@ class BaseSchedulerByFilteredType(mesa.time.BaseScheduler):
         super().add(agent)
         agent_class: type[mesa.Agent] = type(agent)
         self.agents_by_type[agent_class][agent.unique_id] = agent
+        for key in self.state_keys[agent_class]:
+            self.agents_by_state[agent_class, key, getattr(agent, key)][agent.unique_id] = agent
+
+    def remove(self, agent: mesa.Agent) -> None:
+        """
+        Remove all instances of a given agent from the schedule.
+        """
+        super().remove(agent)
+        agent_class: type[mesa.Agent] = type(agent)
+        del self.agents_by_type[agent_class][agent.unique_id]
+        for key in self.state_keys[agent_class]:
+            del self.agents_by_state[agent_class, key, getattr(agent, key)][agent.unique_id]
+
+    def register_state_key(self, type_class: Type[mesa.Agent], key: str) -> None:
+        """
+        Keep count of the agents of a class per value of one of their
+        attributes, e.g. the strategy of a SelfishAltruistAgent.
+
+        The agents must call state_changed() whenever the attribute changes
+        (a property setter is the easiest way to do so), after which
+        get_type_count(type_class, **{key: value}) is a lookup.
+
+        Args:
+            type_class: Class of the agents.
+            key: Name of the attribute.
+        """
+        if key in self.state_keys[type_class]:
+            return
+        self.state_keys[type_class].add(key)
+        for agent in self.agents_by_type[type_class].values():
+            self.agents_by_state[type_class, key, getattr(agent, key)][agent.unique_id] = agent
+
+    def state_changed(self, agent: mesa.Agent, key: str, old_value) -> None:
+        """
+        Move an agent to the group of the new value of a state key. Agents
+        that are not in the schedule, or keys that are not registered, are
+        ignored.
+
+        Args:
+            agent: The agent whose attribute changed.
+            key: Name of the attribute.
+            old_value: Value of the attribute before the change.
+        """
+        agent_class = type(agent)
+        if key not in self.state_keys[agent_class] or agent.unique_id not in self._agents:
+            return
+        del self.agents_by_state[agent_class, key, old_value][agent.unique_id]
+        self.agents_by_state[agent_class, key, getattr(agent, key)][agent.unique_id] = agent
+
+    def get_state_agents(self, type_class: Type[mesa.Agent], **state) -> List[mesa.Agent]:
+        """
+        Returns the agents of certain type in the queue that are in the given
+        state, with a single registered state key, e.g. name="altruist".
+        """
+        return list(self._state_group(type_class, state).values())
+
+    def _state_group(self, type_class, state):
+        if len(state) != 1:
+            raise ValueError("Select the agents by exactly one state key.")
+        ((key, value),) = state.items()
+        if key not in self.state_keys[type_class]:
+            raise KeyError(f"{key!r} is not a registered state key of {type_class.__name__}.")
+        return self.agents_by_state.get((type_class, key, value), {})
+
+    def step_agents(self, agents: Iterable[mesa.Agent]) -> None:
+        """
+        Execute the step of the given agents only, one at a time, and advance
+        the schedule as a full step would.
+
+        Args:
+            agents: The agents to step, e.g. the ones whose state may have
+                changed since the previous step.
+        """
+        for agent in agents:
+            agent.step()
+        self.steps += 1
+        self.time += 1
 
     def get_type_count(
             self,
             type_class: Type[mesa.Agent],
             filter_func: Callable[[mesa.Agent], bool] = None,
+            **state,
     ) -> int:
         """
         Returns the current number of agents of certain type in the queue that satisfy the filter function.
+
+        Selecting by a registered state key instead, e.g.
+        get_type_count(SelfishAltruistAgent, name="altruist"), takes constant
+        time; a filter function has to be called on every agent.
         """
+        if state:
+            if filter_func is not None:
+                raise ValueError("Pass either a filter function or a state, not both.")
+            return len(self._state_group(type_class, state))
+        if filter_func is None:
+            return len(self.agents_by_type[type_class])
         count = 0
         for agent in self.agents_by_type[type_class].values():
-            if filter_func is None or filter_func(agent):
+            if filter_func(agent):
                 count += 1
         return count
-
@@ -0,0 +1,97 @@
+"""
+Selfish-Altruist Snapshots
+
+Compact binary format for the state of a run, used by the snapshot() and
+restore() methods of the models. A snapshot is
+
+    magic          8 bytes, b"SALTSNAP"
+    version        uint16, little endian
+    reserved       uint16
+    header length  uint32
+    header         UTF-8 JSON: model class, parameters, counters, random
+                   generator states and the dtype and shape of every array
+    arrays         the raw bytes of the arrays, in header order, C order
+
+Only what is needed to continue the run is stored; the DataCollector history
+of the run is not.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"SALTSNAP"
+VERSION = 1
+
+_PREFIX = struct.Struct("<8sHHI")
+
+
+def dumps(model_name, header, arrays):
+    """
+    Snapshot bytes of a model.
+
+    Args:
+        model_name: Name of the model class, checked on restore.
+        header: JSON-serializable dictionary with the rest of the state.
+        arrays: Dictionary of names to NumPy arrays.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    header = dict(
+        header,
+        model=model_name,
+        arrays=[
+            {"name": name, "dtype": array.dtype.newbyteorder("<").str, "shape": list(array.shape)}
+            for name, array in arrays.items()
+        ],
+    )
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    parts = [_PREFIX.pack(MAGIC, VERSION, 0, len(header_bytes)), header_bytes]
+    parts.extend(array.astype(array.dtype.newbyteorder("<"), copy=False).tobytes() for array in arrays.values())
+    return b"".join(parts)
+
+
+def loads(data, model_name):
+    """
+    Header and arrays of a snapshot of a model_name model.
+
+    Raises ValueError when data is not such a snapshot.
+    """
+    data = memoryview(data)
+    if len(data) < _PREFIX.size:
+        raise ValueError("Not a Selfish-Altruist snapshot.")
+    magic, version, _, header_length = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a Selfish-Altruist snapshot.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}.")
+    offset = _PREFIX.size
+    if offset + header_length > len(data):
+        raise ValueError("The snapshot is truncated or has trailing data.")
+    header = json.loads(bytes(data[offset:offset + header_length]))
+    if header["model"] != model_name:
+        raise ValueError(f"This is a snapshot of a {header['model']}, not of a {model_name}.")
+    offset += header_length
+
+    arrays = {}
+    for spec in header.pop("arrays"):
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        arrays[spec["name"]] = array.reshape(spec["shape"]).astype(dtype.newbyteorder("="))
+        offset += count * dtype.itemsize
+    if offset != len(data):
+        raise ValueError("The snapshot is truncated or has trailing data.")
+    return header, arrays
+
+
+def random_state(rng):
+    """JSON-serializable state of a random.Random."""
+    version, internal_state, gauss_next = rng.getstate()
+    return [version, list(internal_state), gauss_next]
+
+
+def set_random_state(rng, state):
+    version, internal_state, gauss_next = state
+    rng.setstate((version, tuple(internal_state), gauss_next))
+
@@ -0,0 +1,471 @@
+"""
+Selfish-Altruist Trajectories
+
+Records the full lattice of every tick of a run into memory-mapped NumPy
+files, so past states can be inspected without keeping them in memory or
+running the model again. A recording is a directory with
+
+    header.json   model class, parameters, seed, shapes and number of ticks
+    codes.npy     (max_steps, height, width) uint8 strategy codes
+    counts.npy    (max_steps, 3) number of void, altruist and selfish cells
+    fitness.npy   optional (max_steps, height, width) float16 or float32
+
+The .npy files are preallocated for max_steps ticks and filled in order, one
+array assignment per tick. Open a recording with Trajectory, which maps the
+files read-only and slices them lazily.
+
+For long runs a DiffLogRecorder only stores the cells that changed each tick,
+plus a full keyframe every keyframe_interval ticks, so that the size grows
+with the activity on the lattice instead of with its area:
+
+    header.json      as above, with "format": "diff_log"
+    keyframes.bin    uint8 lattice of every keyframe_interval-th tick
+    delta_cells.bin  uint32 flat index (y * width + x) of every changed cell
+    delta_codes.bin  uint8 new strategy code of every changed cell
+    delta_ends.bin   int64 per tick, end of its changes in the two files above
+    counts.bin       int64 per tick, number of void, altruist and selfish cells
+
+DiffLog rebuilds a tick from the keyframe before it and the changes since.
+open_recording opens either format.
+"""
+
+import datetime
+import json
+import os
+
+import numpy as np
+
+from selfish_altruist.lattice import ALTRUIST, SELFISH, STRATEGY_NAMES, VOID
+
+HEADER_FILE = "header.json"
+CODES_FILE = "codes.npy"
+COUNTS_FILE = "counts.npy"
+FITNESS_FILE = "fitness.npy"
+
+KEYFRAMES_FILE = "keyframes.bin"
+DELTA_CELLS_FILE = "delta_cells.bin"
+DELTA_CODES_FILE = "delta_codes.bin"
+DELTA_ENDS_FILE = "delta_ends.bin"
+DIFF_COUNTS_FILE = "counts.bin"
+
+FRAMES = "frames"
+DIFF_LOG = "diff_log"
+
+FORMAT_VERSION = 1
+
+# model attributes stored in the header, when the model has them
+PARAMETER_NAMES = (
+    "n_grid_cells_width",
+    "n_grid_cells_height",
+    "altruistic_probability",
+    "selfish_probability",
+    "cost_of_altruism",
+    "benefit_of_altruism",
+    "disease",
+    "harshness",
+    "moore",
+    "radius",
+    "stencil",
+)
+
+_CODE_OF_NAME = {name: code for code, name in enumerate(STRATEGY_NAMES)}
+
+
+def lattice_state(model):
+    """
+    Strategy codes and fitness of a model as (height, width) arrays, indexed
+    [y, x]. Array based models are returned as they are; for SelfishAltruist
+    the grid is read cell by cell.
+    """
+    if hasattr(model, "codes"):
+        return model.codes, model.fitness
+    shape = (model.n_grid_cells_height, model.n_grid_cells_width)
+    codes = np.empty(shape, dtype=np.uint8)
+    fitness = np.empty(shape, dtype=np.float64)
+    for agent, x, y in model.grid.coord_iter():
+        codes[y, x] = _CODE_OF_NAME[agent.name]
+        fitness[y, x] = agent.fitness
+    return codes, fitness
+
+
+def _header(model, shape, **fields):
+    return {
+        "version": FORMAT_VERSION,
+        "model": type(model).__name__,
+        "parameters": {
+            name: getattr(model, name) for name in PARAMETER_NAMES if hasattr(model, name)
+        },
+        "seed": getattr(model, "_seed", None),
+        "shape": list(shape),
+        "n_steps": 0,
+        "first_step": model.schedule.steps,
+        **fields,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _read_header(path, recording_format):
+    with open(os.path.join(path, HEADER_FILE)) as f:
+        header = json.load(f)
+    if header["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported trajectory format version {header['version']}.")
+    if header.get("format", FRAMES) != recording_format:
+        raise ValueError(f"{path} is not a {recording_format} recording.")
+    return header
+
+
+def _counts_dataframe(counts, shape, first_step):
+    import pandas as pd
+
+    counts = np.asarray(counts)
+    n_cells = shape[0] * shape[1]
+    return pd.DataFrame(
+        {
+            "Selfish": counts[:, SELFISH],
+            "Altruist": counts[:, ALTRUIST],
+            "Void": counts[:, VOID],
+            "Population": counts[:, ALTRUIST] + counts[:, SELFISH],
+            "%Altruist": counts[:, ALTRUIST] / n_cells,
+        },
+        index=pd.RangeIndex(first_step, first_step + len(counts), name="Step"),
+    )
+
+
+class TrajectoryRecorder:
+    """
+    Writes the lattice of a model to a recording directory, one tick per call
+    of record(). Record the initial state before the first step:
+
+        with TrajectoryRecorder("run", model, max_steps=1001) as recorder:
+            recorder.record(model)
+            for _ in range(1000):
+                model.step()
+                recorder.record(model)
+    """
+
+    def __init__(self, path, model, max_steps, fitness_dtype=None, overwrite=False):
+        """
+        Args:
+            path: Directory to create the recording in.
+            model: The model to record; its parameters go into the header.
+            max_steps: Number of ticks to preallocate room for.
+            fitness_dtype: np.float16 or np.float32 to record the fitness as
+                well, None to record the strategies only.
+            overwrite: Replace an existing recording at path.
+        """
+        if fitness_dtype is not None and np.dtype(fitness_dtype) not in (
+            np.dtype(np.float16),
+            np.dtype(np.float32),
+        ):
+            raise ValueError("fitness_dtype must be float16 or float32.")
+        if os.path.exists(os.path.join(path, HEADER_FILE)) and not overwrite:
+            raise FileExistsError(f"{path} already holds a recording.")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_steps = max_steps
+        self.n_steps = 0
+
+        codes, _ = lattice_state(model)
+        shape = (max_steps,) + codes.shape
+        self.codes = np.lib.format.open_memmap(
+            os.path.join(path, CODES_FILE), mode="w+", dtype=np.uint8, shape=shape
+        )
+        self.counts = np.lib.format.open_memmap(
+            os.path.join(path, COUNTS_FILE), mode="w+", dtype=np.int64, shape=(max_steps, 3)
+        )
+        self.fitness = None
+        if fitness_dtype is not None:
+            self.fitness = np.lib.format.open_memmap(
+                os.path.join(path, FITNESS_FILE), mode="w+", dtype=fitness_dtype, shape=shape
+            )
+        else:
+            # do not leave the fitness of an overwritten recording behind
+            try:
+                os.remove(os.path.join(path, FITNESS_FILE))
+            except FileNotFoundError:
+                pass
+
+        self.header = _header(
+            model,
+            codes.shape,
+            format=FRAMES,
+            max_steps=max_steps,
+            fitness_dtype=None if fitness_dtype is None else np.dtype(fitness_dtype).name,
+        )
+        self.write_header()
+
+    def write_header(self):
+        self.header["n_steps"] = self.n_steps
+        with open(os.path.join(self.path, HEADER_FILE), "w") as f:
+            json.dump(self.header, f, indent=2)
+
+    def record(self, model):
+        """Append the current lattice of the model."""
+        if self.codes is None:
+            raise ValueError("The recorder has been closed.")
+        if self.n_steps >= self.max_steps:
+            raise ValueError(f"The recording is full after {self.max_steps} ticks.")
+        codes, fitness = lattice_state(model)
+        self.codes[self.n_steps] = codes
+        self.counts[self.n_steps] = np.bincount(codes.ravel(), minlength=3)[:3]
+        if self.fitness is not None:
+            self.fitness[self.n_steps] = fitness
+        self.n_steps += 1
+
+    def flush(self):
+        """Write the recorded ticks to disk, so readers can see them."""
+        for array in (self.codes, self.counts, self.fitness):
+            if array is not None:
+                array.flush()
+        self.write_header()
+
+    def close(self):
+        if self.codes is None:
+            return
+        self.flush()
+        self.codes = self.counts = self.fitness = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Trajectory:
+    """
+    A recording opened read-only. Indexing and slicing return views on the
+    memory-mapped files, so only the ticks that are used are read from disk:
+
+        trajectory = Trajectory("run")
+        trajectory.codes[-1]            # lattice of the last tick
+        trajectory.codes[:, 10, 20]     # history of a single cell
+        trajectory.counts_dataframe()   # number of cells per strategy
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = _read_header(path, FRAMES)
+        self.n_steps = self.header["n_steps"]
+        self.parameters = self.header["parameters"]
+        self.seed = self.header["seed"]
+        self.first_step = self.header["first_step"]
+        # the files are preallocated, only the recorded ticks are exposed
+        self.codes = np.load(os.path.join(path, CODES_FILE), mmap_mode="r")[: self.n_steps]
+        self.counts = np.load(os.path.join(path, COUNTS_FILE), mmap_mode="r")[: self.n_steps]
+        self.fitness = None
+        if self.header["fitness_dtype"] is not None:
+            self.fitness = np.load(os.path.join(path, FITNESS_FILE), mmap_mode="r")[: self.n_steps]
+
+    @property
+    def shape(self):
+        return tuple(self.header["shape"])
+
+    def __len__(self):
+        return self.n_steps
+
+    def __getitem__(self, index):
+        return self.codes[index]
+
+    def counts_dataframe(self):
+        """
+        The numbers of cells per strategy as a DataFrame indexed by step, with
+        the columns of the model reporters.
+        """
+        return _counts_dataframe(self.counts, self.shape, self.first_step)
+
+
+class DiffLogRecorder:
+    """
+    Writes the cells that changed in every tick of a model to a diff log
+    directory, plus a keyframe of the full lattice every keyframe_interval
+    ticks. Used like TrajectoryRecorder, but the files are appended to, so
+    there is no maximum number of ticks.
+    """
+
+    def __init__(self, path, model, keyframe_interval=1000, overwrite=False):
+        """
+        Args:
+            path: Directory to create the diff log in.
+            model: The model to record; its parameters go into the header.
+            keyframe_interval: Ticks between full lattices. Rebuilding a tick
+                applies up to this many ticks of changes.
+            overwrite: Replace an existing recording at path.
+        """
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1.")
+        if os.path.exists(os.path.join(path, HEADER_FILE)) and not overwrite:
+            raise FileExistsError(f"{path} already holds a recording.")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.n_steps = 0
+        self.n_changes = 0
+        self.previous = None
+
+        codes, _ = lattice_state(model)
+        self.files = {
+            name: open(os.path.join(path, name), "wb")
+            for name in (KEYFRAMES_FILE, DELTA_CELLS_FILE, DELTA_CODES_FILE, DELTA_ENDS_FILE, DIFF_COUNTS_FILE)
+        }
+        self.header = _header(model, codes.shape, format=DIFF_LOG, keyframe_interval=keyframe_interval)
+        self.write_header()
+
+    def write_header(self):
+        self.header["n_steps"] = self.n_steps
+        with open(os.path.join(self.path, HEADER_FILE), "w") as f:
+            json.dump(self.header, f, indent=2)
+
+    def record(self, model):
+        """Append the changes of the lattice of the model since the last call."""
+        if self.files is None:
+            raise ValueError("The recorder has been closed.")
+        codes = np.ascontiguousarray(lattice_state(model)[0], dtype=np.uint8).ravel()
+        if self.n_steps % self.keyframe_interval == 0:
+            codes.tofile(self.files[KEYFRAMES_FILE])
+        if self.previous is None:
+            changed = np.empty(0, dtype=np.uint32)
+        else:
+            changed = np.flatnonzero(codes != self.previous).astype(np.uint32)
+        changed.tofile(self.files[DELTA_CELLS_FILE])
+        codes[changed].tofile(self.files[DELTA_CODES_FILE])
+        self.n_changes += len(changed)
+        np.array([self.n_changes], dtype=np.int64).tofile(self.files[DELTA_ENDS_FILE])
+        np.bincount(codes, minlength=3)[:3].astype(np.int64).tofile(self.files[DIFF_COUNTS_FILE])
+        self.previous = codes.copy()
+        self.n_steps += 1
+
+    def flush(self):
+        """Write the recorded ticks to disk, so readers can see them."""
+        for f in self.files.values():
+            f.flush()
+        self.write_header()
+
+    def close(self):
+        if self.files is None:
+            return
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        self.files = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _map_file(path, dtype, shape=None):
+    """Read-only memory map of a raw file; an empty array for an empty file,
+    which cannot be mapped."""
+    if os.path.getsize(path) == 0:
+        return np.empty(shape if shape is not None else 0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+class _Frames:
+    """Sequence of the lattices of a DiffLog, rebuilt on indexing."""
+
+    def __init__(self, diff_log):
+        self.diff_log = diff_log
+
+    def __len__(self):
+        return len(self.diff_log)
+
+    def __getitem__(self, step):
+        return self.diff_log.frame(step)
+
+
+class DiffLog:
+    """
+    A diff log opened read-only. frame(step) (or codes[step]) rebuilds the
+    lattice of a tick; iter_frames() walks through consecutive ticks applying
+    one tick of changes at a time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = _read_header(path, DIFF_LOG)
+        self.n_steps = self.header["n_steps"]
+        self.parameters = self.header["parameters"]
+        self.seed = self.header["seed"]
+        self.first_step = self.header["first_step"]
+        self.keyframe_interval = self.header["keyframe_interval"]
+
+        n_keyframes = -(-self.n_steps // self.keyframe_interval)
+        self.keyframes = _map_file(
+            os.path.join(path, KEYFRAMES_FILE), np.uint8, (n_keyframes,) + self.shape
+        )[:n_keyframes]
+        self.delta_ends = _map_file(os.path.join(path, DELTA_ENDS_FILE), np.int64)[: self.n_steps]
+        n_changes = int(self.delta_ends[-1]) if self.n_steps else 0
+        self.delta_cells = _map_file(os.path.join(path, DELTA_CELLS_FILE), np.uint32)[:n_changes]
+        self.delta_codes = _map_file(os.path.join(path, DELTA_CODES_FILE), np.uint8)[:n_changes]
+        self.counts = _map_file(os.path.join(path, DIFF_COUNTS_FILE), np.int64).reshape(-1, 3)[: self.n_steps]
+        self.codes = _Frames(self)
+        self.fitness = None
+
+    @property
+    def shape(self):
+        return tuple(self.header["shape"])
+
+    def __len__(self):
+        return self.n_steps
+
+    def __getitem__(self, step):
+        return self.frame(step)
+
+    def changes(self, step):
+        """Flat indices and new codes of the cells that changed in a tick."""
+        start = int(self.delta_ends[step - 1]) if step > 0 else 0
+        stop = int(self.delta_ends[step])
+        return self.delta_cells[start:stop], self.delta_codes[start:stop]
+
+    def frame(self, step):
+        """The lattice of a tick, as a new (height, width) array."""
+        if step < 0:
+            step += self.n_steps
+        if not 0 <= step < self.n_steps:
+            raise IndexError(f"step {step} is not in the recording of {self.n_steps} ticks")
+        keyframe = step // self.keyframe_interval
+        codes = np.array(self.keyframes[keyframe]).ravel()
+        first = keyframe * self.keyframe_interval
+        if step > first:
+            start = int(self.delta_ends[first])
+            stop = int(self.delta_ends[step])
+            # a cell can change more than once, its last change wins
+            cells = self.delta_cells[start:stop][::-1]
+            new_codes = self.delta_codes[start:stop][::-1]
+            cells, last = np.unique(cells, return_index=True)
+            codes[cells] = new_codes[last]
+        return codes.reshape(self.shape)
+
+    def iter_frames(self, start=0, stop=None):
+        """Yield the lattices of ticks start up to stop; the array yielded is
+        updated in place."""
+        stop = self.n_steps if stop is None else min(stop, self.n_steps)
+        if start >= stop:
+            return
+        codes = self.frame(start)
+        flat = codes.reshape(-1)
+        yield codes
+        for step in range(start + 1, stop):
+            cells, new_codes = self.changes(step)
+            flat[cells] = new_codes
+            yield codes
+
+    def counts_dataframe(self):
+        """
+        The numbers of cells per strategy as a DataFrame indexed by step, with
+        the columns of the model reporters.
+        """
+        return _counts_dataframe(self.counts, self.shape, self.first_step)
+
+
+def open_recording(path):
+    """Open a recording made with TrajectoryRecorder or DiffLogRecorder."""
+    with open(os.path.join(path, HEADER_FILE)) as f:
+        recording_format = json.load(f).get("format", FRAMES)
+    if recording_format == DIFF_LOG:
+        return DiffLog(path)
+    return Trajectory(path)
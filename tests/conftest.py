@@ -0,0 +1,9 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the vendored mesa and the model package, which lives one directory down
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "selfish_altruist")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,313 @@
+import multiprocessing.pool
+import random
+from operator import itemgetter
+
+import numpy as np
+import pytest
+
+import mesa
+from mesa.batchrunner import (
+    LatinHypercubeSampler,
+    P2Quantile,
+    SaltelliDesign,
+    SobolSampler,
+    batch_run,
+    find_transition,
+    sequential_batch_run,
+)
+from selfish_altruist.model import SelfishAltruist
+
+
+class MockModel(mesa.Model):
+    """Draws one number per step from its seed; reports the last one."""
+
+    def __init__(self, variable=0, seed=None):
+        super().__init__()
+        self.rng = random.Random(seed)
+        self.variable = variable
+        self.value = 0.0
+        self.schedule = mesa.time.BaseScheduler(self)
+        self.datacollector = mesa.DataCollector(
+            model_reporters={"Value": lambda m: m.value + m.variable}
+        )
+        self.datacollector.collect(self)
+
+    def step(self):
+        self.value = self.rng.random()
+        self.schedule.step()
+        self.datacollector.collect(self)
+
+
+def test_common_random_numbers_share_draws_across_parameters():
+    rows = batch_run(
+        MockModel,
+        {"variable": [0, 10]},
+        iterations=3,
+        max_steps=2,
+        display_progress=False,
+        common_random_numbers=True,
+    )
+    by_run = {(row["iteration"], row["variable"]): row["Value"] for row in rows}
+    for iteration in range(3):
+        assert by_run[iteration, 10] - by_run[iteration, 0] == 10
+    assert len({by_run[iteration, 0] for iteration in range(3)}) == 3
+
+
+def test_common_random_numbers_aggregate_over_iterations():
+    summary = batch_run(
+        MockModel,
+        {"variable": [0, 10]},
+        iterations=3,
+        max_steps=2,
+        display_progress=False,
+        common_random_numbers=True,
+        aggregate={"Value": ["mean"]},
+    )
+    assert sorted(row["variable"] for row in summary) == [0, 10]
+    assert all(row["runs"] == 3 for row in summary)
+    assert all("seed" not in row for row in summary)
+
+
+def test_aggregate_counts_runs_not_collected_steps():
+    summary = batch_run(
+        MockModel,
+        {"variable": [0, 10]},
+        iterations=3,
+        max_steps=4,
+        data_collection_period=1,
+        display_progress=False,
+        aggregate={"Value": ["count"]},
+    )
+    assert all(row["runs"] == 3 for row in summary)
+    assert all(row["Value_count"] == 3 * 5 for row in summary)
+
+
+def test_aggregate_in_processes_equals_one_process():
+    kwargs = dict(
+        iterations=2,
+        max_steps=3,
+        display_progress=False,
+        common_random_numbers=True,
+        aggregate={"Value": ["mean", "max"]},
+    )
+    sequential = batch_run(MockModel, {"variable": [0, 10]}, number_processes=1, **kwargs)
+    parallel = batch_run(MockModel, {"variable": [0, 10]}, number_processes=2, **kwargs)
+    by_variable = itemgetter("variable")
+    assert sorted(parallel, key=by_variable) == sorted(sequential, key=by_variable)
+
+
+@pytest.mark.parametrize("p", [0.1, 0.5, 0.9])
+def test_p2_quantile_is_close_to_the_exact_quantile(p):
+    values = np.random.default_rng(0).normal(size=20000)
+    estimate = P2Quantile(p)
+    for value in values:
+        estimate.push(value)
+    assert estimate.value == pytest.approx(np.quantile(values, p), abs=0.02)
+
+
+def test_p2_quantile_of_few_values_is_exact():
+    values = [3.0, 1.0, 4.0, 1.5]
+    estimate = P2Quantile(0.3)
+    for value in values:
+        estimate.push(value)
+    assert estimate.value == pytest.approx(np.quantile(values, 0.3))
+
+
+@pytest.mark.parametrize("sampler_cls", [LatinHypercubeSampler, SobolSampler])
+def test_design_samplers_fill_every_stratum(sampler_cls):
+    sampler = sampler_cls({"a": (0, 1), "b": (10, 20)}, 64, random_state=1)
+    points = sampler.points
+    assert points.shape == (64, 2)
+    assert np.array_equal(np.sort((points[:, 0] * 64).astype(int)), np.arange(64))
+    assert np.array_equal(np.sort(((points[:, 1] - 10) / 10 * 64).astype(int)), np.arange(64))
+    # iterating again gives the same points
+    assert list(sampler) == list(sampler)
+
+
+def test_saltelli_indices_of_an_additive_function():
+    # y = a + 2 b on the unit square: the variance is 1/12 + 4/12, so a
+    # explains a fifth and b four fifths, without interactions
+    design = SaltelliDesign({"a": (0, 1), "b": (0, 1)}, 1024, random_state=0)
+    rows = [{**kwargs, "y": kwargs["a"] + 2 * kwargs["b"]} for kwargs in design]
+    assert len(rows) == len(design) == 1024 * 4
+    indices = design.analyze(rows, "y", random_state=0)
+    for name, expected in (("a", 0.2), ("b", 0.8)):
+        assert indices[name]["S1"] == pytest.approx(expected, abs=0.05)
+        assert indices[name]["ST"] == pytest.approx(expected, abs=0.05)
+        assert 0 < indices[name]["S1_conf"] < 0.2
+
+
+def test_saltelli_analyze_needs_every_point():
+    design = SaltelliDesign({"a": (0, 1), "b": (0, 1)}, 8, random_state=0)
+    rows = [{**kwargs, "y": 0.0} for kwargs in design][1:]
+    with pytest.raises(ValueError):
+        design.analyze(rows, "y")
+
+
+def test_pooled_runs_equal_fresh_runs():
+    parameters = {
+        "n_grid_cells_width": 10,
+        "n_grid_cells_height": 8,
+        "disease": [0.15, 0.25],
+        "incremental": True,
+    }
+    kwargs = dict(
+        iterations=3,
+        max_steps=5,
+        data_collection_period=1,
+        display_progress=False,
+        common_random_numbers=True,
+    )
+    pooled = batch_run(SelfishAltruist, parameters, reuse_models=True, **kwargs)
+    fresh = batch_run(SelfishAltruist, parameters, reuse_models=False, **kwargs)
+    assert pooled == fresh
+
+
+class LeakyResetModel(MockModel):
+    """Reusable, but its reset forgets to clear the step counter."""
+
+    structural_parameters = ()
+    n_steps = 0
+
+    def reset(self, variable=0, seed=None):
+        super().reset(seed=seed)
+        self.rng = random.Random(seed)
+        self.variable = variable
+        self.schedule.reset()
+        self.datacollector.clear()
+        self.datacollector.collect(self)
+
+    def step(self):
+        self.n_steps += 1
+        self.value = self.n_steps
+        self.schedule.step()
+        self.datacollector.collect(self)
+
+
+def test_models_are_not_reused_by_default():
+    kwargs = dict(iterations=3, max_steps=2, display_progress=False)
+    rows = batch_run(LeakyResetModel, {"variable": 0}, **kwargs)
+    assert len({row["Value"] for row in rows}) == 1
+    # the leaky reset shows once the model is reused
+    reused = batch_run(LeakyResetModel, {"variable": 0}, reuse_models=True, **kwargs)
+    assert len({row["Value"] for row in reused}) == 3
+
+
+class SpreadModel(MockModel):
+    """Reports a uniform number in [0, spread)."""
+
+    def __init__(self, spread=1.0, seed=None):
+        self.spread = spread
+        super().__init__(seed=seed)
+
+    def step(self):
+        self.value = self.spread * self.rng.random()
+        self.schedule.step()
+        self.datacollector.collect(self)
+
+
+def test_sequential_batch_run_spends_waves_on_uncertain_points():
+    rows = sequential_batch_run(
+        SpreadModel,
+        {"spread": [0.0, 1.0]},
+        "Value",
+        ci_width=0.1,
+        wave_size=4,
+        max_iterations=40,
+        max_steps=1,
+        display_progress=False,
+    )
+    iterations = {0.0: [], 1.0: []}
+    for row in rows:
+        iterations[row["spread"]].append(row["iteration"])
+    # a constant reporter is settled by the first wave
+    assert sorted(iterations[0.0]) == [0, 1, 2, 3]
+    # the noisy one would need about (2 * 1.96 * 0.29 / 0.1) ** 2 = 130 runs
+    assert sorted(iterations[1.0]) == list(range(40))
+    assert len({row["RunId"] for row in rows}) == len(rows)
+
+
+def test_sequential_batch_run_stops_at_max_iterations():
+    rows = sequential_batch_run(
+        SpreadModel,
+        {"spread": 1.0},
+        "Value",
+        ci_width=0.0,
+        wave_size=3,
+        max_iterations=7,
+        max_steps=1,
+        display_progress=False,
+    )
+    assert sorted(row["iteration"] for row in rows) == list(range(7))
+
+
+def test_sequential_batch_run_needs_two_runs_per_wave():
+    with pytest.raises(ValueError):
+        sequential_batch_run(
+            SpreadModel, {"spread": 1.0}, "Value", ci_width=0.1, wave_size=1
+        )
+
+
+def above_threshold(row):
+    return row["variable"] > 0.3
+
+
+def test_find_transition_brackets_a_sharp_threshold(capsys):
+    result = find_transition(
+        MockModel,
+        {},
+        "variable",
+        (0.0, 1.0),
+        above_threshold,
+        replicates=5,
+        tolerance=0.01,
+        max_steps=1,
+        display_progress=False,
+    )
+    low, high = result["bracket"]
+    assert low <= 0.3 < high and high - low <= 0.01
+    assert low <= result["transition"] <= high
+    # a sharp threshold is decided by the first wave at every probed value
+    assert all(e["replicates"] == 5 for e in result["evaluations"])
+    assert result["runs"] == 5 * len(result["evaluations"])
+    assert capsys.readouterr().out == ""
+
+
+def test_find_transition_rejects_bounds_on_one_side():
+    with pytest.raises(ValueError):
+        find_transition(
+            MockModel,
+            {},
+            "variable",
+            (0.5, 1.0),
+            above_threshold,
+            replicates=5,
+            max_steps=1,
+            display_progress=False,
+        )
+
+
+def test_find_transition_starts_one_process_pool(monkeypatch):
+    pools = []
+
+    class CountingPool(multiprocessing.pool.Pool):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(mesa.batchrunner, "Pool", CountingPool)
+    result = find_transition(
+        MockModel,
+        {},
+        "variable",
+        (0.0, 1.0),
+        above_threshold,
+        replicates=4,
+        tolerance=0.05,
+        number_processes=2,
+        max_steps=1,
+        display_progress=False,
+    )
+    assert result["bracket"][0] <= 0.3 < result["bracket"][1]
+    assert len(result["evaluations"]) > 2
+    assert len(pools) == 1
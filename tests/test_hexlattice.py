@@ -0,0 +1,92 @@
+import mesa
+import numpy as np
+import pytest
+
+from selfish_altruist.hexlattice import (
+    N_HEX_NEIGHBORHOOD_CELLS,
+    SelfishAltruistHex,
+    hex_neighbor_table,
+)
+from selfish_altruist.lattice import ALTRUIST, SELFISH, STRATEGY_NAMES, VOID
+
+HEX = dict(n_grid_cells_width=8, n_grid_cells_height=6, disease=0.1, harshness=0.2, seed=4)
+
+
+def grid_neighbors(width, height):
+    """The flat neighbors of every cell, from HexGrid."""
+    grid = mesa.space.HexGrid(width, height, torus=True)
+    return [
+        {y * width + x for x, y in grid.get_neighborhood(divmod(index, width)[::-1])}
+        for index in range(width * height)
+    ]
+
+
+@pytest.mark.parametrize("width, height", [(6, 4), (8, 7)])
+def test_neighbor_table_equals_hex_grid(width, height):
+    table = hex_neighbor_table(width, height)
+    assert table.shape == (width * height, N_HEX_NEIGHBORHOOD_CELLS)
+    assert table[:, 0].tolist() == list(range(width * height))
+    for index, neighbors in enumerate(grid_neighbors(width, height)):
+        assert set(table[index, 1:].tolist()) == neighbors
+        assert len(set(table[index].tolist())) == N_HEX_NEIGHBORHOOD_CELLS
+
+
+def test_lottery_equals_brute_force():
+    model = SelfishAltruistHex(**HEX)
+    model.step()
+    codes = model.codes.reshape(-1)
+    neighborhoods = [
+        [index, *neighbors]
+        for index, neighbors in enumerate(grid_neighbors(model.n_grid_cells_width, model.n_grid_cells_height))
+    ]
+
+    def fitness(index):
+        n_altruists = sum(codes[cell] == ALTRUIST for cell in neighborhoods[index])
+        share = n_altruists / N_HEX_NEIGHBORHOOD_CELLS
+        if codes[index] == ALTRUIST:
+            return 1 - model.cost_of_altruism + model.benefit_of_altruism * share
+        if codes[index] == SELFISH:
+            return 1 + model.benefit_of_altruism * share
+        return model.harshness
+
+    details = model.cell_details()
+    for index, neighborhood in enumerate(neighborhoods):
+        assert details["name"][index] == STRATEGY_NAMES[codes[index]]
+        assert details["fitness"][index] == pytest.approx(fitness(index))
+        sums = {
+            code: sum(fitness(cell) for cell in neighborhood if codes[cell] == code)
+            for code in (VOID, ALTRUIST, SELFISH)
+        }
+        total = sum(sums.values()) + model.disease
+        assert details["sum_total_fitness_in_neighborhood"][index] == pytest.approx(total)
+        assert details["weight_fitness_altruists_in_neighborhood"][index] == pytest.approx(sums[ALTRUIST] / total)
+        assert details["weight_fitness_selfish_in_neighborhood"][index] == pytest.approx(sums[SELFISH] / total)
+
+
+def test_runs_repeat_for_a_seed():
+    def run():
+        model = SelfishAltruistHex(**HEX)
+        for _ in range(5):
+            model.step()
+        return model
+
+    model = run()
+    assert np.array_equal(model.codes, run().codes)
+    assert model.n_altruist == np.count_nonzero(model.codes == ALTRUIST)
+    assert model.n_selfish == np.count_nonzero(model.codes == SELFISH)
+
+
+def test_grid_views_show_the_lattice():
+    model = SelfishAltruistHex(**HEX)
+    model.step()
+    for cell, x, y in model.grid.coord_iter():
+        assert cell.name == STRATEGY_NAMES[model.codes[y, x]]
+        assert cell.fitness == model.cell_details()["fitness"][cell.index]
+
+
+@pytest.mark.parametrize(
+    "kwargs", [dict(n_grid_cells_width=7), dict(moore=True), dict(radius=2)]
+)
+def test_rejects_other_lattices(kwargs):
+    with pytest.raises(ValueError):
+        SelfishAltruistHex(**{**HEX, **kwargs})
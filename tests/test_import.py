@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import REPO_ROOT
+
+
+def run_python(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def test_import_mesa_does_not_load_heavy_dependencies():
+    loaded = run_python(
+        "import sys, mesa\n"
+        "print(*[name for name in ('pandas', 'tornado', 'tqdm') if name in sys.modules])"
+    )
+    assert loaded == []
+
+
+def test_lazy_attributes_load_on_access():
+    output = run_python(
+        "import sys, mesa\n"
+        "mesa.DataCollector, mesa.batch_run\n"
+        "print('pandas' in sys.modules, mesa.batch_run.__module__)"
+    )
+    assert output == ["True", "mesa.batchrunner"]
+
+
+@pytest.mark.parametrize(
+    "first_import",
+    ["import mesa", "import mesa.visualization.ModularVisualization", "import mesa.visualization"],
+)
+def test_flat_visualization_names_after_any_first_import(first_import):
+    output = run_python(
+        f"{first_import}\n"
+        "import mesa\n"
+        "from mesa.visualization import ModularServer\n"
+        "print(mesa.visualization.CanvasGrid.__name__, mesa.visualization.ChartModule.__name__)"
+    )
+    assert output == ["CanvasGrid", "ChartModule"]
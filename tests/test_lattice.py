@@ -0,0 +1,178 @@
+import threading
+
+import numpy as np
+import pytest
+
+from selfish_altruist import lattice
+from selfish_altruist.lattice import SelfishAltruistLattice
+
+LATTICE = dict(n_grid_cells_height=64, n_grid_cells_width=32, seed=3)
+
+
+def run_codes(steps=5, **kwargs):
+    model = SelfishAltruistLattice(**{**LATTICE, **kwargs})
+    for _ in range(steps):
+        model.step()
+    return model.codes.copy()
+
+
+@pytest.mark.parametrize("n_threads", [1, 2, 4])
+def test_threads_do_not_change_the_result(n_threads):
+    expected = run_codes(n_bands=4)
+    assert np.array_equal(run_codes(n_bands=4, n_threads=n_threads), expected)
+
+
+def test_models_share_the_thread_pool():
+    run_codes(n_bands=4, n_threads=3)
+    n_threads = threading.active_count()
+    for _ in range(10):
+        run_codes(n_bands=4, n_threads=3)
+    assert threading.active_count() == n_threads
+
+
+def test_models_run_after_the_thread_pools_shut_down():
+    expected = run_codes(n_bands=4)
+    run_codes(n_bands=4, n_threads=2)
+    lattice.shutdown_executors()
+    assert np.array_equal(run_codes(n_bands=4, n_threads=2), expected)
+
+
+def test_decomposed_equals_lattice():
+    from selfish_altruist.decomposition import SelfishAltruistDecomposed
+
+    lattice_model = SelfishAltruistLattice(**LATTICE, n_bands=4)
+    with SelfishAltruistDecomposed(**LATTICE, n_bands=4, n_workers=2) as decomposed:
+        np.testing.assert_array_equal(decomposed.codes, lattice_model.codes)
+        for _ in range(5):
+            lattice_model.step()
+            decomposed.step()
+            np.testing.assert_array_equal(decomposed.codes, lattice_model.codes)
+            assert decomposed.n_altruist == lattice_model.n_altruist
+            assert decomposed.n_selfish == lattice_model.n_selfish
+
+
+@pytest.mark.parametrize("n_threads", [1, 2])
+def test_snapshot_restore_continues_the_run(n_threads):
+    model = SelfishAltruistLattice(**LATTICE, n_bands=4)
+    for _ in range(3):
+        model.step()
+    restored = SelfishAltruistLattice.restore(model.snapshot(), n_threads=n_threads)
+    np.testing.assert_array_equal(restored.codes, model.codes)
+    np.testing.assert_array_equal(restored.fitness, model.fitness)
+    assert restored.schedule.steps == model.schedule.steps
+    for _ in range(5):
+        model.step()
+        restored.step()
+        np.testing.assert_array_equal(restored.codes, model.codes)
+
+
+def brute_force_sum(stencil, values):
+    stencil = np.asarray(stencil, dtype=np.float64)
+    radius_y, radius_x = stencil.shape[0] // 2, stencil.shape[1] // 2
+    height, width = values.shape
+    out = np.zeros(values.shape)
+    for y in range(height):
+        for x in range(width):
+            for dy in range(-radius_y, radius_y + 1):
+                for dx in range(-radius_x, radius_x + 1):
+                    out[y, x] += stencil[dy + radius_y, dx + radius_x] * values[(y + dy) % height, (x + dx) % width]
+    return out
+
+
+NEIGHBORHOODS = [
+    dict(moore=True),
+    dict(moore=True, radius=2),
+    dict(radius=2),
+    dict(radius=3),
+    dict(stencil=[[0, 2, 0], [1, 1, 1], [0, 2, 0]]),
+    dict(stencil=[[0.5, 1, 0.5], [1, 1, 1], [0.5, 1, 0.5]]),
+    dict(stencil=[[1, 1, 1, 1, 1], [0, 0, 1, 0, 0], [0, 0, 1, 0, 0]]),
+]
+
+
+@pytest.mark.parametrize("parameters", NEIGHBORHOODS)
+def test_neighborhood_sum_equals_brute_force(parameters):
+    neighborhood = lattice.Neighborhood.of(**parameters)
+    rng = np.random.default_rng(0)
+    counts = rng.random((11, 9)) < 0.3
+    values = rng.random((11, 9))
+    expected = brute_force_sum(neighborhood.stencil, counts)
+    summed = neighborhood.sum(counts)
+    np.testing.assert_allclose(summed, expected, atol=1e-9)
+    if neighborhood.integral:
+        assert summed.dtype.kind == "i"
+        np.testing.assert_array_equal(summed, expected)
+    np.testing.assert_allclose(neighborhood.sum(values), brute_force_sum(neighborhood.stencil, values), atol=1e-9)
+
+
+@pytest.mark.parametrize("parameters", NEIGHBORHOODS)
+def test_no_lottery_weight_without_a_strategy_in_range(parameters):
+    neighborhood = lattice.Neighborhood.of(**parameters)
+    rng = np.random.default_rng(1)
+    codes = np.where(rng.random((60, 60)) < 0.02, lattice.ALTRUIST, lattice.VOID).astype(np.uint8)
+    fitness = np.where(codes == lattice.ALTRUIST, 0.87, 0.0)
+    weight_altruists, weight_selfish = neighborhood.lottery_weights(codes, fitness, 0.0)
+    in_range = brute_force_sum(neighborhood.stencil > 0, codes == lattice.ALTRUIST) > 0
+    assert np.all(weight_altruists[~in_range] == 0)
+    np.testing.assert_allclose(weight_altruists[in_range], 1)
+    assert np.all(weight_selfish == 0)
+
+
+@pytest.mark.parametrize("parameters", NEIGHBORHOODS[:3])
+def test_agent_model_equals_lattice_for_other_neighborhoods(parameters):
+    from selfish_altruist.model import SelfishAltruist
+
+    from test_model import codes_of
+
+    size = dict(n_grid_cells_width=14, n_grid_cells_height=11, seed=5)
+    model = SelfishAltruist(**size, **parameters)
+    lattice_model = SelfishAltruistLattice(**size, n_bands=1, **parameters)
+    for _ in range(6):
+        model.step()
+        lattice_model.step()
+        np.testing.assert_array_equal(codes_of(model), lattice_model.codes)
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_decomposed_snapshot_restore_continues_the_run(n_workers):
+    from selfish_altruist.decomposition import SelfishAltruistDecomposed
+
+    lattice_model = SelfishAltruistLattice(**LATTICE, n_bands=4)
+    with SelfishAltruistDecomposed(**LATTICE, n_bands=4, n_workers=2) as decomposed:
+        for _ in range(3):
+            lattice_model.step()
+            decomposed.step()
+        data = decomposed.snapshot()
+        # taking a snapshot does not disturb the run
+        lattice_model.step()
+        decomposed.step()
+        np.testing.assert_array_equal(decomposed.codes, lattice_model.codes)
+    # the lottery streams are kept on close
+    with SelfishAltruistDecomposed.restore(decomposed.snapshot(), n_workers=1) as after_close:
+        after_close.step()
+    lattice_copy = SelfishAltruistLattice.restore(lattice_model.snapshot())
+    lattice_copy.step()
+    np.testing.assert_array_equal(after_close.codes, lattice_copy.codes)
+
+    with SelfishAltruistDecomposed.restore(data, n_workers=n_workers) as restored:
+        assert restored.schedule.steps == 3
+        restored.step()
+        np.testing.assert_array_equal(restored.codes, lattice_model.codes)
+        for _ in range(4):
+            lattice_model.step()
+            restored.step()
+            np.testing.assert_array_equal(restored.codes, lattice_model.codes)
+            assert restored.n_altruist == lattice_model.n_altruist
+
+
+def test_decomposed_raises_when_a_worker_dies():
+    from selfish_altruist.decomposition import SelfishAltruistDecomposed
+
+    decomposed = SelfishAltruistDecomposed(**LATTICE, n_bands=4, n_workers=2, timeout=2)
+    decomposed.step()
+    decomposed.workers[0].kill()
+    decomposed.workers[0].join()
+    with pytest.raises(RuntimeError, match="exited"):
+        decomposed.step()
+    assert decomposed.closed
+    assert not any(process.is_alive() for process in decomposed.workers)
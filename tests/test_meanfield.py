@@ -0,0 +1,78 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from selfish_altruist import meanfield
+from selfish_altruist.lattice import ALTRUIST, N_NEIGHBORHOOD_CELLS, SELFISH, VOID
+
+DYNAMICS = dict(cost_of_altruism=0.13, benefit_of_altruism=0.5, disease=0.1, harshness=0.2)
+
+
+def brute_force_mean_field_step(densities, cost_of_altruism, benefit_of_altruism, disease, harshness):
+    """Enumerates every neighborhood cell by cell instead of by composition."""
+    b, n = benefit_of_altruism, N_NEIGHBORHOOD_CELLS
+    fitness = np.empty(3)
+    fitness[VOID] = harshness
+    fitness[ALTRUIST] = 1 - cost_of_altruism + b * (1 + (n - 1) * densities[ALTRUIST]) / n
+    fitness[SELFISH] = 1 + b * (n - 1) * densities[ALTRUIST] / n
+    new = np.zeros(3)
+    for cells in itertools.product((VOID, ALTRUIST, SELFISH), repeat=n):
+        sums = np.zeros(3)
+        for cell in cells:
+            sums[cell] += fitness[cell]
+        total = sums.sum() + disease
+        weights = sums / total if total > 0 else np.zeros(3)
+        weights[VOID] = 1 - weights[ALTRUIST] - weights[SELFISH]
+        new += np.prod(densities[list(cells)]) * weights
+    return new
+
+
+def test_mean_field_step_equals_brute_force():
+    densities = np.array([0.2, 0.5, 0.3])
+    assert np.allclose(
+        meanfield.mean_field_step(densities, **DYNAMICS),
+        brute_force_mean_field_step(densities, **DYNAMICS),
+    )
+
+
+def test_pair_step_keeps_a_symmetric_distribution():
+    densities = np.array([0.2, 0.5, 0.3])
+    pairs = meanfield.pair_step(np.outer(densities, densities), **DYNAMICS)
+    assert np.allclose(pairs, pairs.T)
+    assert pairs.sum() == pytest.approx(1.0)
+    assert (pairs >= 0).all()
+
+
+@pytest.mark.parametrize("method", meanfield.METHODS)
+def test_solve_starts_at_the_initial_densities(method):
+    trajectory = meanfield.solve(
+        method, n_steps=20, altruistic_probability=0.4, selfish_probability=0.1
+    )
+    assert list(trajectory.columns) == ["Altruist", "Selfish", "Void"]
+    assert trajectory.iloc[0].tolist() == pytest.approx([0.4, 0.1, 0.5])
+    assert np.allclose(trajectory.sum(axis=1), 1.0)
+    assert len(trajectory) == 21
+
+
+@pytest.mark.parametrize("method", meanfield.METHODS)
+def test_solve_stops_in_an_absorbing_state(method):
+    trajectory = meanfield.solve(method, altruistic_probability=0.0, selfish_probability=0.0)
+    assert len(trajectory) == 2
+    assert trajectory.iloc[-1].tolist() == [0.0, 0.0, 1.0]
+
+
+def test_solve_rejects_unknown_arguments():
+    with pytest.raises(ValueError):
+        meanfield.solve("lattice")
+    with pytest.raises(TypeError):
+        meanfield.solve(n_grid_cells_width=10)
+
+
+@pytest.mark.parametrize("method", meanfield.METHODS)
+def test_fixed_points_of_the_pure_states(method):
+    points = meanfield.fixed_points(method, n_starts=3, disease=0.0, harshness=0.0)
+    # every start on the grid over the simplex converges to a pure state
+    assert points["starts"].sum() == 10
+    found = set(zip(points["Altruist"], points["Selfish"], points["Void"]))
+    assert found == {(0.0, 0.0, 1.0), (0.0, 1.0, 0.0), (1.0, 0.0, 0.0)}
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from selfish_altruist.lattice import SelfishAltruistLattice
+from selfish_altruist.model import SelfishAltruist
+
+CODES = {"void": 0, "altruist": 1, "selfish": 2}
+
+# sparse start and a harsh void, so that the frontier is a small part of the grid
+SPARSE = dict(altruistic_probability=0.05, selfish_probability=0.05, disease=0.3, harshness=0.2)
+
+
+def codes_of(model):
+    return np.array(
+        [
+            [CODES[model.grid[x][y].name] for x in range(model.n_grid_cells_width)]
+            for y in range(model.n_grid_cells_height)
+        ]
+    )
+
+
+def test_draw_uniform_for_cells_matches_full_draw():
+    model = SelfishAltruist(n_grid_cells_width=200, n_grid_cells_height=4)
+    rng = np.random.default_rng(0)
+    for trial in range(50):
+        cells = list({(int(rng.integers(200)), int(rng.integers(4))) for _ in range(trial % 30)})
+        full_rng, cells_rng = np.random.default_rng(trial), np.random.default_rng(trial)
+        full = model.draw_uniform_per_cell(full_rng)
+        assert model.draw_uniform_for_cells(cells_rng, cells) == [full[x][y] for x, y in cells]
+        # the streams stay aligned for the next tick
+        assert full_rng.random() == cells_rng.random()
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_activity_tracking_equals_lattice(incremental):
+    for seed in range(2):
+        model = SelfishAltruist(
+            n_grid_cells_width=40, n_grid_cells_height=9, seed=seed,
+            activity_tracking=True, incremental=incremental, **SPARSE
+        )
+        lattice = SelfishAltruistLattice(
+            n_grid_cells_width=40, n_grid_cells_height=9, seed=seed, n_bands=1, **SPARSE
+        )
+        for _ in range(10):
+            model.step()
+            lattice.step()
+            np.testing.assert_array_equal(codes_of(model), lattice.codes)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_incremental_equals_full_update(seed):
+    full = SelfishAltruist(n_grid_cells_width=20, n_grid_cells_height=15, seed=seed)
+    incremental = SelfishAltruist(n_grid_cells_width=20, n_grid_cells_height=15, seed=seed, incremental=True)
+    for _ in range(10):
+        full.step()
+        incremental.step()
+        np.testing.assert_array_equal(codes_of(incremental), codes_of(full))
+        assert incremental.percentage_of_altruist == full.percentage_of_altruist
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_agent_model_equals_lattice(seed):
+    model = SelfishAltruist(n_grid_cells_width=20, n_grid_cells_height=15, seed=seed)
+    lattice = SelfishAltruistLattice(n_grid_cells_width=20, n_grid_cells_height=15, seed=seed, n_bands=1)
+    np.testing.assert_array_equal(codes_of(model), lattice.codes)
+    for _ in range(10):
+        model.step()
+        lattice.step()
+        np.testing.assert_array_equal(codes_of(model), lattice.codes)
+
+
+def test_snapshot_restore_continues_the_run():
+    model = SelfishAltruist(n_grid_cells_width=20, n_grid_cells_height=15, seed=4)
+    for _ in range(3):
+        model.step()
+    restored = SelfishAltruist.restore(model.snapshot())
+    np.testing.assert_array_equal(codes_of(restored), codes_of(model))
+    assert restored.schedule.steps == model.schedule.steps
+    for _ in range(5):
+        model.step()
+        restored.step()
+        np.testing.assert_array_equal(codes_of(restored), codes_of(model))
+
+
+def test_incremental_breeds_only_the_frontier():
+    model = SelfishAltruist(n_grid_cells_width=30, n_grid_cells_height=20, seed=0, incremental=True, **SPARSE)
+    model.step()
+    assert model.frontier is not None
+    bred = []
+    draw = model.draw_uniform_for_cells
+
+    def draw_for_cells(rng, cells):
+        bred.append(len(cells))
+        return draw(rng, cells)
+
+    model.draw_uniform_for_cells = draw_for_cells
+    model.draw_uniform_per_cell = None
+    for _ in range(3):
+        model.step()
+    assert len(bred) == 3 and max(bred) < model.n_cells
+
+
+def test_step_prints_nothing(capsys):
+    model = SelfishAltruist(n_grid_cells_width=6, n_grid_cells_height=5, seed=0)
+    model.step()
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,88 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from selfish_altruist.lattice import ALTRUIST, SELFISH, SelfishAltruistLattice
+from selfish_altruist.network import NETWORKS, Adjacency, SelfishAltruistNetwork
+
+PARAMETERS = dict(disease=0.1, harshness=0.2, seed=5)
+
+
+def test_adjacency_sum_equals_the_dense_product():
+    graph = nx.gnm_random_graph(30, 60, seed=1)
+    graph = nx.relabel_nodes(graph, {node: f"node {node}" for node in graph})
+    graph.add_edge("node 3", "node 3")
+    adjacency = Adjacency(graph)
+    assert adjacency.nodes == list(graph.nodes)
+
+    dense = nx.to_numpy_array(graph, nodelist=adjacency.nodes)
+    np.fill_diagonal(dense, 0)
+    values = np.random.default_rng(0).random(len(graph))
+    assert np.allclose(adjacency.sum(values), (dense + np.eye(len(graph))) @ values)
+    for i, node in enumerate(adjacency.nodes):
+        neighbors = {adjacency.nodes[j] for j in adjacency.neighbors(i)}
+        assert neighbors == set(graph.neighbors(node)) - {node}
+
+
+def test_adjacency_rejects_directed_graphs():
+    with pytest.raises(ValueError):
+        Adjacency(nx.DiGraph([(0, 1)]))
+
+
+def test_torus_grid_equals_the_lattice():
+    # the nodes of a periodic grid graph are in row-major order, like the
+    # cells of the lattice, and have its von Neumann neighborhoods
+    network = SelfishAltruistNetwork(graph=nx.grid_2d_graph(16, 12, periodic=True), **PARAMETERS)
+    model = SelfishAltruistLattice(n_grid_cells_width=12, n_grid_cells_height=16, n_bands=1, **PARAMETERS)
+    for _ in range(5):
+        network.step()
+        model.step()
+        assert np.array_equal(network.codes.reshape(model.codes.shape), model.codes)
+        assert np.allclose(network.fitness.reshape(model.fitness.shape), model.fitness)
+    assert (network.n_altruist, network.n_selfish) == (model.n_altruist, model.n_selfish)
+
+
+def test_lottery_weights_equal_brute_force():
+    model = SelfishAltruistNetwork(network="scale_free", n_nodes=200, **PARAMETERS)
+    model.step()
+    codes, graph = model.codes, model.graph
+    n_neighboring_altruists, n_neighboring_selfish = model.neighborhood_counts(codes)
+    fitness = model.calculate_fitness(codes, n_neighboring_altruists)
+    weight_altruists, weight_selfish = model.lottery_weights(
+        codes, fitness, n_neighboring_altruists, n_neighboring_selfish
+    )
+    for node in graph:
+        neighborhood = [node, *graph.neighbors(node)]
+        n_altruists = sum(codes[cell] == ALTRUIST for cell in neighborhood)
+        assert n_neighboring_altruists[node] == n_altruists
+        assert n_neighboring_selfish[node] == sum(codes[cell] == SELFISH for cell in neighborhood)
+        share = n_altruists / len(neighborhood)
+        if codes[node] == ALTRUIST:
+            assert fitness[node] == pytest.approx(1 - model.cost_of_altruism + model.benefit_of_altruism * share)
+        elif codes[node] == SELFISH:
+            assert fitness[node] == pytest.approx(1 + model.benefit_of_altruism * share)
+        else:
+            assert fitness[node] == model.harshness
+        total = sum(fitness[cell] for cell in neighborhood) + model.disease
+        altruists = sum(fitness[cell] for cell in neighborhood if codes[cell] == ALTRUIST)
+        selfish = sum(fitness[cell] for cell in neighborhood if codes[cell] == SELFISH)
+        assert weight_altruists[node] == pytest.approx(altruists / total)
+        assert weight_selfish[node] == pytest.approx(selfish / total)
+
+
+@pytest.mark.parametrize("network", NETWORKS)
+def test_runs_repeat_for_a_seed(network):
+    def run():
+        model = SelfishAltruistNetwork(network=network, n_nodes=300, **PARAMETERS)
+        for _ in range(5):
+            model.step()
+        return model
+
+    model = run()
+    assert np.array_equal(model.codes, run().codes)
+    assert model.n_altruist == np.count_nonzero(model.codes == ALTRUIST)
+
+
+def test_rejects_unknown_networks():
+    with pytest.raises(ValueError):
+        SelfishAltruistNetwork(network="lattice")
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from selfish_altruist import lattice
+from selfish_altruist.lattice import SelfishAltruistLattice
+from selfish_altruist.replay import TrajectoryReplay, make_replay_server
+from test_trajectory import LATTICE, record
+
+PARAMETERS = dict(disease=0.1, harshness=0.2, seed=2)
+
+
+def row_padded(array):
+    return np.pad(array, ((1, 1), (0, 0)), mode="wrap")
+
+
+def agent_array(replay, attribute):
+    array = np.empty(replay.trajectory.shape)
+    for (x, y), agent in replay.cells.items():
+        array[y, x] = getattr(agent, attribute)
+    return array
+
+
+@pytest.fixture
+def recording(tmp_path):
+    record(tmp_path / "run", SelfishAltruistLattice(**LATTICE, **PARAMETERS))
+    return tmp_path / "run"
+
+
+def test_seek_shows_the_recorded_tick(recording):
+    replay = TrajectoryReplay(recording)
+    trajectory = replay.trajectory
+    assert replay.n_steps == len(trajectory) == 5
+    for step in reversed(range(replay.n_steps)):
+        replay.seek(step)
+        codes = np.asarray(trajectory.codes[step])
+        names = np.array(lattice.STRATEGY_NAMES)[codes]
+        for (x, y), agent in replay.cells.items():
+            assert agent.name == names[y, x]
+        assert replay.schedule.steps == step
+
+        padded = row_padded(codes)
+        fitness = lattice.calculate_fitness(
+            padded, replay.cost_of_altruism, replay.benefit_of_altruism, replay.harshness
+        )
+        weight_altruists, weight_selfish = lattice.lottery_weights(padded, row_padded(fitness), replay.disease)
+        assert np.allclose(agent_array(replay, "fitness"), fitness)
+        assert np.allclose(agent_array(replay, "weight_fitness_altruists_in_neighborhood"), weight_altruists)
+        assert np.allclose(agent_array(replay, "weight_fitness_selfish_in_neighborhood"), weight_selfish)
+
+
+def test_seek_rejects_steps_outside_the_recording(recording):
+    replay = TrajectoryReplay(recording)
+    for step in (-1, replay.n_steps):
+        with pytest.raises(IndexError):
+            replay.seek(step)
+
+
+def test_step_plays_to_the_end(recording):
+    replay = TrajectoryReplay(recording)
+    counts = replay.trajectory.counts_dataframe()
+    while replay.running:
+        replay.step()
+    assert replay.current_step == replay.n_steps - 1
+    assert replay.datacollector.model_vars["Altruist"][:] == counts["Altruist"].tolist()
+
+
+def test_server_sends_the_history_before_the_seeked_step(recording):
+    server = make_replay_server(recording)
+    server.model.seek(3)
+    histories = [history for history in server.render_history() if history is not None]
+    assert histories
+    for history in histories:
+        assert history["ticks"] == [0, 1, 2]
+    server.reset_model()
+    assert server.model.current_step == 0
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from mesa import Agent, Model
+from mesa.space import ContinuousSpace
+
+SPACES = [
+    dict(x_max=10, y_max=7, torus=True),
+    dict(x_max=10, y_max=7, torus=False),
+    dict(x_max=3, y_max=20, torus=True, x_min=-2, y_min=4),
+]
+
+
+def populate(space_kwargs, cell_size, n_agents=40, seed=0):
+    model = Model()
+    space = ContinuousSpace(**space_kwargs, cell_size=cell_size)
+    rng = np.random.default_rng(seed)
+    low = (space.x_min, space.y_min)
+    high = (space.x_max, space.y_max)
+    for i in range(n_agents):
+        space.place_agent(Agent(i, model), tuple(rng.uniform(low, high)))
+    return space
+
+
+def ids(agents):
+    return sorted(agent.unique_id for agent in agents)
+
+
+def test_cell_range_wraps_when_both_ends_fall_in_one_bucket():
+    space = ContinuousSpace(10, 7, True, cell_size=3)
+    # low wraps to 5.5 and high to 3.5, both in bucket 1
+    assert sorted(space._cell_range(1 - 2.5, 1 + 2.5, 1)) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("space_kwargs", SPACES)
+@pytest.mark.parametrize("cell_size", [0.7, 2, 3, 4.5])
+def test_cell_list_get_neighbors_equals_brute_force(space_kwargs, cell_size):
+    indexed = populate(space_kwargs, cell_size)
+    brute_force = populate(space_kwargs, None)
+    rng = np.random.default_rng(1)
+    for _ in range(40):
+        pos = tuple(rng.uniform((indexed.x_min, indexed.y_min), (indexed.x_max, indexed.y_max)))
+        radius = rng.uniform(0.1, 4)
+        assert ids(indexed.get_neighbors(pos, radius)) == ids(brute_force.get_neighbors(pos, radius))
+
+
+@pytest.mark.parametrize("space_kwargs", SPACES)
+@pytest.mark.parametrize("radius", [0.5, 1.3, 2.5, 4])
+def test_get_neighbor_lists_equals_get_neighbors(space_kwargs, radius):
+    space = populate(space_kwargs, None)
+    for include_center in (True, False):
+        agents, indptr, indices = space.get_neighbor_lists(radius, include_center=include_center)
+        for i, agent in enumerate(agents):
+            neighbors = [agents[j] for j in indices[indptr[i]:indptr[i + 1]]]
+            expected = space.get_neighbors(agent.pos, radius, include_center=include_center)
+            assert ids(neighbors) == ids(expected)
+
+
+def test_cell_list_follows_moves_and_removals():
+    indexed = populate(SPACES[0], 2)
+    rng = np.random.default_rng(2)
+    agents = list(indexed._agent_to_index)
+    for agent in agents[:10]:
+        indexed.move_agent(agent, tuple(rng.uniform((0, 0), (10, 7))))
+    for agent in agents[10:15]:
+        indexed.remove_agent(agent)
+    for agent in agents[15:]:
+        expected = [
+            other for other in agents[:10] + agents[15:]
+            if min(abs(other.pos[0] - agent.pos[0]), 10 - abs(other.pos[0] - agent.pos[0])) ** 2
+            + min(abs(other.pos[1] - agent.pos[1]), 7 - abs(other.pos[1] - agent.pos[1])) ** 2 <= 2.0 ** 2
+        ]
+        assert ids(indexed.get_neighbors(agent.pos, 2.0)) == ids(expected)
@@ -0,0 +1,144 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from conftest import REPO_ROOT
+from mesa.batchrunner import LatinHypercubeSampler, _make_model_kwargs
+from mesa.main import cli
+from mesa.sweep import DEFAULTS, _values, load_job, make_parameters, write_rows
+
+MODEL = {
+    "model": "selfish_altruist.lattice:SelfishAltruistLattice",
+    "path": [os.path.join(REPO_ROOT, "selfish_altruist")],
+}
+LATTICE = {"n_grid_cells_width": 8, "n_grid_cells_height": 8, "n_bands": 1}
+
+
+def write_job(tmp_path, **config):
+    path = tmp_path / "job.json"
+    path.write_text(json.dumps({**MODEL, **config}))
+    return str(path)
+
+
+def test_values():
+    assert _values(0.13) == 0.13
+    assert _values([1, 2]) == [1, 2]
+    assert _values({"range": [1, 7, 2]}) == [1, 3, 5]
+    disease = _values({"range": [0.15, 0.25, 0.005]})
+    assert len(disease) == 20 and disease[2] == 0.16 and disease[-1] < 0.25
+    assert _values({"linspace": [0.0, 1.0, 5]}) == [0.0, 0.25, 0.5, 0.75, 1.0]
+    with pytest.raises(ValueError):
+        _values({"logspace": [0, 1, 5]})
+
+
+def test_load_job_fills_defaults_and_resolves_paths(tmp_path):
+    job = load_job(write_job(tmp_path, path=["models"], output="out.csv"))
+    assert job["path"] == [os.path.join(tmp_path, "models")]
+    assert job["output"] == os.path.join(tmp_path, "out.csv")
+    assert job["iterations"] == DEFAULTS["iterations"]
+    assert job["reuse_models"] is False
+    assert load_job(write_job(tmp_path))["output"] == "-"
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"iteration": 3},
+        {"stop": {"reporter": "%Altruist", "ci_width": 0.1}, "aggregate": {"%Altruist": ["mean"]}},
+    ],
+)
+def test_load_job_rejects_bad_jobs(tmp_path, config):
+    path = tmp_path / "job.json"
+    path.write_text(json.dumps({**MODEL, **config}))
+    with pytest.raises(ValueError):
+        load_job(str(path))
+
+
+def test_load_job_needs_a_model(tmp_path):
+    path = tmp_path / "job.json"
+    path.write_text(json.dumps({"parameters": {}}))
+    with pytest.raises(ValueError):
+        load_job(str(path))
+
+
+def test_make_parameters_with_a_sampler(tmp_path):
+    sampler = {"type": "latin_hypercube", "n": 6, "bounds": {"disease": [0.1, 0.3]}, "seed": 0}
+    job = load_job(write_job(tmp_path, parameters={"harshness": 0.5}, sampler=sampler))
+    parameters = make_parameters(job)
+    assert isinstance(parameters, LatinHypercubeSampler)
+    points = _make_model_kwargs(parameters)
+    assert len(points) == 6
+    assert all(point["harshness"] == 0.5 and 0.1 <= point["disease"] <= 0.3 for point in points)
+
+    job["parameters"] = {"harshness": [0.5, 0.6]}
+    with pytest.raises(ValueError):
+        make_parameters(job)
+    job["parameters"] = {}
+    job["sampler"] = {**sampler, "type": "grid"}
+    with pytest.raises(ValueError):
+        make_parameters(job)
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_write_rows_round_trip(tmp_path, suffix):
+    rows = [{"disease": 0.1, "Altruist": np.int64(3)}, {"disease": 0.2, "Altruist": np.int64(5)}]
+    output = str(tmp_path / f"rows{suffix}")
+    write_rows(rows, output)
+    with open(output) as f:
+        written = json.load(f) if suffix == ".json" else [json.loads(line) for line in f]
+    assert written == [{"disease": 0.1, "Altruist": 3}, {"disease": 0.2, "Altruist": 5}]
+    with pytest.raises(ValueError):
+        write_rows(rows, str(tmp_path / "rows.txt"))
+
+
+def test_sweep_command_writes_every_run(tmp_path):
+    job = write_job(
+        tmp_path,
+        parameters={**LATTICE, "disease": {"linspace": [0.1, 0.3, 3]}},
+        iterations=2,
+        max_steps=3,
+        common_random_numbers=True,
+        output="rows.csv",
+    )
+    result = CliRunner().invoke(cli, ["sweep", job, "--no-progress"])
+    assert result.exit_code == 0, result.output
+    with open(tmp_path / "rows.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 6
+    assert sorted({row["disease"] for row in rows}) == ["0.1", "0.2", "0.3"]
+    assert "6 runs in" in result.output
+
+
+def test_sweep_command_with_a_stop_rule(tmp_path):
+    stop = {"reporter": "%Altruist", "ci_width": 1.0, "wave_size": 3, "max_iterations": 6}
+    job = write_job(tmp_path, parameters=LATTICE, stop=stop, max_steps=2, output="rows.jsonl")
+    result = CliRunner().invoke(cli, ["sweep", job, "--no-progress"])
+    assert result.exit_code == 0, result.output
+    with open(tmp_path / "rows.jsonl") as f:
+        rows = [json.loads(line) for line in f]
+    # the interval is narrower than ci_width after the first wave
+    assert sorted(row["iteration"] for row in rows) == [0, 1, 2]
+
+
+def test_sweep_command_reports_bad_jobs(tmp_path):
+    job = write_job(tmp_path, parameters={"disease": {"logspace": [0, 1, 3]}})
+    result = CliRunner().invoke(cli, ["sweep", job, "--no-progress"])
+    assert result.exit_code != 0
+    assert "Unknown parameter values" in result.output
+
+
+def test_bench_command_times_every_combination(tmp_path):
+    job = write_job(
+        tmp_path, parameters={**LATTICE, "disease": [0.1, 0.2]}, max_steps=2, output="bench.json"
+    )
+    result = CliRunner().invoke(cli, ["bench", job, "--repeat", "2"])
+    assert result.exit_code == 0, result.output
+    with open(tmp_path / "bench.json") as f:
+        rows = json.load(f)
+    assert [row["disease"] for row in rows] == [0.1, 0.2]
+    for row in rows:
+        assert row["construct [s]"] > 0 and row["step [s]"] > 0 and row["steps/s"] > 0
@@ -0,0 +1,144 @@
+import pytest
+
+from mesa import Agent, Model
+from mesa.time import RandomActivation, RandomActivationByType, StagedActivation
+
+
+class LogAgent(Agent):
+    def step(self):
+        self.model.log.append(self.unique_id)
+
+
+class LogModel(Model):
+    def __init__(self, n_agents=10, seed=None):
+        super().__init__()
+        self.reset_randomizer(seed)
+        self.log = []
+        self.schedule = RandomActivation(self)
+        for i in range(n_agents):
+            self.schedule.add(LogAgent(i, self))
+
+    def step(self):
+        self.schedule.step()
+
+
+def run_order(model, steps=3):
+    model.log = []
+    for _ in range(steps):
+        model.step()
+    return model.log
+
+
+def test_random_activation_activates_every_agent_once_per_step():
+    model = LogModel(seed=1)
+    order = run_order(model, steps=1)
+    assert sorted(order) == list(range(10))
+
+
+def test_reset_randomizer_repeats_the_activation_order():
+    model = LogModel(seed=1)
+    first = run_order(model)
+    assert first == run_order(LogModel(seed=1))
+
+    model.reset_randomizer(1)
+    assert run_order(model) == first
+    model.reset_randomizer(2)
+    assert run_order(model) != first
+
+
+def test_shuffled_buffer_skips_agents_removed_during_the_step():
+    model = LogModel(seed=0)
+    agents = model.schedule.agents
+
+    class RemovingAgent(LogAgent):
+        def step(self):
+            super().step()
+            for agent in agents:
+                if agent.unique_id not in model.log and agent.unique_id in model.schedule._agents:
+                    model.schedule.remove(agent)
+                    break
+
+    model.schedule.add(RemovingAgent(10, model))
+    order = run_order(model, steps=1)
+    assert len(order) == len(set(order))
+    assert set(order) <= set(model.schedule._agents) | {a.unique_id for a in agents}
+    assert len(order) == model.schedule.get_agent_count()
+
+
+class StagedAgent(LogAgent):
+    def first(self):
+        self.model.log.append(("first", self.unique_id))
+
+    def second(self):
+        self.model.log.append(("second", self.unique_id))
+
+
+@pytest.mark.parametrize("shuffle_between_stages", [False, True])
+def test_staged_activation_runs_every_stage_for_every_agent(shuffle_between_stages):
+    def staged_order(seed):
+        model = Model()
+        model.reset_randomizer(seed)
+        model.log = []
+        model.schedule = StagedActivation(
+            model, ["first", "second"], shuffle=True, shuffle_between_stages=shuffle_between_stages
+        )
+        for i in range(8):
+            model.schedule.add(StagedAgent(i, model))
+        model.schedule.step()
+        model.schedule.step()
+        return model.log
+
+    log = staged_order(3)
+    assert log == staged_order(3)
+    assert log != staged_order(4)
+    first_step = log[:16]
+    assert sorted(i for stage, i in first_step if stage == "first") == list(range(8))
+    assert [stage for stage, _ in first_step] == ["first"] * 8 + ["second"] * 8
+    second_stage = [i for stage, i in first_step if stage == "second"]
+    if not shuffle_between_stages:
+        assert second_stage == list(range(8))
+    else:
+        assert sorted(second_stage) == list(range(8))
+
+
+class OtherLogAgent(LogAgent):
+    pass
+
+
+def test_random_activation_by_type_steps_every_agent_once(capsys):
+    def by_type_order(seed):
+        model = Model()
+        model.reset_randomizer(seed)
+        model.log = []
+        model.schedule = RandomActivationByType(model)
+        for i in range(10):
+            model.schedule.add((LogAgent if i % 2 else OtherLogAgent)(i, model))
+        model.schedule.step()
+        return model.log
+
+    log = by_type_order(5)
+    assert sorted(log) == list(range(10))
+    # one type after the other
+    assert len({i % 2 for i in log[:5]}) == 1
+    assert log == by_type_order(5)
+    assert capsys.readouterr().out == ""
+
+
+def test_random_activation_by_type_skips_removed_agents():
+    class RemovingAgent(LogAgent):
+        def step(self):
+            super().step()
+            # the first agent to step removes all the others
+            for agent in list(self.model.schedule.agents_by_type[RemovingAgent].values()):
+                if agent is not self:
+                    self.model.schedule.remove(agent)
+
+    model = Model()
+    model.reset_randomizer(0)
+    model.log = []
+    model.schedule = RandomActivationByType(model)
+    for i in range(6):
+        model.schedule.add(RemovingAgent(i, model))
+    model.schedule.step()
+    assert len(model.log) == 1
+    assert model.schedule.get_type_count(RemovingAgent) == 1
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from selfish_altruist.lattice import SelfishAltruistLattice
+from selfish_altruist.model import SelfishAltruist
+from selfish_altruist.trajectory import DiffLog, DiffLogRecorder, Trajectory, TrajectoryRecorder, open_recording
+
+LATTICE = dict(n_grid_cells_height=16, n_grid_cells_width=12, n_bands=1)
+
+
+def record(path, model, steps=4):
+    with TrajectoryRecorder(path, model, max_steps=steps + 1) as recorder:
+        recorder.record(model)
+        for _ in range(steps):
+            model.step()
+            recorder.record(model)
+    return Trajectory(path)
+
+
+@pytest.mark.parametrize("model_cls", [SelfishAltruistLattice, SelfishAltruist])
+def test_unseeded_models_store_the_seed_they_ran_with(model_cls):
+    model = model_cls(**LATTICE) if model_cls is SelfishAltruistLattice else model_cls()
+    assert model.seed is not None
+    assert model._seed == model.seed
+
+
+def test_unseeded_recording_can_be_repeated(tmp_path):
+    trajectory = record(tmp_path / "run", SelfishAltruistLattice(**LATTICE))
+    assert trajectory.seed is not None
+
+    repeated = SelfishAltruistLattice(**trajectory.parameters, seed=trajectory.seed, n_bands=1)
+    for step in range(len(trajectory)):
+        if step:
+            repeated.step()
+        assert np.array_equal(trajectory.codes[step], repeated.codes)
+
+
+def test_trajectory_round_trip(tmp_path):
+    model = SelfishAltruistLattice(**LATTICE, seed=2)
+    expected = [model.codes.copy()]
+    with TrajectoryRecorder(tmp_path / "run", model, max_steps=8) as recorder:
+        recorder.record(model)
+        for _ in range(6):
+            model.step()
+            recorder.record(model)
+            expected.append(model.codes.copy())
+    trajectory = Trajectory(tmp_path / "run")
+    assert len(trajectory) == 7
+    np.testing.assert_array_equal(trajectory.codes, np.array(expected))
+    assert trajectory.counts_dataframe()["Altruist"].iloc[-1] == model.n_altruist
+
+
+@pytest.mark.parametrize("keyframe_interval", [1, 3, 100])
+def test_diff_log_round_trip(tmp_path, keyframe_interval):
+    model = SelfishAltruistLattice(**LATTICE, seed=2)
+    expected = [model.codes.copy()]
+    with DiffLogRecorder(tmp_path / "run", model, keyframe_interval=keyframe_interval) as recorder:
+        recorder.record(model)
+        for _ in range(8):
+            model.step()
+            recorder.record(model)
+            expected.append(model.codes.copy())
+    diff_log = open_recording(tmp_path / "run")
+    assert isinstance(diff_log, DiffLog)
+    assert len(diff_log) == len(expected)
+    for step in reversed(range(len(expected))):
+        np.testing.assert_array_equal(diff_log.frame(step), expected[step])
+    for step, frame in enumerate(diff_log.iter_frames()):
+        np.testing.assert_array_equal(frame, expected[step])
+    assert diff_log.counts_dataframe()["Selfish"].tolist() == [
+        int(np.count_nonzero(codes == 2)) for codes in expected
+    ]